@@ -1,56 +1,60 @@
 # app.py  –  Gerbe sandbox demo
+#
+# Streamlit re‑runs this whole script on every widget change, so all the
+# heavy work is cached: decoded uploads (keyed on a content hash), the
+# composed product, its relative error and the rendered figure.  Moving the
+# tolerance slider only re‑thresholds a cached float.
+#
+# Two modes:
+#   • Single triangle – upload A→B, B→C (and optionally A→C) matrices.
+#   • Whole graph     – upload contexts.yaml, or a .zip with contexts.yaml
+#                       plus the artefacts it points at; gerbe_core checks
+#                       every triangle in a background thread.
 import streamlit as st, numpy as np, networkx as nx, matplotlib.pyplot as plt
+import hashlib, tempfile, threading, time, warnings, zipfile, yaml
+import pandas as pd
 from io import BytesIO
+from pathlib import Path
+
+from gerbe_core import check_triangles, rel_error, blame_edges
+from gerbe_validate import config_to_runtime
 
 st.set_page_config(page_title="Gerbe triangle validator", page_icon="🌾")
 
-st.title("🌾  Gerbe sandbox — local→global checker")
+st.title("🌾  Gerbe sandbox — local→global checker")
 
-# --- sidebar inputs -------------------------------------------------------
-st.sidebar.header("Contexts")
-a = st.sidebar.text_input("Context A", "US")
-b = st.sidebar.text_input("Context B", "EU")
-c = st.sidebar.text_input("Context C", "GLOBAL")
+mode = st.sidebar.radio("Mode", ["Single triangle", "Whole graph"])
+rel_tol = st.sidebar.slider("Relative tolerance ε", 0.01, 1.0, 0.30, 0.01)
 
-st.sidebar.header("Upload matrices (.npy)")
-file_ab = st.sidebar.file_uploader(f"{a} → {b}",   type=".npy")
-file_bc = st.sidebar.file_uploader(f"{b} → {c}",   type=".npy")
-file_ac = st.sidebar.file_uploader(f"{a} → {c}",   type=".npy (optional)")
+# --- helpers (cached across reruns) ---------------------------------------
+# cache_resource hands back the same array object (no pickle copy of a
+# 4096×4096 matrix per rerun); arguments starting with "_" are not hashed,
+# the content digest is the cache key.
+@st.cache_resource(show_spinner=False)
+def decode_npy(digest, _raw):
+    return np.load(BytesIO(_raw))
 
-rel_tol = st.sidebar.slider("Relative tolerance ε", 0.01, 1.0, 0.30, 0.01)
+@st.cache_resource(show_spinner=False)
+def identity(dim):
+    return np.eye(dim)                             # built once per dimension
 
-# --- helpers --------------------------------------------------------------
 def load_npy(file, dim):
     if file is None:
-        return np.eye(dim)           # missing ⇒ identity
-    return np.load(BytesIO(file.read()))
-
-def deep_close(lhs, rhs, tol):
-    diff = np.linalg.norm(lhs - rhs)
-    base = np.linalg.norm(lhs)
-    return diff / base < tol if base else diff == 0, diff / base
-
-# --- main action ----------------------------------------------------------
-if st.button("Validate ▶"):
-    if file_ab is None or file_bc is None:
-        st.error("Please upload at least A→B and B→C matrices.")
-        st.stop()
+        return f"eye:{dim}", identity(dim)         # missing ⇒ identity
+    raw = file.getvalue()                          # read() would drain the buffer
+    digest = hashlib.sha256(raw).hexdigest()
+    return digest, decode_npy(digest, raw)
 
-    # load matrices
-    M_ab = load_npy(file_ab, 64)
-    M_bc = load_npy(file_bc, 64)
-    M_ac = load_npy(file_ac, 64) if file_ac else np.eye(64)
+@st.cache_resource(show_spinner=False)
+def composed(h_ab, h_bc, _M_ab, _M_bc):
+    return _M_bc @ _M_ab                           # path A→B→C
 
-    comp = M_bc @ M_ab              # path A→B→C
-    ok, rel_err = deep_close(comp, M_ac, rel_tol)
-
-    # --- result text ------------------------------------------------------
-    if ok:
-        st.success(f"✔  Triangle is consistent  (relative error {rel_err:.3f} < ε={rel_tol})")
-    else:
-        st.error(f"⚠  Obstruction detected!  (relative error {rel_err:.3f} ≥ ε={rel_tol})")
+@st.cache_data(show_spinner=False)
+def relative_error(h_ab, h_bc, h_ac, _comp, _M_ac):
+    return rel_error(_comp, _M_ac)
 
-    # --- provenance graph -------------------------------------------------
+@st.cache_data(show_spinner=False)
+def render_graph(a, b, c, ok):
     G = nx.DiGraph()
     G.add_edge(a, b); G.add_edge(b, c); G.add_edge(a, c)
     pos = nx.spring_layout(G, seed=7)
@@ -61,11 +65,165 @@ if st.button("Validate ▶"):
     edge_lbls = {(a,b):f"{a}→{b}", (b,c):f"{b}→{c}", (a,c):f"{a}→{c}"}
     nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_lbls, font_size=8, ax=ax)
     ax.set_axis_off()
-    st.pyplot(fig)
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=120)
+    plt.close(fig)
+    return buf.getvalue()
+
+# --- whole‑graph helpers ----------------------------------------------------
+@st.cache_resource(show_spinner=False)
+def load_bundle(digest, name, _raw):
+    """Decode an uploaded contexts.yaml / zip bundle → (runtime, warnings)."""
+    base_dir = None
+    if name.endswith(".zip"):
+        base_dir = Path(tempfile.mkdtemp(prefix="gerbe_"))
+        with zipfile.ZipFile(BytesIO(_raw)) as zf:
+            zf.extractall(base_dir)
+        configs = sorted(base_dir.rglob("*.y*ml"))
+        if not configs:
+            raise ValueError("zip bundle contains no contexts.yaml")
+        cfg_path = configs[0]
+        base_dir = cfg_path.parent
+        cfg = yaml.safe_load(cfg_path.read_text())
+    else:
+        cfg = yaml.safe_load(_raw)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        runtime = config_to_runtime(cfg, base_dir=base_dir)
+    return runtime, [str(w.message) for w in caught]
+
+def start_job(runtime, tol):
+    """Run check_triangles off the script thread; progress lands in `job`."""
+    job = {"done": 0, "total": 0, "result": None, "error": None, "tol": tol}
+    def work():
+        try:
+            job["result"] = check_triangles(
+                runtime, tol=tol, progress=lambda d, t: job.update(done=d, total=t))
+        except Exception as e:             # surfaced in the UI, not swallowed
+            job["error"] = e
+    job["thread"] = threading.Thread(target=work, daemon=True)
+    job["thread"].start()
+    return job
+
+def neighbourhood_dot(rows):
+    """DOT for the failing triangles on the current page only."""
+    bad = {frozenset(e) for r in rows
+           for e in [(r["a"], r["b"]), (r["b"], r["c"]), (r["a"], r["c"])]}
+    nodes = sorted({n for e in bad for n in e}, key=str)
+    lines = ["graph G {", "  node [shape=ellipse, fontsize=10];"]
+    lines += [f'  "{n}";' for n in nodes]
+    lines += [f'  "{x}" -- "{y}" [color=red];' for x, y in (sorted(e, key=str) for e in bad)]
+    lines.append("}")
+    return "\n".join(lines)
+
+# --- single triangle ----------------------------------------------------------
+if mode == "Single triangle":
+    st.sidebar.header("Contexts")
+    a = st.sidebar.text_input("Context A", "US")
+    b = st.sidebar.text_input("Context B", "EU")
+    c = st.sidebar.text_input("Context C", "GLOBAL")
+
+    st.sidebar.header("Upload matrices (.npy)")
+    file_ab = st.sidebar.file_uploader(f"{a} → {b}",   type=".npy")
+    file_bc = st.sidebar.file_uploader(f"{b} → {c}",   type=".npy")
+    file_ac = st.sidebar.file_uploader(f"{a} → {c}",   type=".npy (optional)")
+
+    # The button is only True on the click's own rerun; remember it so slider
+    # moves afterwards keep showing (re‑thresholded) results.
+    if st.button("Validate ▶"):
+        st.session_state["validated"] = True
+
+    if st.session_state.get("validated"):
+        if file_ab is None or file_bc is None:
+            st.error("Please upload at least A→B and B→C matrices.")
+            st.stop()
+
+        # load matrices (decoded once per distinct upload)
+        h_ab, M_ab = load_npy(file_ab, 64)
+        h_bc, M_bc = load_npy(file_bc, 64)
+        comp = composed(h_ab, h_bc, M_ab, M_bc)
+        h_ac, M_ac = load_npy(file_ac, comp.shape[0])
+
+        rel_err = relative_error(h_ab, h_bc, h_ac, comp, M_ac)
+        ok = rel_err < rel_tol          # the only per‑slider‑move work
+
+        # --- result text --------------------------------------------------
+        if ok:
+            st.success(f"✔  Triangle is consistent  (relative error {rel_err:.3f} < ε={rel_tol})")
+        else:
+            st.error(f"⚠  Obstruction detected!  (relative error {rel_err:.3f} ≥ ε={rel_tol})")
+
+        # --- provenance graph ---------------------------------------------
+        st.image(render_graph(a, b, c, ok))
+
+        st.caption("Relative Frobenius error on composed vs shortcut matrix.")
+
+# --- whole graph --------------------------------------------------------------
+else:
+    st.sidebar.header("Graph bundle")
+    bundle = st.sidebar.file_uploader("contexts.yaml or .zip of edge artefacts",
+                                      type=["yaml", "yml", "zip"])
+    if bundle is None:
+        st.info("Upload a contexts.yaml (or a zip with it and its .npy/.json files).")
+        st.stop()
+
+    raw = bundle.getvalue()
+    digest = hashlib.sha256(raw).hexdigest()
+    runtime, load_warnings = load_bundle(digest, bundle.name, raw)
+    if load_warnings:
+        with st.expander(f"{len(load_warnings)} loader warnings"):
+            st.text("\n".join(load_warnings))
+
+    # a finished job is kept across reruns; only the button starts a new one
+    job = st.session_state.get("job")
+    if st.button("Check all triangles ▶"):
+        job = start_job(runtime, rel_tol); job["digest"] = digest
+        st.session_state["job"] = job
+
+    if job is None or job["digest"] != digest:
+        st.stop()
+    if job["tol"] != rel_tol:
+        st.warning(f"Results below are for ε={job['tol']}; re‑run to apply ε={rel_tol}.")
+
+    if job["thread"].is_alive():
+        bar = st.progress(0.0, text="Checking triangles…")
+        while job["thread"].is_alive():
+            total = job["total"] or 1
+            bar.progress(min(job["done"] / total, 1.0),
+                         text=f"Checked {job['done']:,} / {job['total']:,} triangles")
+            time.sleep(0.2)
+        bar.empty()
+    if job["error"] is not None:
+        st.exception(job["error"]); st.stop()
+
+    issues = job["result"]
+    if not issues:
+        st.success(f"✔  No inconsistencies in {job['total']:,} triangles (ε={job['tol']})")
+        st.stop()
+    st.error(f"⚠  {len(issues):,} failing triangles out of {job['total']:,} (ε={job['tol']})")
+
+    suspects = blame_edges(issues, runtime, top=10)
+    st.subheader("Most likely culprit edges")
+    st.dataframe(pd.DataFrame([{**s, "edge": f"{s['edge'][0]}–{s['edge'][1]}"}
+                               for s in suspects]), hide_index=True)
+
+    # sort the whole result set first, then paginate
+    rows = [{"a": t[0], "b": t[1], "c": t[2], "kind": k} for t, k in issues]
+    col1, col2, col3 = st.columns(3)
+    sort_by  = col1.selectbox("Sort by", ["a", "b", "c", "kind"])
+    per_page = col2.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+    pages    = max(1, -(-len(rows) // per_page))
+    page     = col3.number_input("Page", 1, pages, 1)
+    rows.sort(key=lambda r: str(r[sort_by]))
+    shown = rows[(page - 1) * per_page : page * per_page]
+
+    st.dataframe(pd.DataFrame(shown), hide_index=True, use_container_width=True)
+    st.caption(f"Page {page}/{pages}")
 
-    st.caption("Relative Frobenius error on composed vs shortcut matrix.")
+    st.subheader("Failing neighbourhood (this page)")
+    st.graphviz_chart(neighbourhood_dot(shown))
 
 # --- footer ---------------------------------------------------------------
-st.markdown("---\nGerbe sandbox &nbsp;•&nbsp; "
+st.markdown("---\nGerbe sandbox &nbsp;•&nbsp; "
             "[GitHub](https://github.com/your‑org/gerbe) "
-            " •  Mathematical guarantee, plain‑English UX.")
+            " •  Mathematical guarantee, plain‑English UX.")
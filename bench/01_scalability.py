@@ -22,6 +22,9 @@ python bench/01_scalability.py --nodes 200 --dim 128 --deg 4
 
 # Sweep 100→600 nodes in steps of 100
 python bench/01_scalability.py --sweep --out sweep.csv
+
+# Phase table (+ Chrome trace) via gerbe_profile
+python bench/01_scalability.py --profile scal.trace.json
 """
 
 import argparse
@@ -36,6 +39,8 @@ import networkx as nx
 import numpy as np
 import psutil
 
+from gerbe_profile import PROFILER as prof
+
 process = psutil.Process(os.getpid())
 
 
@@ -148,7 +153,8 @@ def bench_once(n: int, dim: int, deg: int, csv_path: str | None):
 
     def run(fn):
         start = time.time()
-        _ = fn(nodes, mats, vec) if fn == obstruction_baseline else fn(mats, vec, G)
+        with prof.phase(fn.__name__):
+            _ = fn(nodes, mats, vec) if fn == obstruction_baseline else fn(mats, vec, G)
         rt = time.time() - start
         mem_mb = process.memory_info().rss / (1024 * 1024)
         return rt, mem_mb
@@ -187,7 +193,8 @@ def sweep(deg: int, csv_path: str | None):
 
         def runtime(fn):
             start = time.time()
-            _ = fn(nodes, mats, vec) if fn == obstruction_baseline else fn(mats, vec, G)
+            with prof.phase(fn.__name__):
+                _ = fn(nodes, mats, vec) if fn == obstruction_baseline else fn(mats, vec, G)
             return time.time() - start
 
         b = runtime(obstruction_baseline)
@@ -212,10 +219,24 @@ if __name__ == "__main__":
         default=None,
         help="CSV file to append benchmark results (optional)",
     )
+    ap.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="TRACE.json",
+        help="print a phase profile; with a path also write a Chrome trace",
+    )
     args = ap.parse_args()
+    if args.profile is not None:
+        prof.enable(trace=bool(args.profile))
 
     if args.sweep:
         sweep(args.deg, args.out)
     else:
         bench_once(args.nodes, args.dim, args.deg, args.out)
 
+    if args.profile is not None:
+        print(prof.report())
+        if args.profile:
+            prof.export_trace(args.profile)
+
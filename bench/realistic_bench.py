@@ -7,44 +7,216 @@ and measure Gerbe Core runtime and peak memory.
 
 Usage:
     python realistic_bench.py --nodes 1000 --deg 10
+    python realistic_bench.py --scenario radius --seeds 5 --radius 2
+    python realistic_bench.py --scenario sample --bad-frac 0.02
+    python realistic_bench.py --profile bench.trace.json
+    python realistic_bench.py --scenario ooc --graph powerlaw --mem-mb 4
+    python realistic_bench.py --scenario gemm --graph powerlaw --dim 256 --nodes 300 --deg 8
+    python realistic_bench.py --scenario mutations --mutations 20000
+    python realistic_bench.py --scenario admit --bad-frac 0 --probes 4
+    python realistic_bench.py --shared --dim 256     # interned payloads
 """
 
-import argparse, tracemalloc, time, random, networkx as nx
+import argparse, tracemalloc, time, random, tempfile, networkx as nx
 import numpy as np
-from gerbe_core import check_triangles
+from pathlib import Path
+from gerbe_core import (check_triangles, check_gemm, sample_triangles, EdgeCache,
+                        enumerate_triangles, GerbeGraph, TransportTable)
+from gerbe_profile import PROFILER as prof
 
-def make_graph(n, deg):
+def make_graph(n, deg, kind="random", dim=64, shared=False):
     ctx = [f"S{i}" for i in range(n)]
     G   = nx.DiGraph()
     mats = {}
+    I = np.eye(dim)                   # shared: one payload, as interning would give
+    eye = (lambda: I) if shared else (lambda: np.eye(dim))
+    if kind == "powerlaw":
+        # hubs + high clustering (Holme–Kim), random edge direction
+        for u, v in nx.powerlaw_cluster_graph(n, deg, 0.6, seed=random.randrange(2**32)).edges():
+            a, b = random.sample((ctx[u], ctx[v]), 2)
+            mats[(a, b)] = eye()
+            G.add_edge(a, b)
+        return ctx, mats, G
     for _ in range(n * deg):
         a, b = random.sample(ctx, 2)
         if (a, b) in mats: continue
-        mats[(a, b)] = np.eye(64)  # identity for perf test
+        mats[(a, b)] = eye()  # identity for perf test
         G.add_edge(a, b)
     return ctx, mats, G
 
 def triangles(G):
-    return [c for c in nx.enumerate_all_cliques(G.to_undirected()) if len(c)==3]
+    return list(enumerate_triangles(G.to_undirected()))
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--nodes", type=int, default=1000)
     ap.add_argument("--deg",   type=int, default=10)
+    ap.add_argument("--dim",   type=int, default=64, help="context dimension")
+    ap.add_argument("--shared", action="store_true",
+                    help="let every edge alias one matrix buffer, as payload interning "
+                         "would (default: a distinct buffer per edge)")
+    ap.add_argument("--graph", choices=["random", "powerlaw"], default="random",
+                    help="uniform random edges, or a clustered power‑law graph")
+    ap.add_argument("--scenario", choices=["full", "radius", "sample", "ooc", "gemm", "mutations",
+                                           "admit"],
+                    default="full")
+    ap.add_argument("--seeds",  type=int, default=5,
+                    help="radius scenario: number of random seed contexts")
+    ap.add_argument("--radius", type=int, default=1)
+    ap.add_argument("--bad-frac", type=float, default=0.0,
+                    help="fraction of edges replaced by a drifted (2·I) transform")
+    ap.add_argument("--budget", type=int, default=20_000,
+                    help="sample scenario: max sampled triangles")
+    ap.add_argument("--mem-mb", type=float, default=16,
+                    help="ooc scenario: edge cache budget in MB")
+    ap.add_argument("--mutations", type=int, default=5_000,
+                    help="mutations scenario: edge add / update / remove events to replay")
+    ap.add_argument("--probes", type=int, default=1,
+                    help="admit scenario: probe columns per node in the transport table")
+    ap.add_argument("--profile", nargs="?", const="", metavar="TRACE.json",
+                    help="print gerbe_core phase timings; with a path also "
+                         "write a Chrome trace")
     args = ap.parse_args()
+    if args.profile is not None:
+        prof.enable(trace=bool(args.profile))
 
-    ctx, mats, G = make_graph(args.nodes, args.deg)
+    ctx, mats, G = make_graph(args.nodes, args.deg, args.graph, args.dim, args.shared)
+    drift = 2 * np.eye(args.dim)
+    for e in random.sample(list(mats), int(args.bad_frac * len(mats))):
+        mats[e] = drift if args.shared else 2 * np.eye(args.dim)
     tris = triangles(G)
     print(f"{args.nodes=}  {args.deg=}  edges={len(mats):,}  triangles={len(tris):,}")
+    unique = {id(M): M.nbytes for M in mats.values()}
+    dense  = sum(M.nbytes for M in mats.values())
+    print(f"Edge payloads: {len(unique):,} unique (dedup ×{len(mats) / len(unique):,.0f}), "
+          f"{sum(unique.values()) / 2**20:,.1f} MB held of {dense / 2**20:,.1f} MB")
 
+    graph = {"contexts":ctx, "mats":mats, "base_vec":np.eye(args.dim)[0]}
     tracemalloc.start()
     t0 = time.perf_counter()
-    _ = check_triangles({"contexts":ctx,"mats":mats}, tol=0.30)  # numeric checker
+    issues = check_triangles(graph, tol=0.30)  # numeric checker
     dt = time.perf_counter() - t0
     mem = tracemalloc.get_traced_memory()[1] / (1024*1024)
     tracemalloc.stop()
 
     print(f"Runtime {dt:,.2f} s   |   Peak RAM {mem:,.1f} MB")
 
+    if args.scenario == "radius":
+        seeds, stats = random.sample(ctx, args.seeds), {}
+        _ = check_triangles(graph, tol=0.30,
+                            seeds=seeds, radius=args.radius, stats=stats,
+                            count_skipped=True)
+        print(f"Radius {args.radius} around {args.seeds} seeds: "
+              f"{stats['triangles_enumerated']:,} checked, "
+              f"{stats['triangles_skipped']:,} skipped   |   "
+              f"{stats['seconds']:,.3f} s vs full {dt:,.2f} s")
+
+    if args.scenario == "sample":
+        est = sample_triangles(graph, tol=0.30, budget=args.budget)
+        exact = len(issues) / max(len(tris), 1)
+        print(f"Sampled {est['samples']:,} triangles in {est['seconds']:,.3f} s: "
+              f"rate {est['rate']:.2%} (95% CI {est['ci_low']:.2%}–{est['ci_high']:.2%}, "
+              f"stopped on {est['stopped']})   |   exact {exact:.2%} in {dt:,.2f} s")
+
+
+    if args.scenario == "ooc":
+        # spill every edge to its own .npy and memory‑map it back
+        budget = int(args.mem_mb * 2**20)
+        with tempfile.TemporaryDirectory() as tmp:
+            mm = {}
+            for i, (e, M) in enumerate(mats.items()):
+                np.save(Path(tmp, f"{i}.npy"), M)
+                mm[e] = np.load(Path(tmp, f"{i}.npy"), mmap_mode="r")
+            total = sum(M.nbytes for M in mm.values())
+
+            naive = EdgeCache(mm, budget)           # clique order, same cache size
+            t0 = time.perf_counter()
+            check_triangles({**graph, "mats": naive}, tol=0.30)
+            dt_naive = time.perf_counter() - t0
+
+            stats = {}
+            check_triangles({**graph, "mats": mm}, tol=0.30,
+                            memory_budget=budget, stats=stats)
+        for name, st, sec in (("clique order", naive.stats(), dt_naive),
+                              (f"{stats['blocks']} blocks", stats, stats["seconds"])):
+            print(f"{name:>14}: read {st['bytes_read'] / 2**20:,.1f} MB of "
+                  f"{total / 2**20:,.1f} MB   |   hit rate {st['hit_rate']:.1%}   |   "
+                  f"{sec:,.2f} s")
+
+    if args.scenario == "gemm":
+        per, bucketed = {}, {}
+        check_triangles(graph, tol=0.30, stats=per)
+        check_gemm(graph, tol=0.30, stats=bucketed)
+        print(f"Mat‑vec per triangle: check {per['check_s']:,.3f} s   |   "
+              f"GEMM per middle edge: check {bucketed['check_s']:,.3f} s "
+              f"({bucketed['buckets']:,} buckets, largest {bucketed['max_bucket']}) "
+              f"→ {per['check_s'] / max(bucketed['check_s'], 1e-9):.2f}×")
+
+    if args.scenario == "mutations":
+        # replay a stream: 40% add, 40% update (10% of them drifted), 20% remove
+        t0 = time.perf_counter()
+        gg = GerbeGraph(graph, tol=0.30)
+        t_build = time.perf_counter() - t0
+        checks0 = gg.triangles_checked
+        live = list(gg.mats)                        # O(1) random pick / swap‑remove
+        where = {e: i for i, e in enumerate(live)}
+        I, new, fixed = np.eye(args.dim), 0, 0
+        t0 = time.perf_counter()
+        for _ in range(args.mutations):
+            r = random.random()
+            if r < 0.4:
+                e = tuple(random.sample(ctx, 2))
+                if e not in where:
+                    where[e] = len(live); live.append(e)
+                res = gg.add_edge(*e, I)
+            elif r < 0.8:
+                e = live[random.randrange(len(live))]
+                res = gg.update_edge(*e, drift if random.random() < 0.1 else I)
+            else:
+                e = live[random.randrange(len(live))]
+                res = gg.remove_edge(*e)
+                i, last = where.pop(e), live.pop()
+                if i < len(live):
+                    live[i] = last; where[last] = i
+            new += len(res["new"]); fixed += len(res["fixed"])
+        dt_mut = time.perf_counter() - t0
+        st = gg.stats()
+        print(f"GerbeGraph build {t_build:,.2f} s, then {args.mutations:,} mutations in "
+              f"{dt_mut:,.2f} s → {args.mutations / dt_mut:,.0f} updates/s "
+              f"({st['triangles_checked'] - checks0:,} triangle re‑checks, "
+              f"+{new:,} / −{fixed:,} obstructions, {st['obstructed']:,} live)   |   "
+              f"full check {dt:,.2f} s")
+
+    if args.scenario == "admit":
+        # one candidate per call, half exact, half drifted, then a refresh
+        gg = GerbeGraph(graph, tol=0.30)
+        t0 = time.perf_counter()
+        table = TransportTable(gg, probes=args.probes)
+        t_build = time.perf_counter() - t0
+        I, lat = np.eye(args.dim), []
+        for _ in range(args.mutations):
+            a, b = random.sample(ctx, 2)
+            t0 = time.perf_counter()
+            table.admit(a, b, drift if random.random() < 0.5 else I)
+            lat.append(time.perf_counter() - t0)
+        lat.sort()
+        t0 = time.perf_counter()
+        for e in random.sample(list(gg.mats), min(1000, len(gg.mats))):
+            gg.remove_edge(*e)
+            gg.add_edge(*e, I)
+        dt_ref = time.perf_counter() - t0
+        st = table.stats()
+        print(f"TransportTable build {t_build:,.3f} s ({st['components']} components); "
+              f"admit p50 {lat[len(lat) // 2] * 1e6:,.1f} µs, "
+              f"p99 {lat[int(len(lat) * 0.99)] * 1e6:,.1f} µs "
+              f"({st['admitted']:,} admitted / {st['rejected']:,} rejected)   |   "
+              f"1,000 remove + re‑add with refresh {dt_ref:,.2f} s "
+              f"({st['reframed']:,} nodes re‑framed)")
+
+    if args.profile is not None:
+        print(prof.report())
+        if args.profile:
+            prof.export_trace(args.profile)
+
 if __name__ == "__main__":
     main()
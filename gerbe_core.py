@@ -1,57 +1,1346 @@
 """
 gerbe_core.py
 -------------
-Tiny façade so CLI and benchmarks can import `check_triangles`.
-Swap in the real library later.
+Triangle‑consistency engines behind gerbe_validate, the demos, the app
+and the benchmarks.  A graph is a dict of edge transforms
+{(src, dst): matrix | gerbe_ops.EdgeOp} plus optional policy patches,
+per‑context dims and probe vectors; every engine returns the failing
+triangles as [(triangle, 'numeric' | 'policy')].
+
+Engines
+-------
+check_triangles : enumerate every triangle, compare a→b→c vs a→c; optional
+                  seed/radius balls (ego_nodes), edge restriction and an
+                  out‑of‑core block schedule over an EdgeCache.
+check_batched   : same checks, oriented triangles batched per (d_a, d_b, d_c)
+                  dimension signature – for mixed‑dimension graphs.
+check_gemm      : same checks, bucketed by middle edge b→c so each M_bc is
+                  applied once to a block of vectors (hub‑heavy graphs).
+check_corpus    : same checks with each context's real embedding corpus
+                  (memory‑mapped .npy, streamed in chunks) as probes;
+                  mean / p99 / max relative error per orientation.
+check_cocycle   : screening engine – transport one probe along a BFS
+                  spanning tree, test each remaining edge once and confirm
+                  only the triangles it nominates; may miss obstructions.
+sample_triangles: draw triangles straight from adjacency (uniformly or by
+                  degree, re‑weighted) and estimate the obstruction rate
+                  with a Wilson confidence interval.
+
+Dynamic graph
+-------------
+GerbeGraph      : add_edge / update_edge / remove_edge keep the triangle
+                  set and a live obstruction map current in O(degree).
+TransportTable  : per‑node probes in one reference frame per component;
+                  admit(src, dst, M) vets a candidate edge with one mat‑vec.
+
+Post‑processing
+---------------
+blame_edges     : fold triangle failures into a short list of suspect edges.
+check_inverses  : batched orthonormality / inverse‑pair audit of the edges.
+
+Profiling
+---------
+All engines report into gerbe_profile.PROFILER (off by default): coarse
+phases graph_build / enumeration / transport / check, per‑triangle
+matmul / norm / policy_merge totals and a few counters.
 """
 
-import itertools, numpy as np, networkx as nx
+import itertools, hashlib, heapq, os, time, numpy as np, networkx as nx
+from collections import OrderedDict, deque
+from gerbe_ops import apply, solve, to_dense, IdentityOp, PermutationOp
+from gerbe_profile import PROFILER as prof
 
-def _deep_close(a, b, rel_tol=0.30):
+def rel_error(a, b):
+    """‖a − b‖ / ‖a‖ (L2 for vectors, Frobenius for matrices)."""
     diff = np.linalg.norm(a - b)
     base = np.linalg.norm(a)
-    return diff / base < rel_tol if base else diff == 0
+    return float(diff / base) if base else (0.0 if diff == 0 else float("inf"))
+
+def _deep_close(a, b, rel_tol=0.30):
+    return rel_error(a, b) < rel_tol
+
+def enumerate_triangles(G):
+    """
+    Triangles [u, v, w] of undirected G by neighbour‑set intersection.
+    Vertices follow G's node order and triangles come out in lexicographic
+    order of it – exactly what enumerate_all_cliques yields for size 3,
+    without building every larger clique on the way (that made dense,
+    clustered graphs crawl).  O(Σ_edges min degree).
+    """
+    nodes = list(G)
+    index = {u: i for i, u in enumerate(nodes)}
+    later = [{index[v] for v in G[u] if index[v] > i} for i, u in enumerate(nodes)]
+    for i, nu in enumerate(later):
+        for j in sorted(nu):
+            for k in sorted(nu & later[j]):
+                yield [nodes[i], nodes[j], nodes[k]]
+
+def _triangles_through(G, pairs):
+    """Triangles of G containing one of the (u, v) `pairs`, once each, in G order."""
+    index = {u: i for i, u in enumerate(G)}
+    found = set()
+    for u, v in pairs:
+        if u != v and u in G and v in G[u]:
+            for w in set(G[u]) & set(G[v]):
+                found.add(tuple(sorted((u, v, w), key=index.__getitem__)))
+    return [list(t) for t in sorted(found, key=lambda t: [index[x] for x in t])]
+
+def _triangles(G, graph=None):
+    """Triangles of G, read from graph["triangle_index"] when it describes G."""
+    idx = graph and graph.get("triangle_index")
+    if idx is not None and idx.matches(G):
+        return idx.triangles()
+    return enumerate_triangles(G)
+
+def ego_nodes(G, seeds, radius=1):
+    """
+    Nodes within `radius` hops of any seed, by frontier expansion.
+    Seeds may be nodes or (src, dst) edges; unknown seeds are ignored.
+    Each node is expanded at most once, so cost is O(edges inside the ball).
+    """
+    frontier = set()
+    for s in seeds:
+        frontier.update(s if isinstance(s, tuple) else (s,))
+    frontier &= set(G)
+    seen = set(frontier)
+    for _ in range(radius):
+        frontier = {v for u in frontier for v in G[u]} - seen
+        if not frontier:
+            break
+        seen |= frontier
+    return seen
+
+def topology_hash(nodes, edges):
+    """Order‑independent digest of a graph's shape (node / edge names only)."""
+    h = hashlib.sha1()
+    for n in sorted(map(str, nodes)):
+        h.update(n.encode() + b"\0")
+    h.update(b"\1")
+    for x, y in sorted((str(x), str(y)) for x, y in edges):
+        h.update(f"{x}\0{y}\0".encode())
+    return h.hexdigest()
+
+def _prune(graph, changed_files):
+    mats  = graph["mats"]
+    patch = graph.get("patches", {})
+    # If changed_files passed, prune edge sets (stub – expand later)
+    if changed_files:
+        mats  = {k:v for k,v in mats.items()  if any(f in k for f in changed_files)}
+        patch = {k:v for k,v in patch.items() if any(f in k for f in changed_files)}
+    return mats, patch
+
+def _probe_fn(graph):
+    """
+    Context → probe vector.  Homogeneous graphs use `base_vec` everywhere;
+    with `dims` ({context: d}) each dimension gets its own probe, taken
+    from `base_vecs` ({d: vector}) or else the first basis vector e₀.
+    """
+    vec  = graph.get("base_vec", np.zeros(64))
+    dims = graph.get("dims")
+    if not dims:
+        return lambda a: vec
+    by_dim = {len(vec): vec, **graph.get("base_vecs", {})}
+    def probe(a):
+        d = dims.get(a, len(vec))
+        if d not in by_dim:
+            by_dim[d] = np.eye(1, d).ravel()
+        return by_dim[d]
+    return probe
+
+def _policy_bad(a, b, c, patch, baseP):
+    if not all(k in patch for k in [(a,b),(b,c),(a,c)]):
+        return False
+    chain  = {**baseP, **patch[(a,b)], **patch[(b,c)]}
+    direct = {**baseP, **patch[(a,c)]}
+    return chain != direct
+
+# The 6 directed edges of a triangle (t0, t1, t2) as index pairs; bit i of
+# an edge mask is set when _SLOTS[i] is stored.  An orientation (i, j, k)
+# compares t_i→t_j→t_k with t_i→t_k and needs three of the six bits.
+_SLOTS = [(0, 1), (1, 0), (1, 2), (2, 1), (0, 2), (2, 0)]
+_PERMS = list(itertools.permutations(range(3)))           # clique order first
+_NEED  = [sum(1 << _SLOTS.index(p) for p in ((i, j), (j, k), (i, k)))
+          for i, j, k in _PERMS]
+_AVAIL = [tuple(_PERMS[o] for o in range(6) if m & _NEED[o] == _NEED[o])
+          for m in range(64)]
 
-def _triangles(G):
-    return (c for c in nx.enumerate_all_cliques(G) if len(c) == 3)
+def _orientations(tri, edges):
+    """Every (a, b, c) of `tri` with a→b, b→c and a→c all in `edges`."""
+    m = 0
+    for bit, (p, q) in enumerate(_SLOTS):
+        if (tri[p], tri[q]) in edges:
+            m |= 1 << bit
+    return [(tri[i], tri[j], tri[k]) for i, j, k in _AVAIL[m]]
 
-def check_triangles(graph, tol=0.30, changed_files=None):
+def _first_hop(hop, mats, e, probe):
+    """
+    M_e·probe(src), cached per edge; edges sharing one payload object
+    (interned artefacts) share the product too.  The shared entry pins M
+    and the probe so their ids cannot be reused while `hop` lives; an
+    EdgeCache hands out short‑lived copies, so it gets per‑edge entries only.
+    """
+    u = hop.get(e)
+    if u is None:
+        M, v = mats[e], probe(e[0])
+        if isinstance(mats, EdgeCache):
+            u = apply(M, v)
+        else:
+            key = ("payload", id(M), id(v))
+            hit = hop.get(key)
+            if hit is None:
+                hit = hop[key] = (M, v, apply(M, v))
+            u = hit[2]
+        hop[e] = u
+    return u
+
+def _check_one(tri, mats, patch, hop, probe, baseP, tol, timed=False):
+    """
+    Failures for one undirected triangle as [(oriented triangle, kind)];
+    None if no check applies.  Every stored orientation is tried, first
+    failure per kind wins.  `hop` caches first‑hop vectors M_e·probe(src)
+    per directed edge, so an orientation costs one extra matvec.  `timed`
+    (profiler on) adds matmul / norm / policy_merge timings.
+    """
+    out, applied = [], False
+    for a, b, c in _orientations(tri, mats):
+        applied = True
+        if timed: t = time.perf_counter()
+        u = hop.get((a, b))
+        if u is None:
+            u = _first_hop(hop, mats, (a, b), probe)
+        rhs = hop.get((a, c))
+        if rhs is None:
+            rhs = _first_hop(hop, mats, (a, c), probe)
+        lhs = apply(mats[(b, c)], u)
+        if timed: t1 = time.perf_counter()
+        close = _deep_close(lhs, rhs, tol)
+        if timed:
+            prof.add("matmul", t1 - t); prof.add("norm", time.perf_counter() - t1)
+        if not close:
+            out.append(((a, b, c), "numeric"))
+            break
+    if patch:
+        for a, b, c in _orientations(tri, patch):
+            applied = True
+            if timed: t = time.perf_counter()
+            bad = _policy_bad(a, b, c, patch, baseP)
+            if timed: prof.add("policy_merge", time.perf_counter() - t)
+            if bad:
+                out.append(((a, b, c), "policy"))
+                break
+    return out if applied else None
+
+# ---------------------------------------------------------------------------
+# Out‑of‑core scheduling – bounded edge cache + block‑triple visit order
+# ---------------------------------------------------------------------------
+def _nbytes(M):
+    return getattr(M, "nbytes", 0)
+
+class EdgeCache:
+    """
+    LRU view over `mats` holding at most `budget` bytes of edge payload.
+    Memory‑mapped arrays are read into RAM on a miss; `hits`, `misses`
+    and `bytes_read` tell how often the backing store was touched.
+    """
+
+    def __init__(self, mats, budget):
+        self.mats, self.budget = mats, budget
+        self.lru, self.held = OrderedDict(), 0
+        self.hits = self.misses = self.bytes_read = 0
+
+    def __contains__(self, e):
+        return e in self.mats
+
+    def keys(self):
+        return self.mats.keys()
+
+    def __getitem__(self, e):
+        M = self.lru.get(e)
+        if M is not None:
+            self.lru.move_to_end(e)
+            self.hits += 1
+            return M
+        src = self.mats[e]
+        M = np.array(src) if isinstance(src, np.memmap) else src
+        self.misses += 1
+        self.bytes_read += _nbytes(src)
+        self.lru[e] = M
+        self.held += _nbytes(M)
+        while self.held > self.budget and len(self.lru) > 1:
+            _, old = self.lru.popitem(last=False)
+            self.held -= _nbytes(old)
+        return M
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"bytes_read": self.bytes_read, "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+def node_blocks(G, mats, budget):
+    """
+    Partition nodes into blocks whose incident edge bytes stay ≤ budget/3,
+    walking a reverse Cuthill–McKee order so neighbours share blocks.  The
+    edges among any three blocks then fit the budget together.
+    """
+    blocks, cur, held = [], [], 0
+    for v in nx.utils.reverse_cuthill_mckee_ordering(G):
+        size = sum(_nbytes(mats[e]) for u in G[v] for e in ((v, u), (u, v)) if e in mats)
+        if cur and held + size > budget / 3:
+            blocks.append(cur); cur, held = [], 0
+        cur.append(v); held += size
+    if cur:
+        blocks.append(cur)
+    return blocks
+
+def _blocked_triangles(G, mats, budget, tris):
+    """`tris` grouped by sorted block triple (I ≤ J ≤ K), visited in order."""
+    blocks = node_blocks(G, mats, budget)
+    where = {v: i for i, blk in enumerate(blocks) for v in blk}
+    buckets = {}
+    for tri in tris:
+        buckets.setdefault(tuple(sorted(where[v] for v in tri)), []).append(tri)
+    return len(blocks), (tri for key in sorted(buckets) for tri in buckets[key])
+
+def check_triangles(graph, tol=0.30, changed_files=None,
+                    seeds=None, radius=1, stats=None, progress=None,
+                    memory_budget=None, edges=None, count_skipped=False):
     """
     Parameters
     ----------
     graph : dict with keys {contexts, mats, patches}
+            mats values are dense arrays or gerbe_ops.EdgeOp operators;
+            optional dims {context: d} (+ base_vecs {d: probe}) for
+            mixed‑dimension graphs; optional triangle_index
+            (gerbe_index.TriangleIndex of the mats topology) replaces
+            enumeration on whole‑graph runs
     tol   : relative Frobenius tolerance
     changed_files : optional set(str) -> restrict to affected edges
+    seeds  : optional nodes / (src, dst) edges -> only check triangles
+             inside the `radius`‑hop neighbourhood of the seeds
+    stats  : optional dict, filled with triangles_enumerated,
+             triangles_checked (some check applied), seconds and the phase
+             split graph_build_s / enumeration_s / check_s
+             (+ triangles_skipped with seeds, if a matching triangle_index
+             or count_skipped provides the whole‑graph count)
+    progress : optional callable(done, total), called ~100 times per run
+    memory_budget : optional bytes -> out‑of‑core mode: edges go through an
+             EdgeCache of that size and triangles are visited block triple
+             by block triple (see node_blocks); stats then also get
+             blocks, bytes_read, cache_hits, cache_misses, hit_rate
+    edges  : optional (u, v) pairs -> only check triangles through one of
+             them (either direction), e.g. the edges a change touched
+    count_skipped : with seeds and stats, count the whole graph's
+             triangles even without an index – O(graph), not O(ball)
     Returns
     -------
     list[tuple(triangle, 'numeric'|'policy')]
+
+    Each undirected triangle is enumerated once and checked in every
+    orientation its stored edges allow (up to 6); a failure is reported
+    once per kind, as the first failing orientation (a, b, c).
     """
-    ctx   = graph["contexts"]
-    mats  = graph["mats"]
-    patch = graph.get("patches", {})
-    vec   = graph.get("base_vec", np.zeros(64))
-    baseP = graph.get("base_policy", {})
+    t0 = time.perf_counter()
+    with prof.phase("graph_build"):
+        mats, patch = _prune(graph, changed_files)
+        probe = _probe_fn(graph)
+        baseP = graph.get("base_policy", {})
 
-    # If changed_files passed, prune edge sets (stub – expand later)
-    if changed_files:
-        mats  = {k:v for k,v in mats.items()  if any(f in k for f in changed_files)}
-        patch = {k:v for k,v in patch.items() if any(f in k for f in changed_files)}
+        G = nx.Graph(); G.add_edges_from(mats.keys())
+        full = G
+        if seeds is not None:
+            G = G.subgraph(ego_nodes(G, seeds, radius))
+    t1 = time.perf_counter()
+
+    # with stats / profiling / progress, enumerate up front so enumeration
+    # and checks time separately and the progress total is the real count
+    with prof.phase("enumeration"):
+        eager = stats is not None or prof.enabled or progress is not None
+        tris = _triangles(G, graph) if edges is None else _triangles_through(G, edges)
+        if memory_budget:
+            n_blocks, tris = _blocked_triangles(G, mats, memory_budget, tris)
+            mats = EdgeCache(mats, memory_budget)
+        if eager:
+            tris = list(tris)
+    t2 = time.perf_counter()
+
+    issues, seen, checked = [], 0, 0
+    if progress:
+        total = len(tris)
+        every = max(1, total // 100)
+
+    hop, timed = {}, prof.enabled
+    with prof.phase("check"):
+        for tri in tris:
+            seen += 1
+            found = _check_one(tri, mats, patch, hop, probe, baseP, tol, timed)
+            if found is not None:
+                checked += 1
+                issues += found
+            if progress and seen % every == 0:
+                progress(seen, total)
+    if progress:
+        progress(seen, total)
+    prof.count("triangles_enumerated", seen)
+    prof.count("triangles_checked", checked)
+    prof.count("issues", len(issues))
+
+    if stats is not None:
+        t3 = time.perf_counter()
+        stats.update(triangles_enumerated=seen, triangles_checked=checked,
+                     seconds=t3 - t0, graph_build_s=t1 - t0,
+                     enumeration_s=t2 - t1, check_s=t3 - t2)
+        idx = graph.get("triangle_index")
+        if seeds is not None and idx is not None and idx.matches(full):
+            stats["triangles_skipped"] = len(idx) - seen
+        elif seeds is not None and count_skipped:
+            stats["triangles_skipped"] = sum(nx.triangles(full).values()) // 3 - seen
+        if memory_budget:
+            stats.update(blocks=n_blocks, **mats.stats())
+    return issues
+
+# ---------------------------------------------------------------------------
+# Batched engines – shared helpers
+# ---------------------------------------------------------------------------
+def _rel_errors(lhs, rhs, axis=1):
+    """rel_error(lhs[i], rhs[i]) for every row (axis=1) or column (axis=0)."""
+    diff = np.linalg.norm(lhs - rhs, axis=axis)
+    base = np.linalg.norm(lhs, axis=axis)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base > 0, diff / base, np.where(diff == 0, 0.0, np.inf))
+
+def _rows_failing(lhs, rhs, tol):
+    """Row‑wise `not _deep_close(lhs[i], rhs[i], tol)` as a boolean array."""
+    return _rel_errors(lhs, rhs) >= tol
+
+def _keep_first(fail, t, rank, o):
+    """Record orientation `o` of triangle `t` unless a lower rank already failed."""
+    if rank < fail.get((t, "numeric"), (6,))[0]:
+        fail[(t, "numeric")] = (rank, o)
+
+# ---------------------------------------------------------------------------
+# Batched engine – oriented triangles grouped by (d_a, d_b, d_c)
+# ---------------------------------------------------------------------------
+def check_batched(graph, tol=0.30, changed_files=None, chunk_bytes=1 << 26,
+                  stats=None):
+    """
+    Same contract as `check_triangles`, for graphs whose contexts live in
+    spaces of different dimension (`graph["dims"]`).
+
+    Every oriented triangle whose three edges are dense arrays is bucketed
+    by its (d_a, d_b, d_c) signature; each bucket is checked in chunks of
+    ≤ `chunk_bytes` stacked M_bc matrices with one einsum and one
+    vectorised norm, so a mixed 384/768/1024‑d graph keeps a handful of
+    large kernels instead of one Python round trip per triangle.  Edges
+    held as EdgeOp operators, and policy overlays, take the scalar path.
+    `stats` gets the check_triangles keys plus groups.
+    """
+    t0 = time.perf_counter()
+    with prof.phase("graph_build"):
+        mats, patch = _prune(graph, changed_files)
+        probe = _probe_fn(graph)
+        baseP = graph.get("base_policy", {})
+        G = nx.Graph(); G.add_edges_from(mats.keys())
+    t1 = time.perf_counter()
+    with prof.phase("enumeration"):
+        tris = list(_triangles(G, graph))
+    t2 = time.perf_counter()
+
+    hop = {}
+    def first_hop(e):
+        return _first_hop(hop, mats, e, probe)
+
+    # first failing orientation per (triangle, kind) – rank = _PERMS order
+    fail, checked, groups = {}, set(), {}
+    with prof.phase("check"):
+        for t, tri in enumerate(tris):
+            for rank, (a, b, c) in enumerate(_orientations(tri, mats)):
+                checked.add(t)
+                M = mats[(b, c)]
+                if isinstance(M, np.ndarray):
+                    sig = (mats[(a, b)].shape[1],) + M.shape[::-1]      # (d_a, d_b, d_c)
+                    groups.setdefault(sig, []).append((t, rank, (a, b, c)))
+                elif not _deep_close(apply(M, first_hop((a, b))), first_hop((a, c)), tol):
+                    _keep_first(fail, t, rank, (a, b, c))
+
+        for items in groups.values():
+            _, b0, c0 = items[0][2]
+            per = max(1, chunk_bytes // max(mats[(b0, c0)].nbytes, 1))
+            for i in range(0, len(items), per):
+                chunk = items[i:i + per]
+                Ms  = np.stack([mats[(b, c)] for *_, (a, b, c) in chunk])
+                U   = np.stack([first_hop((a, b)) for *_, (a, b, c) in chunk])
+                rhs = np.stack([first_hop((a, c)) for *_, (a, b, c) in chunk])
+                lhs = np.einsum("nij,nj->ni", Ms, U)
+                for k in np.flatnonzero(_rows_failing(lhs, rhs, tol)):
+                    _keep_first(fail, *chunk[k])
+
+        if patch:
+            for t, tri in enumerate(tris):
+                found = _check_one(tri, {}, patch, hop, probe, baseP, tol)
+                if found is not None:
+                    checked.add(t)
+                    fail.update(((t, k), (0, o)) for o, k in found)
+
+    issues = [(o, kind) for (t, kind), (_, o) in sorted(fail.items(), key=lambda kv: kv[0])]
+    prof.count("triangles_enumerated", len(tris))
+    prof.count("triangles_checked", len(checked))
+    prof.count("issues", len(issues))
+    if stats is not None:
+        t3 = time.perf_counter()
+        stats.update(triangles_enumerated=len(tris), triangles_checked=len(checked),
+                     groups=len(groups), seconds=t3 - t0, graph_build_s=t1 - t0,
+                     enumeration_s=t2 - t1, check_s=t3 - t2)
+    return issues
+
+# ---------------------------------------------------------------------------
+# GEMM engine – oriented triangles bucketed by their middle edge (b, c)
+# ---------------------------------------------------------------------------
+def check_gemm(graph, tol=0.30, changed_files=None, min_bucket=4, stats=None):
+    """
+    Same contract as `check_triangles`.
+
+    Every oriented triangle a→b→c is filed under its middle edge (b, c).
+    A bucket stacks its first‑hop vectors M_ab·v as the columns of a
+    (d_b, m) block and applies M_bc once – one matrix‑matrix product
+    instead of m mat‑vecs, so a hub edge's matrix streams through cache
+    once per bucket rather than once per triangle.  Buckets smaller than
+    `min_bucket` take the plain mat‑vec path.  Works for EdgeOp edges and
+    mixed dimensions alike (a bucket shares d_b and d_c).
+    `stats` gets the check_triangles keys plus buckets and
+    max_bucket.
+    """
+    t0 = time.perf_counter()
+    with prof.phase("graph_build"):
+        mats, patch = _prune(graph, changed_files)
+        probe = _probe_fn(graph)
+        baseP = graph.get("base_policy", {})
+        G = nx.Graph(); G.add_edges_from(mats.keys())
+    t1 = time.perf_counter()
+    with prof.phase("enumeration"):
+        tris = list(_triangles(G, graph))
+        buckets, checked = {}, set()
+        for t, tri in enumerate(tris):
+            for rank, o in enumerate(_orientations(tri, mats)):
+                buckets.setdefault(o[1:], []).append((t, rank, o))
+                checked.add(t)
+    t2 = time.perf_counter()
+
+    hop = {}
+    def first_hop(e):
+        return _first_hop(hop, mats, e, probe)
+
+    fail = {}
+    with prof.phase("check"):
+        for (b, c), items in buckets.items():
+            if len(items) < min_bucket:             # stacking costs more than it saves
+                M = mats[(b, c)]
+                for t, rank, (a, _, _) in items:
+                    if not _deep_close(apply(M, first_hop((a, b))), first_hop((a, c)), tol):
+                        _keep_first(fail, t, rank, (a, b, c))
+                continue
+            U   = np.stack([first_hop((a, b)) for *_, (a, _, _) in items], axis=1)
+            rhs = np.stack([first_hop((a, c)) for *_, (a, _, _) in items])
+            lhs = apply(mats[(b, c)], U).T             # (m, d_c)
+            for k in np.flatnonzero(_rows_failing(lhs, rhs, tol)):
+                _keep_first(fail, *items[k])
+
+        if patch:
+            for t, tri in enumerate(tris):
+                found = _check_one(tri, {}, patch, hop, probe, baseP, tol)
+                if found is not None:
+                    checked.add(t)
+                    fail.update(((t, k), (0, o)) for o, k in found)
+
+    issues = [(o, kind) for (t, kind), (_, o) in sorted(fail.items(), key=lambda kv: kv[0])]
+    prof.count("triangles_enumerated", len(tris))
+    prof.count("triangles_checked", len(checked))
+    prof.count("gemm_buckets", len(buckets))
+    prof.count("issues", len(issues))
+    if stats is not None:
+        t3 = time.perf_counter()
+        stats.update(triangles_enumerated=len(tris), triangles_checked=len(checked),
+                     buckets=len(buckets),
+                     max_bucket=max(map(len, buckets.values()), default=0),
+                     seconds=t3 - t0, graph_build_s=t1 - t0,
+                     enumeration_s=t2 - t1, check_s=t3 - t2)
+    return issues
+
+# ---------------------------------------------------------------------------
+# Corpus engine – real embeddings streamed from memory‑mapped .npy files
+# ---------------------------------------------------------------------------
+# log‑spaced relative‑error bins, 20 per decade over 1e‑8 … 1e3, plus 0 / overflow
+_ERR_BINS = np.concatenate([[0.0], np.logspace(-8, 3, 221)])
+
+class ErrorStats:
+    """Running count / mean / max and a fixed log histogram of relative
+    errors – constant memory however many rows stream through."""
+
+    def __init__(self):
+        self.n, self.total, self.max = 0, 0.0, 0.0
+        self.hist = np.zeros(len(_ERR_BINS) + 1, dtype=np.int64)
+
+    def add(self, err):
+        self.n += err.size
+        self.total += float(err.sum())
+        self.max = max(self.max, float(err.max(initial=0.0)))
+        self.hist += np.bincount(np.searchsorted(_ERR_BINS, err, side="right"),
+                                 minlength=self.hist.size)
+
+    def quantile(self, q):
+        """Upper edge of the bin holding the q‑quantile (never above max)."""
+        if not self.n:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.hist), q * self.n))
+        return min(float(_ERR_BINS[i]) if i < len(_ERR_BINS) else np.inf, self.max)
+
+    def summary(self):
+        return {"rows": self.n, "mean": self.total / max(self.n, 1),
+                "p99": self.quantile(0.99), "max": self.max}
+
+def _corpus(graph, probe):
+    """Context → (N, d) rows: graph["corpora"] arrays / .npy paths
+    (memory‑mapped), else the single probe vector."""
+    corpora = graph.get("corpora", {})
+    def rows(a):
+        X = corpora.get(a)
+        if X is None:
+            return probe(a)[None, :]
+        return np.load(X, mmap_mode="r") if isinstance(X, (str, bytes, os.PathLike)) else X
+    return rows
+
+def check_corpus(graph, tol=0.30, changed_files=None, memory_budget=1 << 26,
+                 stat="p99", errors=None, stats=None):
+    """
+    Same contract as `check_triangles`, probed with real embeddings.
+
+    `graph["corpora"]` maps a context to its embedding corpus, an (N, d)
+    array or .npy path (memory‑mapped); contexts without one fall back to
+    the probe vector.  Every row x of a's corpus goes through both paths
+    of an orientation (a, b, c) and gives rel_error(M_bc·M_ab·x, M_ac·x);
+    the orientation fails when `stat` ("mean", "p99" or "max") of those
+    errors is ≥ tol, and a triangle reports its first failing orientation
+    as in check_triangles.  Policy overlays are checked as there.
+
+    Orientations are grouped by source context, so each corpus streams
+    once, in chunks of memory_budget // (bytes per row of the chunk, of
+    every first hop out of a and of one product) rows; a triangle keeps
+    an ErrorStats only while its source streams.  `errors`, if given,
+    receives oriented triangle → {rows, mean, p99, max}.  `stats` gets
+    triangles_enumerated, triangles_checked, rows_streamed, chunk_rows
+    (largest used), seconds and graph_build_s / enumeration_s / check_s.
+    """
+    t0 = time.perf_counter()
+    with prof.phase("graph_build"):
+        mats, patch = _prune(graph, changed_files)
+        probe = _probe_fn(graph)
+        rows_of = _corpus(graph, probe)
+        baseP = graph.get("base_policy", {})
+        G = nx.Graph(); G.add_edges_from(mats.keys())
+    t1 = time.perf_counter()
+
+    with prof.phase("enumeration"):
+        tris = list(_triangles(G, graph))
+        by_src, oriented = {}, set()
+        for t, tri in enumerate(tris):
+            for rank, o in enumerate(_orientations(tri, mats)):
+                by_src.setdefault(o[0], []).append((t, rank, o))
+                oriented.add(t)
+    t2 = time.perf_counter()
+
+    fail, streamed, widest = {}, 0, 0
+    pick = {"mean": lambda s: s["mean"], "p99": lambda s: s["p99"],
+            "max": lambda s: s["max"]}[stat]
+    with prof.phase("check"):
+        for a, orient in by_src.items():
+            X = rows_of(a)
+            hops = {e: mats[e] for _, _, (_, b, c) in orient for e in ((a, b), (a, c))}
+            d = max(M.shape[1] for M in hops.values())
+            if X.ndim != 2 or X.shape[1] != d:
+                raise ValueError(f"corpus of {a!r} has shape {X.shape}, "
+                                 f"edges out of it expect (N, {d})")
+            per_row = 8 * (d + sum(M.shape[0] for M in hops.values())
+                           + 2 * max(mats[(b, c)].shape[0] for _, _, (_, b, c) in orient))
+            chunk = max(1, min(len(X), memory_budget // per_row))
+            widest = max(widest, chunk)
+            acc = [ErrorStats() for _ in orient]
+            for s in range(0, len(X), chunk):
+                C = np.asarray(X[s:s + chunk], dtype=float).T      # (d, rows)
+                U = {e: apply(M, C) for e, M in hops.items()}
+                for k, (_, _, (_, b, c)) in enumerate(orient):
+                    acc[k].add(_rel_errors(apply(mats[(b, c)], U[(a, b)]), U[(a, c)], axis=0))
+                streamed += C.shape[1]
+            for (t, rank, o), st in zip(orient, acc):
+                summary = st.summary()
+                if errors is not None:
+                    errors[o] = summary
+                if pick(summary) >= tol and rank < fail.get(t, (6,))[0]:
+                    fail[t] = (rank, o)
+
+        issues, checked = [], len(oriented)
+        for t, tri in enumerate(tris):
+            found = [(fail[t][1], "numeric")] if t in fail else []
+            policy = _check_one(tri, {}, patch, {}, probe, baseP, tol) if patch else None
+            if policy is not None:
+                found += policy
+                checked += t not in oriented
+            issues += found
+    prof.count("triangles_enumerated", len(tris))
+    prof.count("triangles_checked", checked)
+    prof.count("rows_streamed", streamed)
+    prof.count("issues", len(issues))
+
+    if stats is not None:
+        t3 = time.perf_counter()
+        stats.update(triangles_enumerated=len(tris), triangles_checked=checked,
+                     rows_streamed=streamed, chunk_rows=widest,
+                     seconds=t3 - t0, graph_build_s=t1 - t0,
+                     enumeration_s=t2 - t1, check_s=t3 - t2)
+    return issues
+
+# ---------------------------------------------------------------------------
+# Sampling mode – for graphs too big to enumerate
+# ---------------------------------------------------------------------------
+def _wilson(k, n, z):
+    if not n:
+        return 0.0, 1.0
+    p = k / n
+    den  = 1 + z*z/n
+    mid  = (p + z*z/(2*n)) / den
+    half = z * np.sqrt(p*(1-p)/n + z*z/(4*n*n)) / den
+    return max(0.0, mid - half), min(1.0, mid + half)
+
+def sample_triangles(graph, tol=0.30, budget=10_000, seconds=None, ci=0.01,
+                     weighting="uniform", z=1.96, seed=None):
+    """
+    Estimate the fraction of obstructed triangles without enumerating them.
+
+    weighting
+        'uniform' – wedge sampling: pick a centre v with probability
+                    ∝ deg(v)·(deg(v)−1), two random neighbours, keep the
+                    wedge if it closes.  Every triangle owns three wedges,
+                    so accepted samples are uniform over triangles.
+        'degree'  – edge‑first: pick an edge uniformly, then a random
+                    neighbour of its lower‑degree end.  Every edge gets
+                    probed equally often, so triangles on low‑degree
+                    edges are over‑represented; each sample is weighted
+                    by 1/p(triangle), p ∝ Σ over its edges of
+                    1/deg(lower end), and rate is the weighted (Hájek)
+                    mean.
+
+    Sampling is with replacement and stops once the Wilson interval's
+    half‑width ≤ `ci`, after `budget` samples, or after `seconds`.  With
+    weights the interval uses Kish's effective sample size (Σw)²/Σw².
+
+    Returns dict: samples, effective_samples, failures, rate, ci_low,
+    ci_high, seconds, stopped ('ci'|'budget'|'time'|'empty') and issues
+    (unique failing triangles in the usual (triangle, kind) form).
+    """
+    t0  = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    mats, patch = _prune(graph, None)
+    probe = _probe_fn(graph)
+    baseP = graph.get("base_policy", {})
 
     G = nx.Graph(); G.add_edges_from(mats.keys())
-    issues = []
-
-    for a, b, c in _triangles(G):
-        # numeric embedding check
-        if all(k in mats for k in [(a,b),(b,c),(a,c)]):
-            lhs = mats[(b,c)] @ (mats[(a,b)] @ vec)
-            rhs = mats[(a,c)] @ vec
-            if not _deep_close(lhs, rhs, tol):
-                issues.append(((a,b,c), "numeric"))
-        # policy JSON check
-        if patch and all(k in patch for k in [(a,b),(b,c),(a,c)]):
-            chain  = {**baseP, **patch[(a,b)], **patch[(b,c)]}
-            direct = {**baseP, **patch[(a,c)]}
-            if chain != direct:
-                issues.append(((a,b,c), "policy"))
+    order = {v: i for i, v in enumerate(G)}           # clique order, as in _triangles
+    nbrs  = {v: list(G[v]) for v in G}
+    nodes = list(G)
+    if weighting == "uniform":
+        deg = np.array([len(nbrs[v]) for v in nodes], dtype=float)
+        cum = np.cumsum(deg * (deg - 1))
+    elif weighting == "degree":
+        edges = list(G.edges())
+        low = {}                                       # pair → end draw() probes
+        for v, x in edges:
+            low[(v, x)] = low[(x, v)] = x if len(nbrs[x]) < len(nbrs[v]) else v
+    else:
+        raise ValueError(f"Unknown weighting: {weighting!r}")
+
+    def draw():
+        if weighting == "uniform":
+            if not len(cum) or not cum[-1]:
+                return None
+            v = nodes[int(np.searchsorted(cum, rng.random() * cum[-1], side="right"))]
+            d = len(nbrs[v])
+            i, j = rng.integers(d), rng.integers(d - 1)
+            x, y = nbrs[v][i], nbrs[v][j + (j >= i)]
+        else:
+            if not edges:
+                return None
+            v, x = edges[rng.integers(len(edges))]
+            if len(nbrs[x]) < len(nbrs[v]):
+                v, x = x, v
+            y = nbrs[v][rng.integers(len(nbrs[v]))]
+            if y == x:
+                return False
+        return (v, x, y) if G.has_edge(x, y) else False
+
+    def weight(tri):
+        if weighting == "uniform":
+            return 1.0
+        return 1.0 / sum(1.0 / len(nbrs[low[(a, b)]])
+                         for a, b in ((tri[0], tri[1]), (tri[1], tri[2]), (tri[0], tri[2])))
+
+    def interval(w, w2, wbad):
+        n_eff = w * w / w2 if w2 else 0.0
+        rate = wbad / w if w else 0.0
+        return rate, n_eff, _wilson(rate * n_eff, n_eff, z)
+
+    hop, timed = {}, prof.enabled
+    n = bad = attempts = 0
+    w = w2 = wbad = 0.0
+    found, stopped = {}, "budget"
+    while n < budget:
+        if seconds is not None and time.perf_counter() - t0 > seconds:
+            stopped = "time"; break
+        tri = draw(); attempts += 1
+        if tri is None or (n == 0 and attempts > 100 * budget):
+            stopped = "empty"; break
+        if tri is False:
+            continue
+        tri = sorted(tri, key=order.__getitem__)
+        fails = _check_one(tri, mats, patch, hop, probe, baseP, tol, timed)
+        wt = weight(tri)
+        n += 1; w += wt; w2 += wt * wt
+        if fails:
+            bad += 1; wbad += wt
+            found.update(dict.fromkeys(fails))
+        if n >= 30:
+            lo, hi = interval(w, w2, wbad)[2]
+            if (hi - lo) / 2 <= ci:
+                stopped = "ci"; break
+
+    prof.count("triangles_sampled", n)
+    prof.count("wedges_drawn", attempts)
+    rate, n_eff, (lo, hi) = interval(w, w2, wbad)
+    return {"samples": n, "effective_samples": n_eff, "failures": bad, "rate": rate,
+            "ci_low": lo, "ci_high": hi, "seconds": time.perf_counter() - t0,
+            "stopped": stopped, "issues": list(found)}
+
+# ---------------------------------------------------------------------------
+# Cycle‑basis (cocycle) engine
+# ---------------------------------------------------------------------------
+def _transport(G, mats, start):
+    """
+    BFS spanning forest: probe `start(root)` sits at each component root and is
+    carried along tree edges (forwards via M, backwards via solve(M, ·)).
+    Returns ({node: probe}, set of directed edges used by the tree).
+    """
+    probe, tree = {}, set()
+    for root in G:
+        if root in probe:
+            continue
+        probe[root] = start(root)
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            for v in G[u]:
+                if v in probe:
+                    continue
+                if (u, v) in mats:
+                    probe[v] = apply(mats[(u, v)], probe[u]); tree.add((u, v))
+                else:
+                    probe[v] = solve(mats[(v, u)], probe[u]); tree.add((v, u))
+                queue.append(v)
+    return probe, tree
+
+def check_cocycle(graph, tol=0.30, changed_files=None, stats=None):
+    """
+    Screening engine: returns a subset of what `check_triangles` reports,
+    found on a cycle basis.
+
+    A connected graph glues iff every non‑tree edge agrees with the
+    transport along the spanning tree, so each edge is tested once.
+    An inconsistent edge x→y only nominates the triangles {x, y, w} it
+    touches – a drifted tree edge makes every cycle through it fail, so
+    consistent triangles get nominated too – and each nominee is confirmed
+    in every orientation by the per‑triangle check before it is reported.
+    The edge test carries one transported probe, not each context's own,
+    so a triangle failing only for its own probe (small drift, mixed
+    dimensions) may never be nominated; gate on `check_triangles` when
+    every obstruction must be found.  Policy overlays are not invertible,
+    so they keep the per‑triangle check.  `stats` gets graph_build_s,
+    transport_s, check_s, edges_checked, triangles_checked (nominees
+    confirmed) and seconds.
+    """
+    t0 = time.perf_counter()
+    with prof.phase("graph_build"):
+        mats, patch = _prune(graph, changed_files)
+        start = _probe_fn(graph)
+        baseP = graph.get("base_policy", {})
 
+        G = nx.Graph(); G.add_edges_from(mats.keys())
+    t1 = time.perf_counter()
+    with prof.phase("transport"):
+        probe, tree = _transport(G, mats, start)
+    t2 = time.perf_counter()
+
+    issues, seen, hop = [], set(), {}
+    with prof.phase("check"):
+        for (x, y), M in mats.items():
+            if (x, y) in tree or _deep_close(apply(M, probe[x]), probe[y], tol):
+                continue
+            for w in sorted(set(G[x]) & set(G[y]), key=str):
+                tri = tuple(sorted((x, y, w), key=str))
+                if tri not in seen:
+                    seen.add(tri)
+                    issues += _check_one(tri, mats, None, hop, start, baseP, tol) or []
+
+    if patch:
+        with prof.phase("policy_merge"):
+            issues += [((a,b,c), "policy") for a, b, c in _triangles(G, graph)
+                       if _policy_bad(a, b, c, patch, baseP)]
+    prof.count("edges_checked", len(mats) - len(tree))
+    prof.count("triangles_checked", len(seen))
+    prof.count("issues", len(issues))
+    if stats is not None:
+        t3 = time.perf_counter()
+        stats.update(edges_checked=len(mats) - len(tree), triangles_checked=len(seen),
+                     seconds=t3 - t0,
+                     graph_build_s=t1 - t0, transport_s=t2 - t1, check_s=t3 - t2)
     return issues
+
+# ---------------------------------------------------------------------------
+# Dynamic graph – mutations keep the triangle set and obstructions current
+# ---------------------------------------------------------------------------
+class GerbeGraph:
+    """
+    Stateful counterpart of `check_triangles` for graphs that change edge
+    by edge.
+
+        gg = GerbeGraph(graph, tol=0.30)         # one full check up front
+        gg.add_edge("A", "C", M)                 # → {"new": [...], "fixed": [...]}
+        gg.update_edge("A", "C", M2)
+        gg.remove_edge("A", "C")
+        gg.obstructions()                        # same as check_triangles(graph)
+
+    Adjacency is kept as neighbour sets, so a mutation of edge u→v finds
+    the triangles through u–v as N(u) ∩ N(v) – O(degree) – and re‑checks
+    only those.  `graph` takes the check_triangles keys (mats, patches,
+    dims, base_vec, base_vecs, base_policy); its mats / patches dicts are
+    copied, not mutated.  Counters: updates, triangles_checked.
+
+    Callables in `listeners` are called as f(event, src, dst) after each
+    mutation, event being "add", "update" or "remove".
+    """
+
+    def __init__(self, graph=None, tol=0.30):
+        graph = dict(graph or {})
+        self.tol = tol
+        self.mats = dict(graph.get("mats", {}))
+        self.patches = dict(graph.get("patches", {}))
+        graph.update(mats=self.mats, patches=self.patches)
+        self.graph = graph
+        self.probe, self.baseP = _probe_fn(graph), graph.get("base_policy", {})
+        self.adj, self.order, self.issues, self.hop = {}, {}, {}, {}
+        self.tris, self.updates, self.triangles_checked = set(), 0, 0
+        self.listeners = []
+        for x, y in self.mats:                 # each triangle closes exactly once
+            self._link(x, y)
+        for tri in self.tris:
+            self._recheck(tri)
+
+    # -- bookkeeping ---------------------------------------------------------
+    def _node(self, u):
+        if u not in self.order:
+            self.order[u] = len(self.order)
+            self.adj[u] = set()
+
+    def _tri(self, *nodes):                  # node order = first‑seen order
+        return tuple(sorted(nodes, key=self.order.__getitem__))
+
+    def _through(self, x, y):
+        return [self._tri(x, y, w) for w in self.adj[x] & self.adj[y]]
+
+    def _link(self, x, y):
+        self._node(x); self._node(y)
+        if x != y and y not in self.adj[x]:
+            self.tris.update(self._through(x, y))
+            self.adj[x].add(y); self.adj[y].add(x)
+
+    def _forget(self, e):
+        """Drop e's first hop (and the shared payload product behind it)."""
+        M = self.mats.get(e)
+        if M is not None:
+            self.hop.pop(("payload", id(M), id(self.probe(e[0]))), None)
+        self.hop.pop(e, None)
+
+    def _recheck(self, tri):
+        found = _check_one(tri, self.mats, self.patches, self.hop, self.probe,
+                           self.baseP, self.tol)
+        self.triangles_checked += 1
+        if found:
+            self.issues[tri] = found
+        else:
+            self.issues.pop(tri, None)
+
+    def _snapshot(self, tris):               # (triangle, kind) → issue
+        return {(t, kind): (o, kind) for t in tris for o, kind in self.issues.get(t, ())}
+
+    def _settle(self, before, tris):
+        """Re‑check `tris`; diff (triangle, kind) failures against `before`."""
+        for t in tris:
+            self._recheck(t)
+        after = self._snapshot(tris)
+        self.updates += 1
+        return {"new":   [i for k, i in after.items() if k not in before],
+                "fixed": [i for k, i in before.items() if k not in after]}
+
+    def _emit(self, event, src, dst, out):
+        for f in self.listeners:
+            f(event, src, dst)
+        return out
+
+    # -- mutations -----------------------------------------------------------
+    def add_edge(self, src, dst, M, patch=None):
+        """Insert (or overwrite) src→dst; returns {"new": [...], "fixed": [...]}."""
+        self._node(src); self._node(dst)
+        event = "update" if (src, dst) in self.mats else "add"
+        before = self._snapshot(self._through(src, dst))
+        self._forget((src, dst))
+        self.mats[(src, dst)] = M
+        if patch is not None:
+            self.patches[(src, dst)] = patch
+        self._link(src, dst)
+        return self._emit(event, src, dst, self._settle(before, self._through(src, dst)))
+
+    def update_edge(self, src, dst, M, patch=None):
+        """Replace the payload of an existing edge src→dst."""
+        if (src, dst) not in self.mats:
+            raise KeyError((src, dst))
+        return self.add_edge(src, dst, M, patch)
+
+    def remove_edge(self, src, dst):
+        """Delete src→dst; the pair stays joined while dst→src exists."""
+        if (src, dst) not in self.mats:
+            raise KeyError((src, dst))
+        tris = self._through(src, dst)
+        before = self._snapshot(tris)
+        self._forget((src, dst))
+        del self.mats[(src, dst)]
+        self.patches.pop((src, dst), None)
+        if (dst, src) not in self.mats and src != dst:
+            self.adj[src].discard(dst); self.adj[dst].discard(src)
+            for t in tris:
+                self.tris.discard(t)
+                self.issues.pop(t, None)
+            tris = []
+        return self._emit("remove", src, dst, self._settle(before, tris))
+
+    # -- queries -------------------------------------------------------------
+    def triangles(self):
+        return sorted(self.tris, key=lambda t: [self.order[x] for x in t])
+
+    def obstructions(self):
+        """Current failures, in check_triangles order."""
+        return [i for t in self.triangles() for i in self.issues.get(t, ())]
+
+    def stats(self):
+        return {"nodes": len(self.adj), "edges": len(self.mats),
+                "triangles": len(self.tris), "obstructed": len(self.issues),
+                "updates": self.updates, "triangles_checked": self.triangles_checked}
+
+# ---------------------------------------------------------------------------
+# Online admission – one reference frame per component, kept current
+# ---------------------------------------------------------------------------
+class TransportTable:
+    """
+    Per‑node probe vectors expressed in one reference frame per connected
+    component, for vetting a single candidate edge on a request path.
+
+        table = TransportTable(gg)               # gg: a GerbeGraph
+        table.admit("A", "C", M)                 # → {"ok", "error", "closing"}
+        gg.add_edge("A", "C", M)                 # table follows via gg.listeners
+
+    Each component's root holds its probe (`probes` > 1 stacks extra
+    random unit columns) and every other node the probe carried to it
+    along a BFS spanning tree, forwards via M or backwards via solve, as
+    in the cocycle engine.  When the graph glues, every closing path from
+    src to dst agrees with that transport, so a candidate src→dst is
+    judged by rel_error(t_dst, M·t_src) < tol: one mat‑vec and two dict
+    lookups.  Candidates between components (or unknown nodes) close no
+    path and are admitted with closing=False.  The probe seen at src is
+    the transported root probe, not `base_vec`, so borderline verdicts can
+    differ from check_triangles; `probes` > 1 tests more directions at
+    once.  Against an obstructed graph the verdict is relative to the
+    spanning‑tree frame.  Replacing
+    an existing edge is judged against the current frame, which the old
+    payload may have helped build – remove it first to judge the
+    replacement against the remaining paths only.
+
+    Refresh is incremental: an edge joining two components re‑frames the
+    smaller one; a changed or removed tree edge re‑frames the subtree
+    below it, re‑attaching through any other edge or splitting off new
+    components.  Other mutations leave the table as is.  Counters:
+    reframed (nodes re‑transported), admitted, rejected.
+    """
+
+    def __init__(self, gg, probes=1, tol=None, seed=0):
+        self.gg, self.tol = gg, gg.tol if tol is None else tol
+        self.k, self.rng = probes, np.random.default_rng(seed)
+        self.t, self.up, self.down, self.tree = {}, {}, {}, {}
+        self.root, self.members = {}, {}
+        self.reframed = self.admitted = self.rejected = 0
+        self._frame(set(gg.adj))
+        self.reframed = 0
+        gg.listeners.append(self._on_change)
+
+    # -- frames --------------------------------------------------------------
+    def _start(self, n):
+        v = self.gg.probe(n)
+        if self.k == 1:
+            return v
+        extra = self.rng.standard_normal((len(v), self.k - 1))
+        return np.column_stack([v, extra / np.linalg.norm(extra, axis=0)])
+
+    def _attach(self, y, x):
+        """Frame y from its framed neighbour x; tree edge x–y."""
+        mats = self.gg.mats
+        e = (x, y) if (x, y) in mats else (y, x)
+        self.t[y] = apply(mats[e], self.t[x]) if e[0] == x else solve(mats[e], self.t[x])
+        self.up[y], self.tree[e] = e, y
+        self.down.setdefault(x, set()).add(y)
+
+    def _frame(self, pending, seeds=(), root=None):
+        """BFS from framed `seeds` into unframed `pending`; whatever stays
+        unreached is split into fresh components, `root` first."""
+        adj, queue = self.gg.adj, deque(seeds)
+        self.reframed += len(pending)
+        while pending:
+            if not queue:
+                r = root if root in pending else next(iter(pending))
+                root = None
+                pending.discard(r)
+                self.t[r], self.up[r] = self._start(r), None
+                self.root[r], self.members[r] = r, {r}
+                queue.append(r)
+            x = queue.popleft()
+            r = self.root[x]
+            for y in adj[x]:
+                if y in pending:
+                    pending.discard(y)
+                    self._attach(y, x)
+                    self.root[y] = r; self.members[r].add(y)
+                    queue.append(y)
+
+    def _detach(self, c):
+        """Unframe the subtree hanging below c; returns its nodes."""
+        e = self.up[c]
+        x = e[0] if e[1] == c else e[1]
+        self.down[x].discard(c)
+        del self.tree[e]
+        sub, stack = set(), [c]
+        while stack:
+            n = stack.pop()
+            sub.add(n)
+            stack.extend(self.down.pop(n, ()))
+            e = self.up.pop(n)
+            if e is not None and n != c:
+                del self.tree[e]
+            del self.t[n]
+        self.members[self.root[c]] -= sub
+        for n in sub:
+            del self.root[n]
+        return sub
+
+    def _on_change(self, event, src, dst):
+        for n in (src, dst):
+            if n not in self.t:
+                self._frame({n}, root=n)
+        child = self.tree.get((src, dst))
+        if child is not None:                    # a tree edge changed: re‑hang below it
+            sub = self._detach(child)
+            adj = self.gg.adj
+            self._frame(sub, seeds={x for n in sub for x in adj[n]
+                                    if x not in sub and x in self.t})
+        if event != "remove" and self.root[src] != self.root[dst]:
+            a, b = self.root[src], self.root[dst]
+            if len(self.members[a]) < len(self.members[b]):
+                src, dst, a, b = dst, src, b, a
+            moved = self.members.pop(b)          # re‑frame the smaller side
+            for n in moved:
+                del self.t[n], self.root[n]
+                self.down.pop(n, None)
+                e = self.up.pop(n)
+                if e is not None:
+                    del self.tree[e]
+            self._frame(moved, seeds=[src])
+
+    # -- queries -------------------------------------------------------------
+    def admit(self, src, dst, M):
+        """Would src→dst = M agree with every path already closing src→dst?"""
+        r = self.root.get(src)
+        if r is None or src == dst or r != self.root.get(dst):
+            return {"ok": True, "error": 0.0, "closing": False}
+        err = rel_error(self.t[dst], apply(M, self.t[src]))
+        ok = err < self.tol
+        if ok:
+            self.admitted += 1
+        else:
+            self.rejected += 1
+        return {"ok": ok, "error": err, "closing": True}
+
+    def stats(self):
+        return {"nodes": len(self.t), "components": len(self.members),
+                "reframed": self.reframed, "admitted": self.admitted,
+                "rejected": self.rejected}
+
+# ---------------------------------------------------------------------------
+# Inverse audit – orthonormality or explicit (a,b)/(b,a) pairs, batched
+# ---------------------------------------------------------------------------
+def check_inverses(mats, tol=1e-5, pairs=False, probes=16, safety=4.0,
+                   chunk_bytes=1 << 27, seed=0, stats=None):
+    """
+    Parameters
+    ----------
+    mats  : {(src, dst): matrix | EdgeOp}
+    tol   : max |E_ij| allowed in the residual E (as np.allclose(atol=tol))
+    pairs : False -> every edge must be orthonormal, E = M·Mᵀ − I
+            True  -> every edge stored in both directions must invert,
+                     E = M_ba·M_ab − I (checked once per pair)
+    probes, safety : random probe count and slack of the estimate
+    chunk_bytes    : cap on each stacked batch of same‑shape edges
+    stats : optional dict, filled with edges, exact_fallbacks, seconds
+    Returns
+    -------
+    dict {edge: bool}; in pairs mode keyed by the (a, b) with a ≤ b.
+
+    Instead of forming E (O(d³) and a d×d temporary per edge), same‑shape
+    dense edges are stacked and ‖E‖_F is estimated from ‖E·X‖_F for a few
+    Gaussian probe columns X (O(d²·probes)).  Since max|E_ij| ≤ ‖E‖_F ≤
+    d·max|E_ij|, an estimate ≤ tol/safety passes, one > tol·safety·d fails,
+    and only the band in between pays for the exact product.
+    """
+    t0  = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    if pairs:
+        todo = [((a, b), mats[(b, a)], M) for (a, b), M in mats.items()
+                if (b, a) in mats and _edge_key(a, b) == (a, b)]
+    else:                                   # R = None means "Lᵀ"
+        todo = [(e, M if isinstance(M, np.ndarray) else to_dense(M), None)
+                for e, M in mats.items()
+                if not isinstance(M, (IdentityOp, PermutationOp))]
+
+    # identity / permutation operators are orthonormal by construction
+    ok = {e: True for e, M in mats.items()
+          if not pairs and isinstance(M, (IdentityOp, PermutationOp))}
+    est, groups, loose = {}, {}, []
+    for key, L, R in todo:
+        if R is not None and (L.shape[1] != R.shape[0] or L.shape[0] != R.shape[1]):
+            ok[key] = False                 # shapes cannot compose to I
+        elif isinstance(L, np.ndarray) and (R is None or isinstance(R, np.ndarray)):
+            groups.setdefault((L.shape, None if R is None else R.shape), []).append((key, L, R))
+        else:
+            loose.append((key, L, R))
+
+    with prof.phase("inverse_probe"):
+        for (lshape, rshape), items in groups.items():
+            X = rng.standard_normal((lshape[0], probes))
+            per = max(1, chunk_bytes // (items[0][1].nbytes * (1 if rshape is None else 2)))
+            for i in range(0, len(items), per):
+                chunk = items[i:i + per]
+                Ls = np.stack([L for _, L, _ in chunk])
+                Rs = Ls.swapaxes(1, 2) if rshape is None else np.stack([R for *_, R in chunk])
+                res = Ls @ (Rs @ X) - X
+                norms = np.sqrt((res ** 2).sum(axis=(1, 2)) / probes)
+                est.update(zip((key for key, *_ in chunk), norms.tolist()))
+        for key, L, R in loose:
+            X = rng.standard_normal((R.shape[1], probes))
+            res = apply(L, apply(R, X)) - X
+            est[key] = float(np.sqrt((res ** 2).sum() / probes))
+
+    exact = 0
+    with prof.phase("inverse_exact"):
+        for key, L, R in todo:
+            if key in ok:
+                continue
+            e, d = est[key], L.shape[0]
+            if e * safety <= tol:
+                ok[key] = True
+            elif e > tol * safety * d:
+                ok[key] = False
+            else:                           # borderline: pay for the product
+                exact += 1
+                Ld = to_dense(L)
+                E = Ld @ (Ld.T if R is None else to_dense(R))
+                E[np.diag_indices_from(E)] -= 1.0
+                ok[key] = float(np.abs(E).max()) <= tol
+
+    prof.count("inverse_edges", len(todo))
+    prof.count("inverse_exact_fallbacks", exact)
+    if stats is not None:
+        stats.update(edges=len(todo), exact_fallbacks=exact,
+                     seconds=time.perf_counter() - t0)
+    return ok
+
+# ---------------------------------------------------------------------------
+# Edge blame – one drifted edge fans out into every triangle it sits in
+# ---------------------------------------------------------------------------
+def _edge_key(x, y):
+    return (x, y) if str(x) <= str(y) else (y, x)
+
+def blame_edges(issues, graph=None, top=None, keep_triangles=False):
+    """
+    Collapse triangle failures into ranked suspect edges.
+
+    Builds a sparse edge→issue incidence index (CSR offsets over the
+    three edges of each failing triangle) and runs a lazy greedy set
+    cover per issue kind: repeatedly take the edge explaining the most
+    still‑unexplained failures, ties broken by `share` – the fraction of
+    the edge's triangles that fail (needs `graph`, else 1.0).  An edge
+    whose every triangle fails is the classic drifted shortcut.
+
+    Returns
+    -------
+    list[dict] with keys edge, kind, failures, explains, share
+    (+ triangles when keep_triangles=True), most suspicious first.
+    """
+    G = None
+    if graph is not None:
+        G = nx.Graph(); G.add_edges_from(graph["mats"].keys())
+
+    suspects = []
+    for kind in sorted({k for _, k in issues}):
+        tris = [tuple(t) for t, k in issues if k == kind]
+        # incidence: edge id per (triangle, side) → CSR by edge
+        edge_id, edges, inc_e = {}, [], []
+        for a, b, c in tris:
+            for e in (_edge_key(a, b), _edge_key(b, c), _edge_key(a, c)):
+                if e not in edge_id:
+                    edge_id[e] = len(edges); edges.append(e)
+                inc_e.append(edge_id[e])
+        inc_e   = np.asarray(inc_e, dtype=np.int64)
+        inc_t   = np.repeat(np.arange(len(tris)), 3)
+        order   = np.argsort(inc_e, kind="stable")
+        members = inc_t[order]
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(inc_e, minlength=len(edges)))))
+
+        def share(i):
+            if G is None:
+                return 1.0
+            x, y = edges[i]
+            total = len(set(G[x]) & set(G[y])) if x in G and y in G else 0
+            return float(offsets[i+1] - offsets[i]) / total if total else 1.0
+
+        shares  = [share(i) for i in range(len(edges))]
+        covered = np.zeros(len(tris), dtype=bool)
+        heap = [(-(offsets[i+1] - offsets[i]), -shares[i], i) for i in range(len(edges))]
+        heapq.heapify(heap)
+        while heap and not covered.all():
+            neg, neg_share, i = heapq.heappop(heap)
+            rows = members[offsets[i]:offsets[i+1]]
+            gain = int((~covered[rows]).sum())
+            if gain == 0:
+                continue
+            if gain < -neg:                     # stale count – re‑queue
+                heapq.heappush(heap, (-gain, neg_share, i)); continue
+            covered[rows] = True
+            item = {"edge": edges[i], "kind": kind, "failures": len(rows),
+                    "explains": gain, "share": round(shares[i], 3)}
+            if keep_triangles:
+                item["triangles"] = [tris[r] for r in rows]
+            suspects.append(item)
+
+    suspects.sort(key=lambda d: (-d["explains"], -d["share"]))
+    return suspects[:top] if top else suspects
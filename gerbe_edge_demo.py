@@ -20,6 +20,7 @@ Usage
     python gerbe_edge_demo.py --drift 0.05 # inject 5 % drift
     python gerbe_edge_demo.py --k 4        # test tetrahedra
     python gerbe_edge_demo.py --fail-on-error
+    python gerbe_edge_demo.py --drift 0.05 --history   # append to the run history
 
 Dependencies: numpy, networkx, matplotlib
 """
@@ -29,12 +30,17 @@ import itertools
 import math
 import random
 import sys
+import time
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 
+from gerbe_core import check_inverses, ego_nodes
+from gerbe_history import HISTORY_PATH, record_run
+from gerbe_render import render
+
 # ---------- Helpers ---------------------------------------------------------
 
 
@@ -54,18 +60,19 @@ def compose(M2: np.ndarray, M1: np.ndarray) -> np.ndarray:
     return M2 @ M1
 
 
-def inverse_check(M: np.ndarray, tol: float = 1e-5) -> bool:
-    """True if M·Mᵀ ≈ I (i.e. M is orthonormal within tol)."""
-    return deep_close(M @ M.T, np.eye(M.shape[0]), tol)
-
-
 # ---------- Obstruction detector -------------------------------------------
 
 
 def obstruction_detector(
-    contexts, morphisms, sample_vec, k: int = 3, tol: float = 1e-5
+    contexts, morphisms, sample_vec, k: int = 3, tol: float = 1e-5, within=None
 ):
-    """Return list of (context tuple, lhs, rhs) that violate consistency."""
+    """Return list of (context tuple, lhs, rhs) that violate consistency.
+
+    `within` (a node set, e.g. from gerbe_core.ego_nodes) limits the
+    search to simplices whose vertices all lie inside it.
+    """
+    if within is not None:
+        contexts = [c for c in contexts if c in within]
     bad = []
     for combo in itertools.combinations(contexts, k):
         first, *_, last = combo
@@ -90,44 +97,15 @@ def draw_graph(contexts, morphisms, inverses_ok, obstructions):
     for src_dst in morphisms:
         G.add_edge(*src_dst)
 
-    pos = nx.spring_layout(G, seed=7)
-    plt.figure(figsize=(7, 5), constrained_layout=True)
-
-    # Edge colours: red if inverse check failed
-    edge_colors = [
-        "red" if not inverses_ok[e] else "black" for e in G.edges()
-    ]
-    nx.draw(
+    # Red edges: inverse check failed · ⚠ on every failing simplex
+    timing = render(
         G,
-        pos,
-        with_labels=True,
-        node_size=1800,
-        font_size=10,
-        edge_color=edge_colors,
-        width=2,
+        marks=[(combo, "⚠", "black") for combo, *_ in obstructions],
+        bad_edges=[e for e, ok in inverses_ok.items() if not ok],
+        title="Edge‑Gerbe Provenance Graph",
     )
-    nx.draw_networkx_edge_labels(
-        G,
-        pos,
-        edge_labels={e: f"{e[0]}→{e[1]}" for e in morphisms},
-        font_size=8,
-    )
-
-    # Mark every failing simplex with ⚠
-    for combo, *_ in obstructions:
-        xs = [pos[n][0] for n in combo]
-        ys = [pos[n][1] for n in combo]
-        plt.text(
-            sum(xs) / len(xs),
-            sum(ys) / len(ys),
-            "⚠",
-            fontsize=20,
-            ha="center",
-            va="center",
-        )
-
-    plt.title("Edge‑Gerbe Provenance Graph")
-    plt.axis("off")
+    print(f"Graph: {timing['nodes']} nodes · layout {timing['layout_s']:.2f}s "
+          f"· render {timing['render_s']:.2f}s")
     plt.show()
 
 
@@ -171,6 +149,10 @@ def parse():
         help="noise level added to shortcut transforms",
     )
     p.add_argument("--k", type=int, default=3, help="order of overlap to test")
+    p.add_argument("--seeds", nargs="*", help="only test near these devices")
+    p.add_argument("--radius", type=int, default=1, help="hop radius around --seeds")
+    p.add_argument("--history", nargs="?", const=str(HISTORY_PATH), metavar="DB",
+                   help=f"record the run in the SQLite history (default {HISTORY_PATH})")
     p.add_argument("--fail-on-error", action="store_true")
     return p.parse_args()
 
@@ -181,13 +163,21 @@ def main():
     # Build synthetic edge network
     contexts, morphisms, sample = build_network(args.nodes, args.dim, args.drift)
 
-    # Check each morphism's inverse quality
-    inverses_ok = {edge: inverse_check(M) for edge, M in morphisms.items()}
+    # Check each morphism's inverse quality (batched M·Mᵀ ≈ I probes)
+    inverses_ok = check_inverses(morphisms)
 
-    # Higher‑order obstruction test
+    # Higher‑order obstruction test (optionally only near --seeds)
+    within = None
+    if args.seeds is not None:
+        within = ego_nodes(nx.Graph(list(morphisms)), args.seeds, args.radius)
+    t0 = time.perf_counter()
     obstructions = obstruction_detector(
-        contexts, morphisms, sample, k=args.k
+        contexts, morphisms, sample, k=args.k, within=within
     )
+    if within is not None:
+        total, kept = math.comb(len(contexts), args.k), math.comb(len(within), args.k)
+        print(f"Checked {kept}/{total} simplices ({total - kept} skipped) "
+              f"in {time.perf_counter() - t0:.3f}s")
 
     # ----- Console output -----
     if obstructions:
@@ -201,6 +191,14 @@ def main():
     if bad_edges:
         print("*** Non‑reversible edges (drift too large):", bad_edges)
 
+    if args.history:
+        run, dt = record_run(
+            args.history, "gerbe_edge_demo",
+            [(e, "inverse") for e in bad_edges] + [(c, "embedding") for c, *_ in obstructions],
+            scope="full" if within is None else "seeds",
+            meta={"nodes": args.nodes, "dim": args.dim, "k": args.k, "drift": args.drift})
+        print(f"History → run #{run} in {args.history} ({dt * 1e3:.1f} ms)")
+
     # ----- Provenance graph -----
     draw_graph(contexts, morphisms, inverses_ok, obstructions)
 
@@ -11,17 +11,28 @@ python gerbe_embedding_demo.py
 
 # Inject drift, save provenance graph to PNG, exit 1 on error (CI‑friendly)
 python gerbe_embedding_demo.py --inject-bug --save-fig drift.png --fail-on-error
+
+# Probe with real embeddings: <dir>/EN.npy, ES.npy, FR.npy – (N, 2) rows each,
+# memory‑mapped and streamed; mean / p99 / max relative error per triangle
+python gerbe_embedding_demo.py --inject-bug --corpus-dir emb/
+
+# Append the run to the SQLite run history (query with gerbe_history.py)
+python gerbe_embedding_demo.py --inject-bug --save-fig drift.png --history
 """
 
 import argparse
 import itertools
 import math
 import sys
+from pathlib import Path
 
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 
+from gerbe_core import check_corpus
+from gerbe_history import HISTORY_PATH, record_run
+
 
 # ---------- helper: 2‑D rotation matrix ------------------------------------
 def rot(theta_rad: float) -> np.ndarray:
@@ -56,6 +67,18 @@ def obstruction_detector(contexts, morphisms, sample_vec, k: int = 3):
     return bad
 
 
+def corpus_obstructions(contexts, morphisms, sample, corpus_dir, tol, stat):
+    """check_corpus over <corpus_dir>/<context>.npy; contexts without a file
+    keep the sample vector.  Returns (bad combos, per‑triangle errors)."""
+    corpora = {c: Path(corpus_dir, f"{c}.npy") for c in contexts
+               if Path(corpus_dir, f"{c}.npy").exists()}
+    print(f"Corpora: {len(corpora)}/{len(contexts)} contexts from {corpus_dir}")
+    errors = {}
+    issues = check_corpus({"mats": morphisms, "corpora": corpora, "base_vec": sample},
+                          tol=tol, stat=stat, errors=errors)
+    return [tri for tri, _ in issues], errors
+
+
 # ---------- graph visual ---------------------------------------------------
 def draw_graph(contexts, morphisms, obstructions):
     G = nx.DiGraph()
@@ -100,6 +123,14 @@ def parse():
                         "(optional custom filename)")
     p.add_argument("--fail-on-error", action="store_true",
                    help="exit 1 if any obstruction is found")
+    p.add_argument("--corpus-dir",
+                   help="probe with <dir>/<context>.npy embedding corpora "
+                        "instead of the single sample vector (k=3)")
+    p.add_argument("--corpus-tol", type=float, default=1e-6,
+                   help="with --corpus-dir: max relative error")
+    p.add_argument("--corpus-stat", choices=["mean", "p99", "max"], default="p99")
+    p.add_argument("--history", nargs="?", const=str(HISTORY_PATH), metavar="DB",
+                   help=f"record the run in the SQLite history (default {HISTORY_PATH})")
     return p.parse_args()
 
 
@@ -112,16 +143,33 @@ def main():
         morphisms[("EN", "FR")] = rot(math.radians(70))  # 60° + 10° drift
 
     # Detect inconsistencies
-    bad = obstruction_detector(contexts, morphisms, sample, k=args.k)
+    if args.corpus_dir:
+        if args.k != 3:
+            sys.exit("--corpus-dir checks triangles only (--k 3)")
+        combos, errors = corpus_obstructions(contexts, morphisms, sample,
+                                             args.corpus_dir, args.corpus_tol,
+                                             args.corpus_stat)
+        for tri, e in errors.items():
+            print(f"  {' → '.join(tri)}: {e['rows']:,} rows  mean {e['mean']:.2e}  "
+                  f"p99 {e['p99']:.2e}  max {e['max']:.2e}")
+        bad = [(c, None, None) for c in combos]
+    else:
+        bad = obstruction_detector(contexts, morphisms, sample, k=args.k)
 
     # Console summary
     if bad:
         print("*** Obstruction detected! ***")
         for combo, lhs, rhs in bad:
-            print(f"{combo}:  lhs={lhs}  rhs={rhs}")
+            print(f"{combo}:  lhs={lhs}  rhs={rhs}" if lhs is not None else f"{combo}")
     else:
         print("No obstruction detected.")
 
+    if args.history:
+        run, _ = record_run(args.history, "gerbe_embedding_demo",
+                            [(combo, "embedding") for combo, *_ in bad],
+                            meta={"k": args.k, "inject_bug": args.inject_bug})
+        print(f"Recorded as run #{run} in {args.history}")
+
     # Plot or save figure
     draw_graph(contexts, morphisms, bad)
     if args.save_fig is not None:
@@ -13,7 +13,11 @@ Highlights
 • k‑simplex obstruction detector  +  inverse sanity check
 • Provenance graph (black = OK, red = bad inverse,
   ⚠ = embedding obstruction, ✖ = policy obstruction)
-• `--report`  ➜  writes **JSON + PNG + self‑contained HTML** to ./reports/
+• `--report`  ➜  writes **JSONL + PNG + HTML** to ./reports/; the HTML page
+  streams the JSONL rows, so serve it (`python -m http.server -d reports`)
+• `--corpus-dir DIR`  ➜  probes with DIR/<Node>.npy embedding corpora
+  (memory‑mapped, streamed) instead of the one‑hot vector; k = 3
+• `--history`  ➜  appends the run to the SQLite history (gerbe_history.py)
 • `--fail-on-error`  ➜  CI‑friendly exit 1 if any inconsistency exists
 """
 
@@ -21,12 +25,11 @@ Highlights
 # Imports & globals
 # ---------------------------------------------------------------------------
 import argparse
-import base64
 import itertools
-import json
 import math
 import random
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Tuple, List
@@ -35,6 +38,11 @@ import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
 
+from gerbe_core import check_corpus, check_inverses, ego_nodes
+from gerbe_history import HISTORY_PATH, record_run
+from gerbe_render import render
+from gerbe_report import ReportWriter
+
 REPORT_DIR = Path("reports")
 REPORT_DIR.mkdir(exist_ok=True)
 
@@ -57,11 +65,6 @@ def compose(M2: np.ndarray, M1: np.ndarray) -> np.ndarray:
     return M2 @ M1
 
 
-def inverse_ok(M: np.ndarray, tol: float = 1e-5) -> bool:
-    """Check orthonormality."""
-    return deep_close(M @ M.T, np.eye(M.shape[0]), tol)
-
-
 def compose_policy(base: Dict, patch: Dict) -> Dict:
     """Overlay patch dict onto base dict (immutable)."""
     out = base.copy()
@@ -78,7 +81,10 @@ def embedding_obstructions(
     vec: np.ndarray,
     k: int = 3,
     tol: float = 1e-5,
+    within=None,
 ):
+    if within is not None:
+        contexts = [c for c in contexts if c in within]
     bad = []
     for combo in itertools.combinations(contexts, k):
         first, *_, last = combo
@@ -92,12 +98,33 @@ def embedding_obstructions(
     return bad
 
 
+def corpus_obstructions(contexts, mats, vec, corpus_dir, tol, stat="p99",
+                        within=None):
+    """
+    Triangle check with real embeddings: <corpus_dir>/<context>.npy rows
+    streamed through both paths (contexts without a file keep `vec`).
+    Returns (bad triangles, {triangle: {rows, mean, p99, max}}).
+    """
+    corpora = {c: Path(corpus_dir, f"{c}.npy") for c in contexts
+               if Path(corpus_dir, f"{c}.npy").exists()}
+    print(f"Corpora: {len(corpora)}/{len(contexts)} contexts from {corpus_dir}")
+    errors = {}
+    issues = check_corpus({"mats": mats, "corpora": corpora, "base_vec": vec},
+                          tol=tol, stat=stat, errors=errors)
+    keep = (lambda t: True) if within is None else (lambda t: set(t) <= set(within))
+    return ([tri for tri, _ in issues if keep(tri)],
+            {t: e for t, e in errors.items() if keep(t)})
+
+
 def policy_obstructions(
     contexts: List[str],
     patches: Dict[Tuple[str, str], Dict],
     base: Dict,
     k: int = 3,
+    within=None,
 ):
+    if within is not None:
+        contexts = [c for c in contexts if c in within]
     bad = []
     for combo in itertools.combinations(contexts, k):
         first, *_, last = combo
@@ -121,53 +148,25 @@ def draw_graph(
     pol_bad,
     outfile: str | None = None,
 ):
+    """Render via gerbe_render; returns its layout/render timings."""
     G = nx.DiGraph()
     G.add_nodes_from(contexts)
     G.add_edges_from(mats.keys())
-    pos = nx.spring_layout(G, seed=8)
 
-    plt.figure(figsize=(8, 6), constrained_layout=True)
-    edge_colors = ["red" if not inv_ok[e] else "black" for e in G.edges()]
-    nx.draw(
+    marks = [(c, "⚠", "orange") for c in emb_bad] + \
+            [(c, "✖", "purple") for c in pol_bad]
+    timing = render(
         G,
-        pos,
-        with_labels=True,
+        marks=marks,
+        bad_edges=[e for e, ok in inv_ok.items() if not ok],
+        title="Gerbe AI — provenance graph",
         node_size=2000,
-        font_size=10,
-        edge_color=edge_colors,
-        width=2,
+        seed=8,
+        outfile=outfile,
     )
-    nx.draw_networkx_edge_labels(
-        G,
-        pos,
-        edge_labels={e: f"{e[0]}→{e[1]}" for e in mats},
-        font_size=7,
-    )
-
-    def mark(combo, symbol, color):
-        xs = [pos[n][0] for n in combo]
-        ys = [pos[n][1] for n in combo]
-        plt.text(
-            sum(xs) / len(xs),
-            sum(ys) / len(ys),
-            symbol,
-            fontsize=20,
-            ha="center",
-            va="center",
-            color=color,
-        )
-
-    for c in emb_bad:
-        mark(c, "⚠", "orange")
-    for c in pol_bad:
-        mark(c, "✖", "purple")
-
-    plt.title("Gerbe AI — provenance graph")
-    plt.axis("off")
-    if outfile:
-        plt.savefig(outfile, dpi=150)
-    else:
+    if not outfile:
         plt.show()
+    return timing
 
 
 # ---------------------------------------------------------------------------
@@ -223,7 +222,18 @@ def get_args():
     p.add_argument("--k", type=int, default=3,
                    help="simplex order to test (3=triangles)")
     p.add_argument("--report", action="store_true",
-                   help="write JSON + PNG + HTML to ./reports/")
+                   help="write JSONL + PNG + HTML to ./reports/")
+    p.add_argument("--corpus-dir",
+                   help="probe with <dir>/<Node>.npy embedding corpora (k=3)")
+    p.add_argument("--corpus-tol", type=float, default=1e-5,
+                   help="with --corpus-dir: max relative error")
+    p.add_argument("--corpus-stat", choices=["mean", "p99", "max"], default="p99")
+    p.add_argument("--history", nargs="?", const=str(HISTORY_PATH), metavar="DB",
+                   help=f"record the run in the SQLite history (default {HISTORY_PATH})")
+    p.add_argument("--seeds", nargs="*",
+                   help="only test simplices near these contexts, e.g. Node3")
+    p.add_argument("--radius", type=int, default=1,
+                   help="hop radius around --seeds")
     p.add_argument("--fail-on-error", action="store_true")
     return p.parse_args()
 
@@ -237,9 +247,29 @@ def main():
         args.nodes, args.dim, args.drift, args.policy_drift
     )
 
-    inv_ok = {e: inverse_ok(M) for e, M in mats.items()}
-    emb_bad = embedding_obstructions(ctx, mats, base_vec, k=args.k)
-    pol_bad = policy_obstructions(ctx, patches, base_policy, k=args.k)
+    inv_ok = check_inverses(mats)          # batched M·Mᵀ ≈ I audit
+    within = None
+    if args.seeds is not None:
+        within = ego_nodes(nx.Graph(list(mats)), args.seeds, args.radius)
+    t0 = time.perf_counter()
+    if args.corpus_dir:
+        if args.k != 3:
+            sys.exit("--corpus-dir checks triangles only (--k 3)")
+        emb_bad, errors = corpus_obstructions(ctx, mats, base_vec, args.corpus_dir,
+                                              args.corpus_tol, args.corpus_stat, within)
+        worst = max(errors.values(), key=lambda e: e[args.corpus_stat], default=None)
+        if worst:
+            print(f"Corpus probes: {len(errors)} triangles, worst {args.corpus_stat} "
+                  f"{worst[args.corpus_stat]:.2e} (mean {worst['mean']:.2e}, "
+                  f"max {worst['max']:.2e}, {worst['rows']:,} rows)")
+    else:
+        emb_bad = embedding_obstructions(ctx, mats, base_vec, k=args.k, within=within)
+    pol_bad = policy_obstructions(ctx, patches, base_policy, k=args.k, within=within)
+    if within is not None:
+        total = math.comb(len(ctx), args.k)
+        kept = math.comb(len(within), args.k)
+        print(f"Checked {kept}/{total} {args.k}-simplices within {args.radius} hops "
+              f"of {args.seeds} ({total - kept} skipped, {time.perf_counter() - t0:.3f}s)")
     bad_edges = [e for e, ok in inv_ok.items() if not ok]
 
     # ---------------- Console summary ----------------
@@ -262,43 +292,35 @@ def main():
     timestamp = datetime.now().strftime("%Y-%m-%d_%H%M")
     png_path = REPORT_DIR / f"{timestamp}.png" if args.report else None
 
-    draw_graph(ctx, mats, inv_ok, emb_bad, pol_bad,
-               outfile=str(png_path) if png_path else None)
+    timing = draw_graph(ctx, mats, inv_ok, emb_bad, pol_bad,
+                        outfile=str(png_path) if png_path else None)
+    print(f"Graph: {timing['nodes']} nodes · layout {timing['layout_s']:.2f}s "
+          f"· render {timing['render_s']:.2f}s")
 
     if args.report:
-        json_path = REPORT_DIR / f"{timestamp}.json"
-        with json_path.open("w") as jf:
-            json.dump({
-                "timestamp": timestamp,
-                "nodes": ctx,
-                "bad_inverse_edges": bad_edges,
-                "embedding_obstructions": emb_bad,
-                "policy_obstructions": pol_bad,
-                "k": args.k,
-                "numeric_drift": args.drift,
-                "policy_drift_prob": args.policy_drift
-            }, jf, indent=2)
-        print(f"JSON  →  {json_path}")
-
-        # HTML one‑pager
-        html_path = REPORT_DIR / f"{timestamp}.html"
-        b64_png = base64.b64encode(png_path.read_bytes()).decode() if png_path else ""
-        html = f"""
-        <html><head><title>Gerbe Report {timestamp}</title>
-        <style>
-            body{{font-family:Arial, sans-serif;}}
-            summary{{cursor:pointer;font-weight:bold;margin-top:1em;}}
-            img{{max-width:100%;border:1px solid #888;}}
-        </style></head><body>
-        <h2>Gerbe AI Consistency Report — {timestamp}</h2>
-        {"<img src='data:image/png;base64," + b64_png + "'/>" if b64_png else ""}
-        <details open><summary>JSON details</summary>
-        <pre>{json.dumps(json.loads(json_path.read_text()), indent=2)}</pre>
-        </details>
-        </body></html>
-        """
-        html_path.write_text(html, encoding="utf-8")
-        print(f"HTML →  {html_path}")
+        meta = {
+            "timestamp": timestamp,
+            "nodes": ctx,
+            "k": args.k,
+            "numeric_drift": args.drift,
+            "policy_drift_prob": args.policy_drift,
+        }
+        with ReportWriter(REPORT_DIR / timestamp, meta=meta, png=png_path) as rw:
+            rw.write_many("inverse", bad_edges)
+            rw.write_many("embedding", emb_bad)
+            rw.write_many("policy", pol_bad)
+        print(f"JSONL →  {rw.jsonl_path}  ({sum(rw.counts.values())} rows)")
+        print(f"HTML  →  {rw.html_path}  (serve with: python -m http.server -d {REPORT_DIR})")
+
+    if args.history:
+        run, dt = record_run(
+            args.history, "gerbe_full_demo",
+            [(e, "inverse") for e in bad_edges] + [(c, "embedding") for c in emb_bad]
+            + [(c, "policy") for c in pol_bad],
+            scope="full" if within is None else "seeds",
+            meta={"nodes": len(ctx), "k": args.k, "numeric_drift": args.drift,
+                  "policy_drift_prob": args.policy_drift})
+        print(f"History → run #{run} in {args.history} ({dt * 1e3:.1f} ms)")
 
     # ---------------- CI gate ----------------
     if args.fail_on_error and (emb_bad or pol_bad or bad_edges):
@@ -0,0 +1,350 @@
+"""
+gerbe_history.py
+----------------
+Embedded SQLite store of gate / demo runs, for obstruction trends.
+
+    with RunHistory() as h:                      # reports/history.sqlite
+        h.record("gerbe_validate", results, config="contexts.yaml")
+        h.triangle(("A", "B", "C"))              # first / last failure
+        h.top_edges(since="30d")                 # edges behind most failures
+
+    python gerbe_history.py runs --limit 20
+    python gerbe_history.py triangle A B C
+    python gerbe_history.py edges --since 30d
+    python gerbe_history.py triangles --since 7d --json
+
+Tables are normalised: `runs` (one row per run, indexed on time),
+`triangles` (one row per node set – k‑simplices from the demos included),
+`edges` (undirected node pairs), `triangle_edges` (indexed on edge) and
+`issues` (run × triangle or edge × kind, indexed on triangle, edge and
+run).  `edge_days` / `triangle_days` roll issues up per UTC day as runs
+are written, so "since" rankings scan days, not every issue.
+
+A run is written in one transaction through temp tables and
+`executemany`; triangle → edge rows are only produced the first time a
+triangle is seen, so a steady‑state run costs one insert per issue plus
+its roll‑up.
+"""
+
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+HISTORY_PATH = Path("reports") / "history.sqlite"
+_SEP = "\x1f"                        # joins the sorted node names of a triangle
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id      INTEGER PRIMARY KEY,
+    started REAL    NOT NULL,
+    source  TEXT    NOT NULL,
+    config  TEXT,
+    scope   TEXT    NOT NULL,
+    issues  INTEGER NOT NULL,
+    meta    TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+CREATE TABLE IF NOT EXISTS edges (
+    id  INTEGER PRIMARY KEY,
+    src TEXT NOT NULL,
+    dst TEXT NOT NULL,
+    UNIQUE (src, dst)
+);
+CREATE TABLE IF NOT EXISTS triangles (
+    id    INTEGER PRIMARY KEY,
+    nodes TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS triangle_edges (
+    triangle_id INTEGER NOT NULL,
+    edge_id     INTEGER NOT NULL,
+    PRIMARY KEY (triangle_id, edge_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triangle_edges_edge ON triangle_edges(edge_id);
+CREATE TABLE IF NOT EXISTS issues (
+    run_id      INTEGER NOT NULL,
+    kind        TEXT    NOT NULL,
+    triangle_id INTEGER,
+    edge_id     INTEGER
+);
+CREATE INDEX IF NOT EXISTS issues_triangle ON issues(triangle_id, run_id);
+CREATE INDEX IF NOT EXISTS issues_edge ON issues(edge_id, run_id);
+CREATE INDEX IF NOT EXISTS issues_run ON issues(run_id);
+CREATE TABLE IF NOT EXISTS edge_days (
+    day      INTEGER NOT NULL,
+    edge_id  INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    runs     INTEGER NOT NULL,
+    PRIMARY KEY (day, edge_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS triangle_days (
+    day         INTEGER NOT NULL,
+    triangle_id INTEGER NOT NULL,
+    runs        INTEGER NOT NULL,
+    first       INTEGER NOT NULL,
+    last        INTEGER NOT NULL,
+    PRIMARY KEY (day, triangle_id)
+) WITHOUT ROWID;
+"""
+
+_TEMP = """
+CREATE TEMP TABLE IF NOT EXISTS _tri  (nodes TEXT, kind TEXT);
+CREATE TEMP TABLE IF NOT EXISTS _edge (src TEXT, dst TEXT, kind TEXT);
+CREATE TEMP TABLE IF NOT EXISTS _pair (nodes TEXT, src TEXT, dst TEXT);
+"""
+
+
+def _key(nodes) -> str:
+    return _SEP.join(sorted(map(str, nodes)))
+
+
+def _since(value) -> float | None:
+    """'30d' / '12h' / '2w' / '90m' ago, an ISO date, or epoch seconds."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([mhdw])", value.strip())
+    if m:
+        unit = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}[m.group(2)]
+        return time.time() - float(m.group(1)) * unit
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _when(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="seconds")
+
+
+class RunHistory:
+    """Record runs and answer trend queries; one connection per instance."""
+
+    def __init__(self, path: str | Path = HISTORY_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA + _TEMP)
+
+    # -- writing -------------------------------------------------------------
+    def record(self, source: str, results: Iterable, *, config: str | None = None,
+               scope: str = "full", meta: dict | None = None,
+               started: float | None = None) -> int:
+        """Store one run.  `results` are `(simplex, kind)` pairs as the
+        checkers return them; a 2‑node simplex (e.g. an `inverse` failure)
+        is recorded against the edge itself.  Returns the run id."""
+        tri, edge = [], []
+        for simplex, kind in results:
+            if len(simplex) == 2:
+                edge.append((*sorted(map(str, simplex)), kind))
+            else:
+                tri.append((_key(simplex), kind))
+        db = self.db
+        started = time.time() if started is None else started
+        with db:
+            run = db.execute(
+                "INSERT INTO runs (started, source, config, scope, issues, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (started, source, config, scope,
+                 len(tri) + len(edge), json.dumps(meta, default=str) if meta else None),
+            ).lastrowid
+            if tri:
+                db.executemany("INSERT INTO _tri VALUES (?, ?)", tri)
+                fresh = [k for k, in db.execute(
+                    "SELECT DISTINCT nodes FROM _tri "
+                    "WHERE nodes NOT IN (SELECT nodes FROM triangles)")]
+                if fresh:
+                    db.executemany("INSERT INTO triangles (nodes) VALUES (?)",
+                                   ((k,) for k in fresh))
+                    db.executemany("INSERT INTO _pair VALUES (?, ?, ?)",
+                                   ((k, a, b) for k in fresh
+                                    for a, b in itertools.combinations(k.split(_SEP), 2)))
+                    db.execute("INSERT OR IGNORE INTO edges (src, dst) "
+                               "SELECT DISTINCT src, dst FROM _pair")
+                    db.execute("INSERT OR IGNORE INTO triangle_edges "
+                               "SELECT t.id, e.id FROM _pair p "
+                               "JOIN triangles t ON t.nodes = p.nodes "
+                               "JOIN edges e ON e.src = p.src AND e.dst = p.dst")
+                db.execute("INSERT INTO issues (run_id, kind, triangle_id) "
+                           "SELECT ?, x.kind, t.id FROM _tri x "
+                           "JOIN triangles t ON t.nodes = x.nodes", (run,))
+            if edge:
+                db.executemany("INSERT INTO _edge VALUES (?, ?, ?)", edge)
+                db.execute("INSERT OR IGNORE INTO edges (src, dst) "
+                           "SELECT DISTINCT src, dst FROM _edge")
+                db.execute("INSERT INTO issues (run_id, kind, edge_id) "
+                           "SELECT ?, x.kind, e.id FROM _edge x "
+                           "JOIN edges e ON e.src = x.src AND e.dst = x.dst", (run,))
+            self._roll_up(run, started)
+            db.execute("DELETE FROM _tri")
+            db.execute("DELETE FROM _edge")
+            db.execute("DELETE FROM _pair")
+        return run
+
+    def _roll_up(self, run, started):
+        day = int(started // 86400)
+        self.db.execute(
+            "INSERT INTO edge_days "
+            "SELECT ?, edge_id, COUNT(*), 1 FROM ("
+            "  SELECT te.edge_id FROM issues i "
+            "  JOIN triangle_edges te ON te.triangle_id = i.triangle_id WHERE i.run_id = ?"
+            "  UNION ALL "
+            "  SELECT edge_id FROM issues WHERE run_id = ? AND edge_id IS NOT NULL) "
+            "WHERE true GROUP BY edge_id "
+            "ON CONFLICT (day, edge_id) DO UPDATE SET "
+            "failures = failures + excluded.failures, runs = runs + 1",
+            (day, run, run))
+        self.db.execute(
+            "INSERT INTO triangle_days "
+            "SELECT DISTINCT ?, triangle_id, 1, ?, ? FROM issues "
+            "WHERE run_id = ? AND triangle_id IS NOT NULL "
+            "ON CONFLICT (day, triangle_id) DO UPDATE SET "
+            "runs = runs + 1, last = excluded.last",
+            (day, run, run, run))
+
+    # -- queries -------------------------------------------------------------
+    @staticmethod
+    def _first_day(since) -> int:
+        ts = _since(since)
+        return -1 if ts is None else int(ts // 86400)
+
+    def runs(self, limit: int = 20, source: str | None = None) -> list[dict]:
+        sql = "SELECT id, started, source, config, scope, issues, meta FROM runs"
+        args: tuple = ()
+        if source:
+            sql, args = sql + " WHERE source = ?", (source,)
+        rows = self.db.execute(sql + " ORDER BY id DESC LIMIT ?", (*args, limit))
+        return [{"run": r[0], "started": _when(r[1]), "source": r[2], "config": r[3],
+                 "scope": r[4], "issues": r[5], "meta": json.loads(r[6]) if r[6] else {}}
+                for r in rows]
+
+    def triangle(self, nodes) -> dict | None:
+        """First / last failing run of a triangle (any node order) and how
+        many runs it has failed in; None if it never failed."""
+        row = self.db.execute("SELECT id FROM triangles WHERE nodes = ?",
+                              (_key(nodes),)).fetchone()
+        if row is None:
+            return None
+        first, last, failed = self.db.execute(
+            "SELECT MIN(run_id), MAX(run_id), COUNT(DISTINCT run_id) "
+            "FROM issues WHERE triangle_id = ?", (row[0],)).fetchone()
+        when = dict(self.db.execute("SELECT id, started FROM runs WHERE id IN (?, ?)",
+                                    (first, last)))
+        kinds = [k for k, in self.db.execute(
+            "SELECT DISTINCT kind FROM issues WHERE triangle_id = ?", (row[0],))]
+        since = self.db.execute("SELECT COUNT(*) FROM runs WHERE id >= ?",
+                                (first,)).fetchone()[0]
+        return {"triangle": sorted(map(str, nodes)), "kinds": kinds,
+                "first_run": first, "first_seen": _when(when[first]),
+                "last_run": last, "last_seen": _when(when[last]),
+                "failed_runs": failed, "runs_since_first": since}
+
+    def top_edges(self, since=None, limit: int = 10) -> list[dict]:
+        """Edges ranked by the failures they take part in (failing triangles
+        through the edge plus failures recorded on the edge itself), from
+        the UTC day `since` falls on."""
+        rows = self.db.execute(
+            "SELECT e.src, e.dst, f.n, f.runs FROM ("
+            "  SELECT edge_id, SUM(failures) AS n, SUM(runs) AS runs FROM edge_days "
+            "  WHERE day >= ? GROUP BY edge_id ORDER BY n DESC LIMIT ?) f "
+            "JOIN edges e ON e.id = f.edge_id ORDER BY f.n DESC",
+            (self._first_day(since), limit))
+        return [{"edge": [a, b], "failures": n, "runs": runs} for a, b, n, runs in rows]
+
+    def top_triangles(self, since=None, limit: int = 10) -> list[dict]:
+        rows = self.db.execute(
+            "SELECT t.nodes, f.n, f.first, f.last FROM ("
+            "  SELECT triangle_id, SUM(runs) AS n, MIN(first) AS first, "
+            "         MAX(last) AS last FROM triangle_days "
+            "  WHERE day >= ? GROUP BY triangle_id ORDER BY n DESC LIMIT ?) f "
+            "JOIN triangles t ON t.id = f.triangle_id ORDER BY f.n DESC",
+            (self._first_day(since), limit))
+        return [{"triangle": k.split(_SEP), "failed_runs": n,
+                 "first_run": first, "last_run": last} for k, n, first, last in rows]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record_run(path, source: str, results, **kw) -> tuple[int, float]:
+    """Open, record one run, close; returns (run id, seconds spent)."""
+    t = time.perf_counter()
+    with RunHistory(path) as h:
+        run = h.record(source, results, **kw)
+    return run, time.perf_counter() - t
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query the gerbe run history")
+    ap.add_argument("--db", default=str(HISTORY_PATH), help="history database")
+    ap.add_argument("--json", action="store_true", help="print JSON instead of text")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("runs", help="most recent runs")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--source", help="e.g. gerbe_validate, gerbe_full_demo")
+    p = sub.add_parser("triangle", help="when a triangle first / last failed")
+    p.add_argument("nodes", nargs="+")
+    for name, what in (("edges", "edges behind the most failures"),
+                       ("triangles", "triangles failing in the most runs")):
+        p = sub.add_parser(name, help=what)
+        p.add_argument("--since", help="'30d', '12h', '2w' or an ISO date")
+        p.add_argument("--limit", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    if not Path(args.db).exists():
+        sys.exit(f"❌  no history at {args.db} (record runs with --history)")
+    t = time.perf_counter()
+    with RunHistory(args.db) as h:
+        if args.cmd == "runs":
+            out = h.runs(args.limit, args.source)
+        elif args.cmd == "triangle":
+            out = h.triangle(args.nodes)
+        elif args.cmd == "edges":
+            out = h.top_edges(args.since, args.limit)
+        else:
+            out = h.top_triangles(args.since, args.limit)
+    dt = time.perf_counter() - t
+    if args.json:
+        print(json.dumps(out, indent=2))
+        return
+
+    if args.cmd == "runs":
+        for r in out:
+            print(f"#{r['run']:<6} {r['started']}  {r['source']:<22} {r['scope']:<8} "
+                  f"{r['issues']:>6,} issues  {r['config'] or ''}")
+    elif args.cmd == "triangle":
+        if out is None:
+            print(f"{' – '.join(args.nodes)}: never failed")
+        else:
+            print(f"{' – '.join(out['triangle'])}  ({', '.join(out['kinds'])})\n"
+                  f"   first failed  run #{out['first_run']}  {out['first_seen']}\n"
+                  f"   last failed   run #{out['last_run']}  {out['last_seen']}\n"
+                  f"   failed in {out['failed_runs']:,} of {out['runs_since_first']:,} "
+                  f"runs since")
+    elif args.cmd == "edges":
+        for r in out:
+            print(f"   • {r['edge'][0]}–{r['edge'][1]}   {r['failures']:,} failures "
+                  f"in {r['runs']:,} runs")
+    else:
+        for r in out:
+            print(f"   • {' – '.join(r['triangle'])}   failed in {r['failed_runs']:,} runs "
+                  f"(#{r['first_run']} … #{r['last_run']})")
+    print(f"({dt * 1e3:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+gerbe_index.py
+--------------
+Persistent artefact index, in the spirit of git's index.
+
+    idx = ArtifactIndex()                  # .gerbe_cache/index.json
+    e   = idx.entry("models/us_to_eu.npy")
+    e["sha256"], e["header"]               # {"shape", "dtype", "fortran_order"}
+    idx.save()
+
+    key = run_key(...)                     # config + artefact hashes + options
+    store_result(key, {...}); load_result(key)
+
+    tri = load_triangle_index(G)           # .gerbe_cache/triangles/<topology>/
+    graph["triangle_index"] = tri          # engines skip enumeration
+
+Each path maps to its stat signature (size, mtime_ns, inode) plus the
+content hash and, for .npy files, the parsed array header.  A file is
+only re‑hashed when its stat signature changed – an unchanged tree costs
+one stat() per artefact and reads no artefact bytes.  Like git, entries
+whose mtime is not older than the index itself are "racily clean" (the
+file could have changed within the same timestamp tick) and get
+re‑hashed.  `paranoid=True` ignores the stat data and re‑hashes all.
+Files listed in `keep` are read whole when hashed and their bytes left
+in `blobs`, so a cold run can decode them without a second read.
+
+The result cache keys a finished gate run by everything its verdict
+depends on; when nothing changed, the caller reuses the stored verdict
+without loading a single matrix.
+
+The triangle index stores a topology's triangles as an int32 (T, 3)
+array plus CSR per‑edge incidence, memory‑mapped on load.  A topology
+with no stored index is derived from the last one by adding / removing
+the differing edges rather than re‑enumerating.
+
+Counters: stat_hits, hashed, hashed_bytes.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+
+from gerbe_core import enumerate_triangles
+
+INDEX_PATH = Path(".gerbe_cache") / "index.json"
+RESULT_DIR = Path(".gerbe_cache") / "results"
+TRI_DIR    = Path(".gerbe_cache") / "triangles"
+_CHUNK = 1 << 20
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def npy_header(path: Path) -> dict | None:
+    """Shape / dtype / order from a .npy header (reads ~128 bytes)."""
+    try:
+        with open(path, "rb") as f:
+            version = np.lib.format.read_magic(f)
+            shape, fortran, dtype = np.lib.format._read_array_header(f, version)
+    except (ValueError, OSError):
+        return None
+    return {"shape": list(shape), "dtype": dtype.str, "fortran_order": fortran}
+
+
+class ArtifactIndex:
+    def __init__(self, path: Path | str = INDEX_PATH, paranoid: bool = False,
+                 keep=()):
+        self.path = Path(path)
+        self.paranoid = paranoid
+        # paths whose bytes are kept in `blobs` when they have to be hashed,
+        # so the loader that follows a cache miss does not read them again
+        self.keep = {Path(p).resolve() for p in keep}
+        self.blobs: dict[Path, bytes] = {}
+        self.entries: dict[str, dict] = {}
+        self.written_ns = 0
+        self.stat_hits = self.hashed = self.hashed_bytes = 0
+        self._dirty = False
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                self.entries = data.get("entries", {})
+                self.written_ns = self.path.stat().st_mtime_ns
+            except (ValueError, OSError):
+                self.entries = {}                      # corrupt index → rebuild
+
+    def entry(self, path: Path | str) -> dict | None:
+        """Index entry for `path`, refreshed if stale; None if missing."""
+        p = Path(path)
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        key = str(p.resolve())
+        sig = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino}
+        old = self.entries.get(key)
+        if (not self.paranoid and old is not None
+                and all(old[k] == v for k, v in sig.items())
+                and st.st_mtime_ns < self.written_ns):
+            self.stat_hits += 1
+            return old
+        if p.resolve() in self.keep:
+            data = self.blobs[p.resolve()] = p.read_bytes()
+            e = {**sig, "sha256": hashlib.sha256(data).hexdigest()}
+        else:
+            e = {**sig, "sha256": _sha256(p)}
+        if p.suffix == ".npy":
+            e["header"] = npy_header(p)
+        self.hashed += 1
+        self.hashed_bytes += st.st_size
+        self.entries[key] = e
+        self._dirty = True
+        return e
+
+    def digest(self, path: Path | str) -> str | None:
+        e = self.entry(path)
+        return e and e["sha256"]
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": 1, "entries": self.entries}))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def stats(self) -> dict:
+        return {"stat_hits": self.stat_hits, "hashed": self.hashed,
+                "hashed_bytes": self.hashed_bytes}
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+def run_key(index: ArtifactIndex, paths, *parts) -> str:
+    """sha256 over artefact digests (missing → None) and JSON‑able `parts`."""
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(json.dumps([str(p), index.digest(p)]).encode())
+    h.update(json.dumps(parts, default=str, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def load_result(key: str, root: Path = RESULT_DIR) -> dict | None:
+    try:
+        return json.loads((Path(root) / f"{key}.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def store_result(key: str, payload: dict, root: Path = RESULT_DIR, keep: int = 64):
+    """Write one cached verdict; only the `keep` most recent survive."""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f"{key}.tmp"
+    tmp.write_text(json.dumps(payload, default=str))
+    os.replace(tmp, root / f"{key}.json")
+    old = sorted(root.glob("*.json"), key=lambda f: f.stat().st_mtime_ns)[:-keep]
+    for f in old:
+        f.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------------------
+# Triangle index
+# ---------------------------------------------------------------------------
+def _ekey(e):                   # (i, j), i < j  →  one sortable int64
+    return (e[:, 0].astype(np.int64) << 32) | e[:, 1]
+
+
+class TriangleIndex:
+    """
+    Triangles of an undirected graph over an interned node table.
+
+    nodes : list of node names; ids are positions in it
+    edges : int32 (E, 2), i < j, sorted
+    tris  : int32 (T, 3), i < j < k, sorted – the order enumerate_triangles
+            gives when the table is in graph order
+    ptr / inc : CSR incidence – inc[ptr[e]:ptr[e+1]] are the rows of tris
+            containing edge e
+    key   : _topology_key of the edge set the index describes
+    """
+
+    def __init__(self, nodes, edges, tris, ptr=None, inc=None, key=None):
+        self.nodes = list(nodes)
+        self.index = {u: i for i, u in enumerate(self.nodes)}
+        self.edges, self.tris = edges, tris
+        self._keys, self._key = None, key
+        if ptr is None:
+            ptr, inc = self._incidence()
+        self.ptr, self.inc = ptr, inc
+
+    def __len__(self):
+        return len(self.tris)
+
+    @property
+    def n_edges(self):
+        return len(self.edges)
+
+    @property
+    def key(self):
+        if self._key is None:
+            nodes = self.nodes
+            self._key = _topology_key((nodes[i], nodes[j])
+                                      for i, j in np.asarray(self.edges).tolist())
+        return self._key
+
+    @classmethod
+    def build(cls, G):
+        nodes = list(G)
+        index = {u: i for i, u in enumerate(nodes)}
+        flat = (index[u] for tri in enumerate_triangles(G) for u in tri)
+        tris = np.fromiter(flat, dtype=np.int32).reshape(-1, 3)
+        edges = np.array(sorted((min(index[u], index[v]), max(index[u], index[v]))
+                                for u, v in G.edges() if u != v),
+                         dtype=np.int32).reshape(-1, 2)
+        return cls(nodes, edges, tris)
+
+    def _incidence(self):
+        keys = _ekey(self.edges)
+        t = self.tris
+        eid = np.searchsorted(keys, np.concatenate(
+            [_ekey(t[:, [0, 1]]), _ekey(t[:, [0, 2]]), _ekey(t[:, [1, 2]])]))
+        order = np.argsort(eid, kind="stable")
+        inc = (order % max(len(t), 1)).astype(np.int32)
+        ptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(eid, minlength=len(keys)), out=ptr[1:])
+        return ptr, inc
+
+    # -- queries ---------------------------------------------------------------
+    def matches(self, G):
+        """True if undirected G has exactly this index's edge set."""
+        if self.n_edges != G.number_of_edges() - nx.number_of_selfloops(G):
+            return False
+        return self.key == _topology_key((u, v) for u, v in G.edges() if u != v)
+
+    def triangles(self, chunk=1 << 16):
+        nodes = self.nodes
+        for s in range(0, len(self.tris), chunk):
+            for i, j, k in self.tris[s:s + chunk].tolist():
+                yield [nodes[i], nodes[j], nodes[k]]
+
+    def edge_id(self, u, v):
+        i, j = sorted((self.index[u], self.index[v]))
+        if self._keys is None:
+            self._keys = _ekey(self.edges)
+        keys = self._keys
+        e = int(np.searchsorted(keys, (i << 32) | j))
+        if e == len(keys) or keys[e] != (i << 32) | j:
+            raise KeyError((u, v))
+        return e
+
+    def edge_triangles(self, u, v):
+        """Triangles through edge u–v, as node‑name lists."""
+        e = self.edge_id(u, v)
+        rows = self.tris[np.sort(self.inc[self.ptr[e]:self.ptr[e + 1]])]
+        return [[self.nodes[x] for x in r] for r in rows.tolist()]
+
+    # -- incremental update ----------------------------------------------------
+    def update(self, add=(), remove=()):
+        """
+        Remove, then add, undirected edges (node‑name pairs); new nodes
+        are appended to the table.  Triangles through a removed edge are
+        dropped via the incidence lists; each added edge u–v gains the
+        triangles N(u) ∩ N(v).  Returns (triangles added, removed).
+        """
+        keys = _ekey(np.asarray(self.edges))
+        ij = np.array([sorted((self.index[u], self.index[v])) for u, v in remove
+                       if u in self.index and v in self.index], dtype=np.int64).reshape(-1, 2)
+        gone = _ekey(ij)
+        pos = np.searchsorted(keys, gone).clip(max=max(len(keys) - 1, 0))
+        drop = pos[keys[pos] == gone] if len(keys) else pos[:0]
+        drop_t = np.zeros(len(self.tris), dtype=bool)
+        for e in drop.tolist():
+            drop_t[self.inc[self.ptr[e]:self.ptr[e + 1]]] = True
+        edges = np.delete(np.asarray(self.edges), drop, axis=0)
+
+        add = list(add)
+        for x in {x for e in add for x in e} - self.index.keys():
+            self.index[x] = len(self.nodes); self.nodes.append(x)
+        # adjacency of the touched nodes only – new edges never reach further
+        ends = np.fromiter({self.index[x] for e in add for x in e}, dtype=np.int32)
+        near = edges[np.isin(edges[:, 0], ends) | np.isin(edges[:, 1], ends)]
+        adj = {}
+        for i, j in near.tolist():
+            adj.setdefault(i, set()).add(j); adj.setdefault(j, set()).add(i)
+        new_e, new_t = [], []
+        for u, v in add:
+            i, j = sorted((self.index[u], self.index[v]))
+            if i == j or j in adj.get(i, ()):
+                continue
+            new_t += [sorted((i, j, k)) for k in adj.get(i, set()) & adj.get(j, set())]
+            adj.setdefault(i, set()).add(j); adj.setdefault(j, set()).add(i)
+            new_e.append((i, j))
+
+        edges = np.concatenate([edges, np.array(new_e, dtype=np.int32).reshape(-1, 2)])
+        edges = edges[np.argsort(_ekey(edges), kind="stable")]
+        tris = np.concatenate([np.asarray(self.tris)[~drop_t],
+                               np.array(new_t, dtype=np.int32).reshape(-1, 3)])
+        tris = tris[np.lexsort(tris.T[::-1])]
+        self.edges, self.tris, self._keys, self._key = edges, tris, None, None
+        self.ptr, self.inc = self._incidence()
+        return len(new_t), int(drop_t.sum())
+
+    # -- persistence -------------------------------------------------------------
+    def save(self, path):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.mkdir(parents=True, exist_ok=True)
+        for name in ("edges", "tris", "ptr", "inc"):
+            np.save(tmp / f"{name}.npy", np.asarray(getattr(self, name)))
+        (tmp / "nodes.json").write_text(json.dumps(self.nodes))
+        (tmp / "topology").write_text(self.key)
+        if path.exists():
+            for f in path.iterdir():
+                f.unlink()
+            path.rmdir()
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        path, mode = Path(path), ("r" if mmap else None)
+        arrays = {n: np.load(path / f"{n}.npy", mmap_mode=mode)
+                  for n in ("edges", "tris", "ptr", "inc")}
+        key = path / "topology"
+        return cls(json.loads((path / "nodes.json").read_text()), **arrays,
+                   key=key.read_text().strip() if key.exists() else None)
+
+
+def _topology_key(edges):
+    """Digest of an undirected edge set (isolated nodes hold no triangles)."""
+    lines = [f"{u}\0{v}" if str(u) <= str(v) else f"{v}\0{u}" for u, v in edges]
+    lines.sort()
+    return hashlib.sha1("\n".join(lines).encode()).hexdigest()
+
+
+def load_triangle_index(G, root: Path = TRI_DIR, keep: int = 4, stats=None):
+    """
+    TriangleIndex for undirected G, persisted under `root`/<topology hash>.
+
+    Exact hit → memory‑mapped load.  Otherwise the most recently used
+    index is updated by the edge difference (unless more than half the
+    edges differ, then rebuilt) and stored under the new hash.  `stats`
+    receives triangle_index ("hit" | "updated" | "built"), added, removed.
+    """
+    root = Path(root)
+    E = [(u, v) for u, v in G.edges() if u != v]
+    key = _topology_key(E)
+    path, latest = root / key, root / "LATEST"
+    info = {"triangle_index": "hit", "added": 0, "removed": 0}
+    try:
+        idx = TriangleIndex.load(path)
+        os.utime(path)                                   # keep it off the prune list
+    except (OSError, ValueError):
+        idx = None
+    if idx is None:
+        try:
+            idx = TriangleIndex.load(root / latest.read_text().strip(), mmap=False)
+        except (OSError, ValueError):
+            idx = None
+        if idx is not None:                              # diff as int64 edge keys
+            extra = [u for u in G if u not in idx.index]
+            ids = {**idx.index, **{u: len(idx.nodes) + n for n, u in enumerate(extra)}}
+            a = np.fromiter((ids[u] for u, _ in E), dtype=np.int64, count=len(E))
+            b = np.fromiter((ids[v] for _, v in E), dtype=np.int64, count=len(E))
+            want, have = (np.minimum(a, b) << 32) | np.maximum(a, b), _ekey(idx.edges)
+            gone = np.setdiff1d(have, want)
+            new = np.setdiff1d(want, have)
+            if len(gone) + len(new) > len(want) // 2:
+                idx = None
+        if idx is None:
+            idx = TriangleIndex.build(G)
+            info["triangle_index"] = "built"
+        else:
+            names = idx.nodes + extra
+            def edge(k):
+                return names[int(k) >> 32], names[int(k) & 0xFFFFFFFF]
+            added, removed = idx.update(add=map(edge, new), remove=map(edge, gone))
+            info.update(triangle_index="updated", added=added, removed=removed)
+        idx._key = key
+        root.mkdir(parents=True, exist_ok=True)
+        idx.save(path)
+        old = sorted((d for d in root.iterdir() if d.is_dir() and d.name != key
+                      and not d.name.endswith(".tmp")),
+                     key=lambda d: d.stat().st_mtime_ns)[:-keep or None]
+        for d in old:
+            for f in d.iterdir():
+                f.unlink()
+            d.rmdir()
+    latest.parent.mkdir(parents=True, exist_ok=True)
+    latest.write_text(key)
+    if stats is not None:
+        stats.update(info)
+    return idx
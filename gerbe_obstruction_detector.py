@@ -20,6 +20,9 @@ import sys
 import networkx as nx  # type: ignore
 import matplotlib.pyplot as plt
 
+from gerbe_core import ego_nodes
+from gerbe_render import render
+
 # -----------------------------------------------------------------------------
 # Types & helpers
 # -----------------------------------------------------------------------------
@@ -48,9 +51,16 @@ def verify_reversibility(morphisms: Morphisms, sample: Payload) -> List[Tuple[st
 def k_simplex_obstructions(contexts: Sequence[str],
                            morphisms: Morphisms,
                            sample: Payload,
-                           k: int = 3) -> List[Tuple[Simplex, str]]:
-    """Return list of (simplex, reason) pairs for which some face fails."""
+                           k: int = 3,
+                           within: set | None = None) -> List[Tuple[Simplex, str]]:
+    """Return list of (simplex, reason) pairs for which some face fails.
+
+    `within` restricts the search to simplices inside that node set
+    (see gerbe_core.ego_nodes for the R‑hop neighbourhood of a seed set).
+    """
     bad: List[Tuple[Simplex, str]] = []
+    if within is not None:
+        contexts = [c for c in contexts if c in within]
 
     # Pre‑compute triangle failures
     tri_fail: Dict[Tuple[str, str, str], str] = {}
@@ -82,27 +92,14 @@ def visualize(contexts: Iterable[str],
               bad_edges: List[Tuple[str, str]]):
     G = nx.DiGraph()
     G.add_nodes_from(contexts)
-    for src, dst in morphisms:
-        G.add_edge(src, dst, color="red" if (src, dst) in bad_edges else "black")
-
-    pos = nx.spring_layout(G, seed=5)
+    G.add_edges_from(morphisms)
 
     fig, ax = plt.subplots(figsize=(7, 5), constrained_layout=True)  # <- no tight_layout()
-
-    edge_colors = [G.edges[e].get("color", "black") for e in G.edges]
-    nx.draw(G, pos, ax=ax, with_labels=True, node_size=1800, font_size=10,
-            edge_color=edge_colors, width=2)
-    nx.draw_networkx_edge_labels(G, pos, ax=ax,
-                                 edge_labels={e: f"{e[0]}→{e[1]}" for e in morphisms})
-
-    for tri, _ in tri_fail:
-        a, b, c = tri
-        x = (pos[a][0] + pos[b][0] + pos[c][0]) / 3
-        y = (pos[a][1] + pos[b][1] + pos[c][1]) / 3
-        ax.text(x, y, "⚠", fontsize=20, ha="center", va="center")
-
-    ax.set_title("Gerbe Obstruction Graph – k‑simplex view (⚠ triangles, red bad inverses)")
-    ax.set_axis_off()
+    timing = render(G, marks=[(tri, "⚠", "black") for tri, _ in tri_fail],
+                    bad_edges=bad_edges, seed=5, ax=ax,
+                    title="Gerbe Obstruction Graph – k‑simplex view (⚠ triangles, red bad inverses)")
+    print(f"Graph: {timing['nodes']} nodes · layout {timing['layout_s']:.2f}s "
+          f"· render {timing['render_s']:.2f}s")
     plt.show()
 
 # -----------------------------------------------------------------------------
@@ -114,6 +111,10 @@ def main():
     parser.add_argument("--k", type=int, default=3, help="Max simplex size to check (default 3)")
     parser.add_argument("--fail-on-error", action="store_true",
                         help="Exit non‑zero on any failure")
+    parser.add_argument("--seeds", nargs="*",
+                        help="Only check simplices near these contexts")
+    parser.add_argument("--radius", type=int, default=1,
+                        help="Hop radius around --seeds (default 1)")
     args = parser.parse_args()
 
     # Demo data
@@ -133,7 +134,13 @@ def main():
     }
 
     bad_edges = verify_reversibility(morphisms, base_policy)
-    simplex_fail = k_simplex_obstructions(contexts, morphisms, base_policy, k=args.k)
+    within = None
+    if args.seeds is not None:
+        within = ego_nodes(nx.Graph(list(morphisms)), args.seeds, args.radius)
+        print(f"Checking {len(within)}/{len(contexts)} contexts within "
+              f"{args.radius} hops of {args.seeds}")
+    simplex_fail = k_simplex_obstructions(contexts, morphisms, base_policy,
+                                          k=args.k, within=within)
     tri_fail = [item for item in simplex_fail if len(item[0]) == 3]
 
     if bad_edges:
@@ -0,0 +1,299 @@
+"""
+gerbe_ops.py
+------------
+Typed edge operators, so structured transforms (LoRA deltas, scalings,
+permutations, block‑wise adapters) never have to be materialised as a
+dense d×d matrix.
+
+Every operator maps a vector (d_in,) or a block (d_in, m) to
+(d_out,) / (d_out, m) through `apply`, at its native cost:
+
+    DenseOp        M @ x                  O(d_out·d_in)
+    DiagonalOp     diag * x               O(d)
+    PermutationOp  x[perm]                O(d)
+    LowRankOp      x + A @ (B @ x)        O(d·r)
+    BlockDiagOp    M_i @ x_i per block    O(Σ d_i²)
+    IdentityOp     x                      O(1)
+
+Plain `np.ndarray` edges keep working everywhere: use the module‑level
+`apply()` / `invert()` helpers, which accept either form.  `Interner`
+dedups identical payloads by content hash and `tag()` turns dense
+identity / permutation matrices into their operators.
+
+YAML syntax (see .github/contexts.yaml) is parsed by `from_spec()`.
+"""
+
+from __future__ import annotations
+import hashlib
+from typing import Callable, Sequence, Union
+
+import numpy as np
+
+
+class EdgeOp:
+    """Base class – subclasses implement `apply`, `inverse`, `dense`."""
+
+    kind = "abstract"
+    shape: tuple[int, int]
+
+    def apply(self, x: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def inverse(self) -> "EdgeOp":
+        raise NotImplementedError
+
+    def dense(self) -> np.ndarray:
+        """Materialise as a matrix (debugging / tiny graphs only)."""
+        return self.apply(np.eye(self.shape[1]))
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.shape}"
+
+
+class DenseOp(EdgeOp):
+    kind = "dense"
+
+    def __init__(self, M: np.ndarray):
+        self.M = np.asarray(M)
+        self.shape = self.M.shape
+
+    def apply(self, x):
+        return self.M @ x
+
+    def inverse(self):
+        return DenseOp(np.linalg.inv(self.M))
+
+    def dense(self):
+        return self.M
+
+    @property
+    def nbytes(self):
+        return self.M.nbytes
+
+
+class DiagonalOp(EdgeOp):
+    kind = "diagonal"
+
+    def __init__(self, diag: np.ndarray):
+        self.diag = np.asarray(diag).ravel()
+        self.shape = (self.diag.shape[0],) * 2
+
+    def apply(self, x):
+        return self.diag * x if x.ndim == 1 else self.diag[:, None] * x
+
+    def inverse(self):
+        if not np.all(self.diag):
+            raise np.linalg.LinAlgError("Singular diagonal operator")
+        return DiagonalOp(1.0 / self.diag)
+
+    @property
+    def nbytes(self):
+        return self.diag.nbytes
+
+
+class PermutationOp(EdgeOp):
+    """y = x[perm]   (row i of the output reads input coordinate perm[i])."""
+
+    kind = "permutation"
+
+    def __init__(self, perm: np.ndarray):
+        self.perm = np.asarray(perm, dtype=np.intp).ravel()
+        self.shape = (self.perm.shape[0],) * 2
+
+    def apply(self, x):
+        return x[self.perm]
+
+    def inverse(self):
+        return PermutationOp(np.argsort(self.perm))
+
+    @property
+    def nbytes(self):
+        return self.perm.nbytes
+
+
+class LowRankOp(EdgeOp):
+    """I + A @ B  with A: d×r, B: r×d (a merged LoRA delta)."""
+
+    kind = "lowrank"
+
+    def __init__(self, A: np.ndarray, B: np.ndarray):
+        self.A, self.B = np.asarray(A), np.asarray(B)
+        if self.A.shape[1] != self.B.shape[0] or self.A.shape[0] != self.B.shape[1]:
+            raise ValueError(f"Low‑rank factors do not line up: "
+                             f"A{self.A.shape} B{self.B.shape}")
+        self.shape = (self.A.shape[0],) * 2
+
+    def apply(self, x):
+        return x + self.A @ (self.B @ x)
+
+    def inverse(self):
+        # Woodbury: (I + AB)⁻¹ = I − A (I_r + BA)⁻¹ B   – only an r×r solve
+        r = self.A.shape[1]
+        core = np.linalg.inv(np.eye(r) + self.B @ self.A)
+        return LowRankOp(-self.A @ core, self.B)
+
+    @property
+    def nbytes(self):
+        return self.A.nbytes + self.B.nbytes
+
+
+class BlockDiagOp(EdgeOp):
+    kind = "blockdiag"
+
+    def __init__(self, blocks: Sequence[np.ndarray]):
+        self.blocks = [np.asarray(b) for b in blocks]
+        self._cuts = np.cumsum([b.shape[1] for b in self.blocks])[:-1]
+        self.shape = (sum(b.shape[0] for b in self.blocks),
+                      sum(b.shape[1] for b in self.blocks))
+
+    def apply(self, x):
+        parts = np.split(x, self._cuts, axis=0)
+        return np.concatenate([b @ p for b, p in zip(self.blocks, parts)], axis=0)
+
+    def inverse(self):
+        return BlockDiagOp([np.linalg.inv(b) for b in self.blocks])
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self.blocks)
+
+
+class IdentityOp(EdgeOp):
+    kind = "identity"
+
+    def __init__(self, dim: int):
+        self.shape = (int(dim),) * 2
+
+    def apply(self, x):
+        return x
+
+    def inverse(self):
+        return self
+
+
+Edge = Union[np.ndarray, EdgeOp]
+
+
+# ---------------------------------------------------------------------------
+# Helpers accepting either a dense array or an EdgeOp
+# ---------------------------------------------------------------------------
+def apply(M: Edge, x: np.ndarray) -> np.ndarray:
+    """M·x without caring whether M is a dense matrix or a structured op."""
+    return M.apply(x) if isinstance(M, EdgeOp) else M @ x
+
+
+def invert(M: Edge) -> Edge:
+    """
+    Inverse in the same representation (raises LinAlgError if singular).
+    Rectangular edges – projections between spaces of different dimension –
+    get the dense Moore–Penrose pseudo‑inverse.
+    """
+    if M.shape[0] != M.shape[1]:
+        return np.linalg.pinv(to_dense(M))
+    return M.inverse() if isinstance(M, EdgeOp) else np.linalg.inv(M)
+
+
+def solve(M: Edge, y: np.ndarray) -> np.ndarray:
+    """x with M·x = y – walks an edge backwards without forming M⁻¹ densely
+    (least squares for rectangular edges)."""
+    if M.shape[0] != M.shape[1]:
+        return np.linalg.lstsq(to_dense(M), y, rcond=None)[0]
+    return M.inverse().apply(y) if isinstance(M, EdgeOp) else np.linalg.solve(M, y)
+
+
+def to_dense(M: Edge) -> np.ndarray:
+    return M.dense() if isinstance(M, EdgeOp) else np.asarray(M)
+
+
+# ---------------------------------------------------------------------------
+# Content‑addressed interning
+# ---------------------------------------------------------------------------
+def tag(M: Edge) -> Edge:
+    """Recognise dense identity / permutation matrices as IdentityOp /
+    PermutationOp, so applying them skips the multiply; else return M."""
+    if not isinstance(M, np.ndarray) or M.ndim != 2 or M.shape[0] != M.shape[1]:
+        return M
+    d = M.shape[0]
+    if np.count_nonzero(M) != d or not np.all(M[M != 0] == 1):
+        return M
+    perm = np.argmax(M, axis=1)                  # column of the 1 in each row
+    if not np.all(M[np.arange(d), perm] == 1) or len(np.unique(perm)) != d:
+        return M
+    return IdentityOp(d) if np.all(perm == np.arange(d)) else PermutationOp(perm)
+
+
+class Interner:
+    """
+    Edge payload table keyed by content hash (shape, dtype, bytes):
+    identical matrices come back as one shared object, so they share one
+    buffer – and, in gerbe_core, one first‑hop product.  With `tag`,
+    identity / permutation matrices are stored as operators.  Operators
+    pass through untouched except IdentityOp, shared per dimension.
+    """
+
+    def __init__(self, tag: bool = True):
+        self.tag = tag
+        self.table: dict = {}
+        self.edges = self.bytes_in = 0
+
+    def __call__(self, M: Edge) -> Edge:
+        self.edges += 1
+        if isinstance(M, np.ndarray):
+            self.bytes_in += M.nbytes
+            h = hashlib.sha1(np.ascontiguousarray(M).data)
+            key = (M.shape, M.dtype.str, h.hexdigest())
+        elif isinstance(M, IdentityOp):
+            self.bytes_in += M.shape[0] ** 2 * 8     # the np.eye it replaces
+            key = ("identity", M.shape[0])
+        else:
+            self.bytes_in += M.nbytes
+            key = ("op", id(M))
+        if key not in self.table:
+            T = tag(M) if self.tag else M
+            if isinstance(T, IdentityOp):           # one IdentityOp per dimension
+                T = self.table.setdefault(("identity", T.shape[0]), T)
+            self.table[key] = T
+        return self.table[key]
+
+    def identity(self, dim: int) -> IdentityOp:
+        return self(IdentityOp(dim))
+
+    def stats(self) -> dict:
+        held = {id(M): M for M in self.table.values()}
+        unique = sum(M.nbytes for M in held.values())
+        return {"edges": self.edges, "unique_payloads": len(held),
+                "dedup_ratio": self.edges / len(held) if held else 1.0,
+                "bytes_saved": self.bytes_in - unique}
+
+
+# ---------------------------------------------------------------------------
+# YAML → operator
+# ---------------------------------------------------------------------------
+def from_spec(spec: dict, load: Callable[[str], np.ndarray] = np.load) -> EdgeOp:
+    """
+    Build an operator from the `op:` block of a contexts.yaml edge.
+
+    `load` turns an artefact path into an array (np.load by default).
+    Raises ValueError for an unknown `kind`; missing files propagate
+    the loader's OSError.
+    """
+    kind = spec.get("kind", "dense")
+    if kind == "dense":
+        return DenseOp(load(spec["matrix"]))
+    if kind == "diagonal":
+        if "diag" in spec:
+            return DiagonalOp(load(spec["diag"]))
+        return DiagonalOp(np.full(int(spec["dim"]), float(spec["scale"])))
+    if kind == "permutation":
+        return PermutationOp(load(spec["perm"]))
+    if kind == "lowrank":
+        return LowRankOp(load(spec["A"]), load(spec["B"]))
+    if kind == "blockdiag":
+        return BlockDiagOp([load(p) for p in spec["blocks"]])
+    if kind == "identity":
+        return IdentityOp(spec["dim"])
+    raise ValueError(f"Unknown edge operator kind: {kind!r}")
@@ -0,0 +1,112 @@
+"""
+gerbe_profile.py
+----------------
+Opt‑in phase timers and counters for gerbe_core and its front‑ends.
+
+    from gerbe_profile import PROFILER as prof
+
+    with prof.phase("enumeration"):
+        tris = list(...)
+    prof.count("triangles", len(tris))
+
+    prof.enable(trace=True)      # e.g. from a --profile flag
+    ...
+    print(prof.report())
+    prof.export_trace("gerbe.trace.json")   # chrome://tracing / Perfetto
+
+Disabled (the default) `phase()` hands back one shared no‑op context
+manager and `count()` / `add()` return at once; hot loops additionally
+guard on `prof.enabled` so the disabled path runs no timing code at all.
+Coarse phases become trace events; per‑item timings inside loops are
+only aggregated via `add()`, so a trace stays small.
+"""
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+_NULL = nullcontext()
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.trace = False
+        self.reset()
+
+    def reset(self):
+        self.totals: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+        self.counters: dict[str, int] = defaultdict(int)
+        self.events: list[dict] = []
+        self._t0 = time.perf_counter()
+
+    def enable(self, trace: bool = False):
+        self.enabled, self.trace = True, trace
+        self.reset()
+
+    def disable(self):
+        self.enabled = self.trace = False
+
+    # -- recording ---------------------------------------------------------
+    def phase(self, name: str):
+        return self._phase(name) if self.enabled else _NULL
+
+    @contextmanager
+    def _phase(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t
+            self.totals[name] += dt
+            self.calls[name] += 1
+            if self.trace:
+                self.events.append({
+                    "name": name, "ph": "X", "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "ts": (t - self._t0) * 1e6, "dur": dt * 1e6,
+                })
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        """Fold an externally measured duration into `name` (no trace event)."""
+        if self.enabled:
+            self.totals[name] += seconds
+            self.calls[name] += calls
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] += n
+
+    # -- output --------------------------------------------------------------
+    def as_dict(self) -> dict:
+        return {
+            "phases": {k: {"seconds": round(v, 6), "calls": self.calls[k]}
+                       for k, v in self.totals.items()},
+            "counters": dict(self.counters),
+        }
+
+    def report(self) -> str:
+        if not self.totals and not self.counters:
+            return "(profiler: nothing recorded)"
+        width = max(map(len, [*self.totals, *self.counters, "phase"]))
+        lines = [f"{'phase':<{width}}  {'seconds':>10}  {'calls':>9}"]
+        for k, v in sorted(self.totals.items(), key=lambda kv: -kv[1]):
+            lines.append(f"{k:<{width}}  {v:>10.4f}  {self.calls[k]:>9,}")
+        for k, v in sorted(self.counters.items()):
+            lines.append(f"{k:<{width}}  {v:>10,}")
+        return "\n".join(lines)
+
+    def export_trace(self, path: str):
+        """Chrome trace‑event JSON; aggregated phases go in as metadata."""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events,
+                       "displayTimeUnit": "ms",
+                       "otherData": self.as_dict()}, f)
+
+
+PROFILER = Profiler()
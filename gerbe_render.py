@@ -0,0 +1,133 @@
+"""
+gerbe_render.py
+---------------
+Provenance‑graph rendering that stays usable past a few hundred nodes.
+
+• Layouts are cached by topology hash – in memory and under
+  .gerbe_cache/layouts/ – so re‑rendering the same graph skips layout.
+• Spring layout for small graphs; beyond LARGE_GRAPH nodes a spectral
+  layout (circular if SciPy is missing) replaces the O(n²) spring model.
+• Graphs bigger than `full_limit` are cut down to the failing simplices
+  plus their `hops`‑hop context.
+• Edge labels are drawn only on highlighted edges (failing simplices and
+  bad inverses).
+
+`render()` returns {"layout_s", "render_s", "nodes"} so callers can report
+layout and drawing time separately.
+"""
+
+from __future__ import annotations
+import time
+from pathlib import Path
+from typing import Iterable, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+
+from gerbe_core import ego_nodes, topology_hash
+
+LAYOUT_DIR  = Path(".gerbe_cache") / "layouts"
+LARGE_GRAPH = 300
+_LAYOUTS: dict[str, dict] = {}
+
+Mark = Tuple[Sequence[str], str, str]          # (simplex, symbol, colour)
+
+
+def cached_layout(G: nx.Graph, seed: int = 7) -> dict:
+    """Node → (x, y), memoised by topology hash (memory, then disk)."""
+    key = f"{topology_hash(G.nodes, G.edges)}-{seed}"
+    if key in _LAYOUTS:
+        return _LAYOUTS[key]
+    path = LAYOUT_DIR / f"{key}.npz"
+    if path.exists():
+        z = np.load(path)
+        pos = dict(zip(z["nodes"].tolist(), z["xy"]))
+        if set(pos) == set(map(str, G.nodes)):
+            pos = {n: pos[str(n)] for n in G.nodes}
+            _LAYOUTS[key] = pos
+            return pos
+
+    if G.number_of_nodes() <= LARGE_GRAPH:
+        pos = nx.spring_layout(G, seed=seed)
+    else:
+        try:
+            pos = nx.spectral_layout(G)        # needs SciPy
+        except ImportError:
+            pos = nx.circular_layout(G)
+
+    LAYOUT_DIR.mkdir(parents=True, exist_ok=True)
+    np.savez(path, nodes=np.array([str(n) for n in pos]),
+             xy=np.array([pos[n] for n in pos]))
+    _LAYOUTS[key] = pos
+    return pos
+
+
+def render(
+    G: nx.Graph,
+    marks: Iterable[Mark] = (),
+    bad_edges: Iterable[Tuple[str, str]] = (),
+    hops: int = 1,
+    full_limit: int = 60,
+    title: str = "",
+    node_size: int = 1800,
+    seed: int = 7,
+    ax=None,
+    outfile: str | None = None,
+) -> dict:
+    """
+    Draw `G` with failing simplices marked and bad edges in red.
+
+    If `outfile` is given the figure is saved and closed; otherwise it is
+    left open on `ax` / the current figure for the caller to show or save.
+    """
+    marks = [(tuple(s), sym, col) for s, sym, col in marks]
+    bad_edges = set(map(tuple, bad_edges))
+    hot = {n for s, *_ in marks for n in s} | {n for e in bad_edges for n in e}
+
+    H = G
+    if G.number_of_nodes() > full_limit and hot:
+        H = G.subgraph(ego_nodes(G.to_undirected(as_view=True), hot, hops))
+
+    t0 = time.perf_counter()
+    pos = cached_layout(H, seed)
+    t1 = time.perf_counter()
+
+    small = H.number_of_nodes() <= full_limit
+    if ax is None:
+        _, ax = plt.subplots(figsize=(8, 6), constrained_layout=True)
+    nx.draw(
+        H, pos, ax=ax,
+        with_labels=small,
+        node_size=node_size if small else 60,
+        font_size=10,
+        edge_color=["red" if e in bad_edges else "black" for e in H.edges()],
+        width=2 if small else 0.5,
+    )
+    if not small:
+        nx.draw_networkx_labels(H, pos, labels={n: n for n in hot if n in H},
+                                font_size=8, ax=ax)
+
+    hot_edges = set(bad_edges)
+    for simplex, *_ in marks:
+        hot_edges.update((x, y) for x in simplex for y in simplex if x != y)
+    labels = {e: f"{e[0]}→{e[1]}" for e in H.edges() if e in hot_edges}
+    if labels:
+        nx.draw_networkx_edge_labels(H, pos, edge_labels=labels, font_size=7, ax=ax)
+
+    for simplex, symbol, color in marks:
+        if not all(n in pos for n in simplex):
+            continue
+        xs = [pos[n][0] for n in simplex]
+        ys = [pos[n][1] for n in simplex]
+        ax.text(sum(xs) / len(xs), sum(ys) / len(ys), symbol,
+                fontsize=20, ha="center", va="center", color=color)
+
+    if title:
+        ax.set_title(title)
+    ax.set_axis_off()
+    if outfile:
+        ax.figure.savefig(outfile, dpi=150)
+        plt.close(ax.figure)
+    t2 = time.perf_counter()
+    return {"layout_s": t1 - t0, "render_s": t2 - t1, "nodes": H.number_of_nodes()}
@@ -0,0 +1,114 @@
+"""
+gerbe_report.py
+---------------
+Streaming report writer – memory stays O(1) in the number of obstructions.
+
+    with ReportWriter(REPORT_DIR / "2025-06-01_1200", meta={...}, png=png) as rw:
+        for combo in emb_bad:
+            rw.write("embedding", combo)
+
+Produces, next to each other:
+
+  <stem>.jsonl  one JSON object per line:
+                  {"type": "meta", ...}                       first line
+                  {"type": "obstruction", "kind": k, "simplex": [...]}
+                  {"type": "summary", "total": n, "counts": {k: n}}  last line
+  <stem>.html   small page that embeds only the summary and streams rows
+                from the .jsonl in batches (the PNG is linked, not inlined).
+
+Browsers refuse fetch() on file:// URLs, so open the HTML through a local
+server, e.g. `python -m http.server -d reports`.
+"""
+
+from __future__ import annotations
+import html
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+_PAGE = """<html><head><meta charset="utf-8"><title>Gerbe Report {title}</title>
+<style>
+  body{{font-family:Arial, sans-serif;}}
+  img{{max-width:100%;border:1px solid #888;}}
+  table{{border-collapse:collapse;}} td,th{{border:1px solid #ccc;padding:2px 8px;}}
+</style></head><body>
+<h2>Gerbe AI Consistency Report — {title}</h2>
+{img}
+<h3>Summary</h3>
+<pre>{summary}</pre>
+<h3>Obstructions <small id="status">loading…</small></h3>
+<table><thead><tr><th>#</th><th>kind</th><th>simplex</th></tr></thead>
+<tbody id="rows"></tbody></table>
+<script>
+(async () => {{
+  const tbody = document.getElementById("rows"), status = document.getElementById("status");
+  let n = 0, buf = "", batch = [];
+  const flush = () => {{ tbody.insertAdjacentHTML("beforeend", batch.join("")); batch = []; }};
+  const esc = s => String(s).replace(/[&<>]/g, c => ({{"&":"&amp;","<":"&lt;",">":"&gt;"}})[c]);
+  try {{
+    const reader = (await fetch({jsonl})).body.pipeThrough(new TextDecoderStream()).getReader();
+    for (;;) {{
+      const {{value, done}} = await reader.read();
+      if (done) break;
+      const lines = (buf + value).split("\\n"); buf = lines.pop();
+      for (const line of lines) {{
+        if (!line) continue;
+        const r = JSON.parse(line);
+        if (r.type !== "obstruction") continue;
+        batch.push(`<tr><td>${{++n}}</td><td>${{esc(r.kind)}}</td><td>${{esc(r.simplex.join(" → "))}}</td></tr>`);
+        if (batch.length >= 500) {{ flush(); status.textContent = `${{n}} loaded…`;
+                                     await new Promise(requestAnimationFrame); }}
+      }}
+    }}
+    flush(); status.textContent = `${{n}} rows`;
+  }} catch (e) {{
+    status.textContent = "cannot stream rows over file:// – serve this folder (python -m http.server)";
+  }}
+}})();
+</script>
+</body></html>
+"""
+
+
+class ReportWriter:
+    """Append obstructions one line at a time; summary computed on the fly."""
+
+    def __init__(self, stem: Path, meta: dict | None = None, png: Path | None = None):
+        self.stem = Path(stem)
+        self.jsonl_path = self.stem.with_suffix(".jsonl")
+        self.html_path = self.stem.with_suffix(".html")
+        self.png = png
+        self.counts: Counter = Counter()
+        self._f = self.jsonl_path.open("w", encoding="utf-8")
+        self._line({"type": "meta", **(meta or {})})
+
+    def _line(self, obj: dict):
+        self._f.write(json.dumps(obj, default=str) + "\n")
+
+    def write(self, kind: str, simplex: Iterable, **extra):
+        self.counts[kind] += 1
+        self._line({"type": "obstruction", "kind": kind, "simplex": list(simplex), **extra})
+
+    def write_many(self, kind: str, simplices: Iterable[Iterable]):
+        for s in simplices:
+            self.write(kind, s)
+
+    def close(self) -> dict:
+        summary = {"total": sum(self.counts.values()), "counts": dict(self.counts)}
+        self._line({"type": "summary", **summary})
+        self._f.close()
+        img = f"<img src='{html.escape(Path(self.png).name)}'/>" if self.png else ""
+        self.html_path.write_text(_PAGE.format(
+            title=html.escape(self.stem.name),
+            img=img,
+            summary=html.escape(json.dumps(summary, indent=2)),
+            jsonl=json.dumps(self.jsonl_path.name),
+        ), encoding="utf-8")
+        return summary
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -10,64 +10,682 @@ Example:
 
     # block PR if any global inconsistency
     python gerbe_validate.py --config contexts.yaml --mode block --tolerance 0.30
+
+    # also audit every (a,b)/(b,a) pair loaded from `inverse:` files
+    python gerbe_validate.py --config contexts.yaml --check-inverses
+
+    # edge matrices larger than RAM: mmap + block‑triple schedule
+    python gerbe_validate.py --config contexts.yaml --memory-budget 2G
+
+    # probe with real embeddings: nodes carry `corpus: emb/EN.npy`
+    python gerbe_validate.py --config contexts.yaml --engine corpus --memory-budget 256M
+
+    # PR gate: only obstructions this branch introduces relative to main
+    python gerbe_validate.py --config contexts.yaml --base origin/main --mode block
+
+    # keep a run history; then e.g. `python gerbe_history.py edges --since 30d`
+    python gerbe_validate.py --config contexts.yaml --history
+
+    # where does the time go? (phase table on stderr, trace for Perfetto)
+    python gerbe_validate.py --config contexts.yaml --profile gerbe.trace.json
+
+    # unchanged config + artefacts reuse the last verdict (.gerbe_cache/),
+    # contexts.yaml is compiled once per content hash and the triangle set
+    # once per topology; --paranoid re‑hashes every artefact, --no-cache
+    # bypasses all of it
+    python gerbe_validate.py --config contexts.yaml --paranoid
 """
 
-import argparse, sys, yaml, json
-import numpy as np, pathlib, warnings  # Added imports
-from gerbe_core import check_triangles   # <- you already have this function
+import argparse, atexit, hashlib, io, os, subprocess, sys, time, yaml, json
+import numpy as np, networkx as nx, pathlib, warnings  # Added imports
+import gerbe_core, gerbe_index, gerbe_ops
+from gerbe_core import (check_triangles, check_cocycle, check_batched, check_gemm,
+                        check_corpus, blame_edges, sample_triangles, check_inverses)
+from gerbe_ops import from_spec, invert, Interner
+from gerbe_index import (ArtifactIndex, run_key, load_result, store_result,
+                         load_triangle_index)
+from gerbe_history import HISTORY_PATH, record_run
+from gerbe_profile import PROFILER as prof
+
+CONFIG_DIR   = pathlib.Path(".gerbe_cache") / "config"
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)   # libyaml when built in
+_EDGE_PATHS  = ("matrix", "inverse", "patch")
+
+def load_contexts(path, cache_dir=CONFIG_DIR, stats=None):
+    """Parsed contexts.yaml, via its compiled form when one exists.
+
+    The compiled form (`cache_dir`/<sha256 of the YAML>.npz) holds the
+    interned context ids, an int32 edge table and the artefact path
+    table; anything else rides along as one JSON blob.  The YAML is only
+    parsed – with libyaml if available – when its hash has no entry.
+    `stats`, if given, receives yaml_parse_s and config_cache_hit.
+    """
+    raw = pathlib.Path(path).read_bytes()
+    blob = cache_dir and pathlib.Path(cache_dir, hashlib.sha256(raw).hexdigest() + ".npz")
+    cfg, parse_s = None, 0.0
+    if blob and blob.exists():
+        try:
+            with np.load(blob) as z:
+                cfg = decompile_config(z)
+        except (OSError, ValueError, KeyError):
+            cfg = None                                   # stale / corrupt → re‑parse
+    hit = cfg is not None
+    if cfg is None:
+        t = time.perf_counter()
+        cfg = yaml.load(raw, Loader=_YAML_LOADER)
+        parse_s = time.perf_counter() - t
+        if blob:
+            try:
+                arrays = compile_config(cfg)
+            except (TypeError, KeyError, ValueError, AttributeError):
+                arrays = None                            # not representable – parse next time too
+            if arrays:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                tmp = blob.with_suffix(".tmp.npz")
+                np.savez(tmp, **arrays)
+                os.replace(tmp, blob)
+    if stats is not None:
+        stats.update(yaml_parse_s=parse_s, config_cache_hit=int(hit))
+    return cfg
 
-def load_contexts(path):
-    with open(path, "r") as f:
-        return yaml.safe_load(f)
+def _pack(strings):                     # str list → one NUL‑separated utf‑8 buffer
+    return np.frombuffer("\0".join(strings).encode(), dtype=np.uint8)
+
+def _unpack(buf):
+    return buf.tobytes().decode().split("\0") if buf.size else []
+
+def compile_config(cfg):
+    """Config dict → arrays for np.savez; raises if ids are not plain strings."""
+    ids, index = [], {}
+    def intern(c):
+        if not isinstance(c, str) or not c or "\0" in c:
+            raise TypeError(f"context id {c!r} is not a plain string")
+        return index.setdefault(c, len(index))
+
+    node_extra = {}
+    for i, node in enumerate(cfg["nodes"]):
+        if isinstance(node, dict):
+            node_extra[i] = {k: v for k, v in node.items() if k != "id"}
+            node = node["id"]
+        if intern(node) != i:
+            raise ValueError(f"duplicate context {node!r}")
+    n_nodes = len(index)
+
+    edges = cfg["edges"]
+    table = np.empty((len(edges), 2), dtype=np.int32)
+    where = np.full((len(edges), len(_EDGE_PATHS)), -1, dtype=np.int32)
+    paths, edge_extra = {}, {}
+    for i, e in enumerate(edges):
+        table[i] = intern(e["src"]), intern(e["dst"])
+        for j, k in enumerate(_EDGE_PATHS):
+            p = e.get(k)
+            if p is not None:
+                if not isinstance(p, str) or not p or "\0" in p:
+                    raise TypeError(f"{k} path {p!r} is not a plain string")
+                where[i, j] = paths.setdefault(p, len(paths))
+        # an explicit `matrix: null` is kept as extra so the key survives
+        rest = {k: v for k, v in e.items()
+                if k not in ("src", "dst") and not (k in _EDGE_PATHS and v is not None)}
+        if rest:
+            edge_extra[i] = rest
+
+    top = {k: v for k, v in cfg.items() if k not in ("nodes", "edges")}
+    extra = json.dumps({"top": top, "nodes": node_extra, "edges": edge_extra})
+    return {"ids": _pack(index), "n_nodes": np.int32(n_nodes),
+            "edges": table, "edge_paths": where, "paths": _pack(paths),
+            "extra": np.frombuffer(extra.encode(), dtype=np.uint8)}
+
+def decompile_config(z):
+    """Inverse of compile_config: the dict yaml.safe_load would have given."""
+    ids, paths = _unpack(z["ids"]), _unpack(z["paths"])
+    extra = json.loads(z["extra"].tobytes())
+    node_x, edge_x = extra["nodes"], extra["edges"]
+    nodes = [{"id": ids[i], **node_x[str(i)]} if str(i) in node_x else ids[i]
+             for i in range(int(z["n_nodes"]))]
+    edges = []
+    for i, ((a, b), where) in enumerate(zip(z["edges"].tolist(), z["edge_paths"].tolist())):
+        e = {"src": ids[a], "dst": ids[b]}
+        for k, j in zip(_EDGE_PATHS, where):
+            if j >= 0:
+                e[k] = paths[j]
+        e.update(edge_x.get(str(i), ()))
+        edges.append(e)
+    return {**extra["top"], "nodes": nodes, "edges": edges}
 
 # Added helper function
-def config_to_runtime(cfg):
-    """Turn YAML config into the dict expected by check_triangles()."""
-    mats, patches = {}, {}
+def config_to_runtime(cfg, base_dir=None, stats=None, mmap=False, read=None, blobs=None):
+    """Turn YAML config into the dict expected by check_triangles().
+
+    Relative artefact paths resolve against `base_dir` (default: CWD),
+    e.g. the folder an uploaded bundle was unpacked into.  `stats`, if
+    given, receives edges_loaded / bytes_read counters plus
+    unique_payloads / dedup_ratio / bytes_saved.
+    With `mmap`, .npy artefacts are memory‑mapped instead of read, so
+    bytes_read only counts what the checker later pulls in.  `read`
+    (path → bytes, or None when missing) replaces the filesystem, e.g.
+    with blobs from a git revision.  `blobs` ({resolved path: bytes}, e.g.
+    ArtifactIndex.blobs) supplies files already read for hashing; entries
+    are consumed as they are decoded.
+
+    Payloads are interned: a path is loaded once however many edges use
+    it, identical contents share one array (not under `mmap`, where
+    hashing would read everything), and identity / permutation matrices
+    – including the placeholders for missing ones – become operators.
+    """
+    counters = {"edges_loaded": 0, "bytes_read": 0}
+    intern, by_path, inverses = Interner(), {}, {}
+
+    def resolve(p):
+        return pathlib.Path(base_dir, p) if (p and base_dir) else (pathlib.Path(p) if p else None)
+
+    def exists(p):
+        return p.exists() if read is None else read(p) is not None
+
+    def load(p):
+        p = resolve(p) if not isinstance(p, pathlib.Path) else p
+        key = p.resolve()
+        if key not in by_path:
+            data = read(p) if read is not None else (blobs or {}).pop(key, None)
+            if read is not None and data is None:
+                raise FileNotFoundError(p)
+            if data is not None:
+                counters["bytes_read"] += len(data)
+                by_path[key] = np.load(io.BytesIO(data))
+            elif mmap:
+                by_path[key] = np.load(p, mmap_mode="r")
+            else:
+                counters["bytes_read"] += p.stat().st_size
+                by_path[key] = np.load(p)
+        return by_path[key]
+
+    def share(M):
+        return M if isinstance(M, np.memmap) else intern(M)
+
+    # nodes are plain names or {id, dim, corpus}; a top‑level `dim:` is the
+    # default.  Only declared dims are enforced – undeclared contexts keep
+    # the old 64.  Corpora stay paths; check_corpus memory‑maps them.
+    default_dim = int(cfg.get("dim", 64))
+    contexts, dims, corpora = [], {}, {}
+    for node in cfg["nodes"]:
+        name = node["id"] if isinstance(node, dict) else node
+        contexts.append(name)
+        if isinstance(node, dict) and "dim" in node:
+            dims[name] = int(node["dim"])
+        elif "dim" in cfg:
+            dims[name] = default_dim
+        corpus = resolve(node.get("corpus")) if isinstance(node, dict) else None
+        if corpus and read is None:
+            if corpus.exists():
+                corpora[name] = corpus
+            else:
+                warnings.warn(f"No corpus for {name} at {corpus}; probing with e₀")
+
+    def dim(c):
+        return dims.get(c, default_dim)
+
+    def eye(a, b):                     # identity‑like placeholder for a→b
+        if dim(a) == dim(b):
+            return intern.identity(dim(a))
+        return share(np.eye(dim(b), dim(a)))
+
+    mats, patches, bad_shapes = {}, {}, []
     for edge in cfg["edges"]:
         a, b = edge["src"], edge["dst"]
 
-        # load numeric matrix if path exists; else identity
-        mat_path = edge.get("matrix")
-        if mat_path and pathlib.Path(mat_path).exists():
-            mats[(a, b)] = np.load(mat_path)
+        # load numeric matrix / structured operator if present; else identity
+        mat_path = resolve(edge.get("matrix"))
+        op_spec  = edge.get("op")
+        if op_spec:
+            try:
+                mats[(a, b)] = from_spec(op_spec, load=load)
+            except (OSError, KeyError, ValueError) as e:
+                warnings.warn(f"Bad operator for {a}->{b} ({e}); using identity")
+                mats[(a, b)] = eye(a, b)
+        elif mat_path and exists(mat_path):
+            mats[(a, b)] = share(load(mat_path))
         else:
             warnings.warn(f"No matrix for {a}->{b}; using identity")
-            mats[(a, b)] = np.eye(64) # Assuming identity size, adjust if needed
+            mats[(a, b)] = eye(a, b)
 
         # inverse matrix
-        inv_path = edge.get("inverse")
-        if inv_path and pathlib.Path(inv_path).exists():
-            mats[(b, a)] = np.load(inv_path)
+        inv_path = resolve(edge.get("inverse"))
+        if inv_path and exists(inv_path):
+            mats[(b, a)] = share(load(inv_path))
+        elif mats[(a, b)].shape[0] != mats[(a, b)].shape[1]:
+             pass  # a projection between dims has no inverse edge unless given
         elif (a,b) in mats: # Check if forward matrix was loaded or created
              try:
-                 mats[(b, a)] = np.linalg.inv(mats[(a, b)])
+                 fwd = mats[(a, b)]       # one inversion per distinct payload
+                 if id(fwd) not in inverses:
+                     inverses[id(fwd)] = share(invert(fwd))  # structured ops stay structured
+                 mats[(b, a)] = inverses[id(fwd)]
              except np.linalg.LinAlgError:
                  warnings.warn(f"Matrix for {a}->{b} is singular; cannot compute inverse.")
                  # Decide on fallback? Using identity for now.
-                 mats[(b, a)] = np.eye(64) # Assuming identity size
+                 mats[(b, a)] = eye(b, a)
         else:
              # If neither forward nor inverse exists, create identity for inverse too
              warnings.warn(f"No inverse matrix for {b}->{a}; using identity")
-             mats[(b, a)] = np.eye(64) # Assuming identity size
+             mats[(b, a)] = eye(b, a)
+
+        # every edge maps dim(src) → dim(dst): shape must be (d_dst, d_src)
+        for x, y in ((a, b), (b, a)):
+            if (x, y) in mats and x in dims and y in dims and tuple(mats[(x, y)].shape) != (dims[y], dims[x]):
+                bad_shapes.append(f"{x}->{y}: shape {tuple(mats[(x, y)].shape)}, "
+                                  f"expected {(dim(y), dim(x))}")
 
         # policy patch (optional JSON)
-        patch_path = edge.get("patch")
-        if patch_path and pathlib.Path(patch_path).exists():
-            with open(patch_path, 'r') as f: # Ensure file is closed
-                 patches[(a, b)] = json.load(f)
+        patch_path = resolve(edge.get("patch"))
+        if patch_path and exists(patch_path):
+            if read is not None:
+                data = read(patch_path)
+                counters["bytes_read"] += len(data)
+                patches[(a, b)] = json.loads(data)
+            else:
+                counters["bytes_read"] += patch_path.stat().st_size
+                with open(patch_path, 'r') as f: # Ensure file is closed
+                     patches[(a, b)] = json.load(f)
             # Assuming patches are symmetric or handle asymmetry if needed
             # patches[(b, a)] = patches[(a, b)].copy() # Re-evaluate if this is correct logic
 
+    if bad_shapes:
+        raise ValueError("Edge shapes do not match context dims:\n  " + "\n  ".join(bad_shapes))
+
+    counters["edges_loaded"] = len(mats)
+    dedup = intern.stats()
+    counters.update(unique_payloads=dedup["unique_payloads"],
+                    dedup_ratio=round(len(mats) / max(dedup["unique_payloads"], 1), 3),
+                    bytes_saved=dedup["bytes_saved"])
+    if stats is not None:
+        stats.update(counters)
+
     return {
-        "contexts": cfg["nodes"],
+        "contexts": contexts,
         "mats": mats,
         "patches": patches,
-        "base_vec": np.eye(64)[0]          # = [1,0,0,…]
+        "dims": dims,
+        "corpora": corpora,
+        "base_vec": np.eye(default_dim)[0]  # = [1,0,0,…]; other dims get their own e₀
         # for even stronger coverage you can use:
         # "base_vec": np.random.default_rng(42).normal(size=64)
     }
 
+def artifact_paths(cfg, base_dir=None):
+    """Every artefact file the edges and nodes of `cfg` refer to (corpora
+    included), whether or not it exists."""
+    out = [pathlib.Path(base_dir, n["corpus"]) if base_dir else pathlib.Path(n["corpus"])
+           for n in cfg.get("nodes", ()) if isinstance(n, dict) and n.get("corpus")]
+    for edge in cfg["edges"]:
+        spec = edge.get("op") or {}
+        refs = [edge.get("matrix"), edge.get("inverse"), edge.get("patch"),
+                *(spec.get(k) for k in ("matrix", "diag", "perm", "A", "B")),
+                *spec.get("blocks", [])]
+        out += [pathlib.Path(base_dir, p) if base_dir else pathlib.Path(p)
+                for p in refs if p]
+    return out
+
+# ---------------------------------------------------------------------------
+# Structured output (--format json|sarif|junit)
+# ---------------------------------------------------------------------------
+def _issue_dicts(results):
+    return [{"edge" if kind == "inverse" else "triangle": list(tri), "kind": kind}
+            for tri, kind in results]
+
+def emit_json(results, report):
+    return json.dumps({**report, "issues": _issue_dicts(results)}, indent=2, default=str)
+
+def emit_sarif(results, report):
+    """SARIF 2.1.0 – one result per failing triangle, located at the config."""
+    level = "error" if report["mode"] == "block" else "warning"
+    rules = [{"id": f"gerbe/{k}", "shortDescription":
+              {"text": f"{k} composition mismatch around a triangle"}}
+             for k in ("numeric", "policy")]
+    rules.append({"id": "gerbe/inverse", "shortDescription":
+                  {"text": "stored inverse does not undo its edge"}})
+    out = [{
+        "ruleId": f"gerbe/{kind}",
+        "level": level,
+        "message": {"text": f"{' → '.join(map(str, tri))}: paths disagree ({kind})"},
+        "locations": [{"physicalLocation": {"artifactLocation": {"uri": report["config"]}}}],
+        "properties": {"triangle": list(tri)},
+    } for tri, kind in results]
+    return json.dumps({
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{
+            "tool": {"driver": {"name": "gerbe", "rules": rules}},
+            "results": out,
+            "properties": {k: report[k] for k in ("timing", "counters", "tolerance", "engine")},
+        }],
+    }, indent=2, default=str)
+
+def emit_junit(results, report):
+    """JUnit XML – one failing testcase per issue (or one passing gate case)."""
+    import xml.etree.ElementTree as ET
+    suite = ET.Element("testsuite", name="gerbe", tests=str(max(1, len(results))),
+                       failures=str(len(results)),
+                       time=f"{sum(report['timing'].values()):.6f}")
+    props = ET.SubElement(suite, "properties")
+    for group in ("timing", "counters"):
+        for k, v in report[group].items():
+            ET.SubElement(props, "property", name=f"{group}.{k}", value=str(v))
+    for tri, kind in results:
+        case = ET.SubElement(suite, "testcase", classname=f"gerbe.{kind}",
+                             name=" → ".join(map(str, tri)))
+        ET.SubElement(case, "failure", type=kind,
+                      message=f"paths disagree beyond tolerance {report['tolerance']}")
+    if not results:
+        ET.SubElement(suite, "testcase", classname="gerbe", name="gate")
+    return ET.tostring(suite, encoding="unicode", xml_declaration=True)
+
+EMITTERS = {"json": emit_json, "sarif": emit_sarif, "junit": emit_junit}
+
+# ---------------------------------------------------------------------------
+# Differential gate (--base REV)
+# ---------------------------------------------------------------------------
+def _git(*args):
+    return subprocess.run(["git", *args], check=True, capture_output=True).stdout
+
+class GitRevision:
+    """Files of one commit, read through a single `git cat-file --batch`;
+    use as a context manager (or call close()) to end that process."""
+
+    def __init__(self, rev):
+        self.rev = _git("rev-parse", "--verify", f"{rev}^{{commit}}").decode().strip()
+        self.prefix = _git("rev-parse", "--show-prefix").decode().strip()
+        self._cat, self._blobs = None, {}
+
+    def close(self):
+        """End the cat-file process (if one was started) and reap it."""
+        if self._cat is not None:
+            self._cat.stdin.close()
+            self._cat.stdout.close()
+            self._cat.wait()
+            self._cat = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def name(self, path):
+        """Repo‑root path of a CWD‑relative path (None if outside the repo)."""
+        full = os.path.normpath(os.path.join(self.prefix, os.path.relpath(path)))
+        return None if full.startswith("..") else pathlib.PurePath(full).as_posix()
+
+    def read(self, path):
+        key = self.name(path)
+        if key is None:
+            return None
+        if key not in self._blobs:
+            if self._cat is None:
+                self._cat = subprocess.Popen(["git", "cat-file", "--batch"],
+                                             stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self._cat.stdin.write(f"{self.rev}:{key}\n".encode())
+            self._cat.stdin.flush()
+            header = self._cat.stdout.readline().split()
+            data = None
+            if header[-1] != b"missing":
+                body = self._cat.stdout.read(int(header[2]))
+                self._cat.stdout.read(1)                 # trailing LF
+                data = body if header[1] == b"blob" else None
+            self._blobs[key] = data
+        return self._blobs[key]
+
+    def changed(self, paths):
+        """The `paths` whose work‑tree content differs from this revision."""
+        dirty = set(_git("diff", "--name-only", "--no-renames", "-z", self.rev, "--").split(b"\0"))
+        tracked = set(_git("ls-tree", "-r", "--name-only", "--full-name", "-z", self.rev).split(b"\0"))
+        out = set()
+        for p in paths:
+            key = self.name(p)
+            if key is None or key.encode() in dirty or key.encode() not in tracked:
+                out.add(p)
+        return out
+
+def _edge_sigs(cfg, changed):
+    """(src, dst) → (entry, its nodes, any artefact changed) for diffing configs."""
+    nodes = {(n["id"] if isinstance(n, dict) else n): n for n in cfg["nodes"]}
+    sigs = {}
+    for e in cfg["edges"]:
+        entry = {k: v for k, v in e.items() if k != "files"}
+        sigs[(e["src"], e["dst"])] = (
+            json.dumps(entry, sort_keys=True, default=str),
+            json.dumps([nodes.get(e["src"]), nodes.get(e["dst"]), cfg.get("dim")],
+                       sort_keys=True, default=str),
+            any(os.path.normpath(p) in changed for p in artifact_paths({"edges": [e]})))
+    return sigs
+
+def differential(cfg, runtime, rev, config_path, tol, stats=None):
+    """
+    Obstructions `runtime` (the work tree) gains or loses against `rev`.
+
+    Config and artefacts of the base come straight from git objects.  An
+    edge counts as changed when its config entry, its endpoint nodes or
+    any of its artefacts differ (`git diff`, so unchanged files are not
+    re‑read); everything else – data and verdicts – is shared, and only
+    triangles through a changed edge are checked, once per revision.
+
+    Returns {"new", "fixed", "preexisting"} issue lists; the last covers
+    re‑checked triangles only.  `stats` gets edges_changed,
+    triangles_checked and bytes_read (base artefacts pulled from git).
+    """
+    with GitRevision(rev) as repo:          # one cat-file process, reaped on exit
+        raw = repo.read(config_path)
+        if raw is None:
+            raise ValueError(f"{config_path} does not exist at {rev}")
+        base_cfg = yaml.load(raw, Loader=_YAML_LOADER)
+        paths = {os.path.normpath(p) for p in artifact_paths(cfg) + artifact_paths(base_cfg)}
+        changed = repo.changed(paths)
+        head_sig, base_sig = _edge_sigs(cfg, changed), _edge_sigs(base_cfg, changed)
+        touched = {k for k in head_sig.keys() | base_sig.keys()
+                   if head_sig.get(k) != base_sig.get(k) or head_sig[k][2]}
+
+        # base = work tree with the touched entries swapped for their base versions
+        base_stats = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            sub = config_to_runtime({**base_cfg, "edges": [e for e in base_cfg["edges"]
+                                                           if (e["src"], e["dst"]) in touched]},
+                                    stats=base_stats, read=repo.read)
+    # a derived reverse edge never overrides an untouched entry of its own
+    own = (head_sig.keys() | base_sig.keys()) - touched
+    drop = touched | {(b, a) for a, b in touched if (b, a) not in own}
+    def merge(head, sub):
+        out = {k: v for k, v in head.items() if k not in drop}
+        out.update((k, v) for k, v in sub.items() if k not in own)
+        return out
+    base = {**sub, "mats": merge(runtime["mats"], sub["mats"]),
+            "patches": merge(runtime["patches"], sub["patches"])}
+
+    head_stats, base_check = {}, {}
+    head_issues = check_triangles(runtime, tol=tol, edges=touched, stats=head_stats)
+    base_issues = check_triangles(base, tol=tol, edges=touched, stats=base_check)
+    H = {(frozenset(t), k): (t, k) for t, k in head_issues}
+    B = {(frozenset(t), k): (t, k) for t, k in base_issues}
+    if stats is not None:
+        stats.update(rev=repo.rev, edges_changed=len(touched),
+                     triangles_checked=head_stats["triangles_checked"]
+                                       + base_check["triangles_checked"],
+                     bytes_read=base_stats["bytes_read"])
+    return {"new": [i for k, i in H.items() if k not in B],
+            "fixed": [i for k, i in B.items() if k not in H],
+            "preexisting": [i for k, i in H.items() if k in B]}
+
+def _size(text):
+    """'512M' / '4G' / '1048576' → bytes (argparse type)."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def _dump_profile(trace_path):
+    # runs at exit so block‑mode sys.exit(1) still reports
+    print("\n" + prof.report(), file=sys.stderr)
+    if trace_path:
+        prof.export_trace(trace_path)
+        print(f"ℹ  trace written to {trace_path}", file=sys.stderr)
+
+def _load_runtime(args, graph_cfg, info, timing, counters, blobs=None):
+    t1 = time.perf_counter()
+    with prof.phase("artifact_io"):
+        try:
+            runtime = config_to_runtime(graph_cfg, stats=counters,
+                                        mmap=bool(args.memory_budget), blobs=blobs)
+        except ValueError as e:          # shape / dim mismatches in the config
+            sys.exit(f"❌  {e}")
+    timing["artifact_io"] = time.perf_counter() - t1
+    if counters["bytes_saved"]:
+        info(f"ℹ  {counters['edges_loaded']} edges share {counters['unique_payloads']} "
+             f"payloads (dedup ×{counters['dedup_ratio']}, "
+             f"{counters['bytes_saved']:,} bytes saved)")
+    return runtime
+
+def _attach_triangle_index(runtime, info, timing, counters):
+    # whole‑graph runs read triangles from .gerbe_cache/triangles/ instead
+    # of enumerating (seeds runs just count them); a changed topology
+    # patches the previous index
+    t = time.perf_counter()
+    tri_stats = {}
+    with prof.phase("triangle_index"):
+        runtime["triangle_index"] = load_triangle_index(nx.Graph(list(runtime["mats"])),
+                                                        stats=tri_stats)
+    timing["triangle_index"] = time.perf_counter() - t
+    counters["triangle_index_hit"] = int(tri_stats["triangle_index"] == "hit")
+    if tri_stats["triangle_index"] == "updated":
+        info(f"ℹ  Topology changed: triangle index patched "
+             f"(+{tri_stats['added']} / −{tri_stats['removed']} triangles)")
+
+def run_checks(args, runtime, tolerance, info, timing, counters):
+    """Run the selected engine (plus the inverse audit); returns the issue list."""
+    stats = {}
+    if args.sample_budget:
+        est = sample_triangles(runtime, tol=tolerance, budget=args.sample_budget,
+                               seconds=args.sample_seconds, ci=args.sample_ci,
+                               weighting=args.sample_weighting)
+        results = est["issues"]
+        timing["numeric_checks"] = est["seconds"]
+        counters["triangles_checked"] = est["samples"]
+        eff = (f", effective n {est['effective_samples']:,.0f}"
+               if args.sample_weighting == "degree" else "")
+        info(f"ℹ  Sampled {est['samples']} triangles{eff} in {est['seconds']:.2f}s: "
+             f"obstruction rate {est['rate']:.2%} "
+             f"(95% CI {est['ci_low']:.2%}–{est['ci_high']:.2%}, stopped on {est['stopped']})")
+    elif args.seeds is not None:
+        seeds = [tuple(t.split("->")) if "->" in t else t for t in args.seeds]
+        results = check_triangles(runtime, tol=tolerance, changed_files=args.changed,
+                                  seeds=seeds, radius=args.radius, stats=stats,
+                                  memory_budget=args.memory_budget)
+        seen = stats["triangles_enumerated"]
+        info(f"ℹ  Checked {seen} triangles within "
+             f"{args.radius} hops of {len(seeds)} seeds in {stats['seconds']:.3f}s")
+        if "triangles_skipped" in stats:     # whole‑graph count from the index
+            skipped, secs = stats["triangles_skipped"], stats["seconds"]
+            counters["triangles_skipped"] = skipped
+            # a full run pays the same setup, and checks at the same rate
+            full_s = secs + stats["check_s"] * skipped / seen if seen else None
+            info(f"ℹ  {skipped} triangles skipped; a full run checks {seen + skipped}"
+                 + (f", est. {full_s:.3f}s vs {secs:.3f}s here" if seen else ""))
+    else:
+        engine  = {"triangle": check_triangles, "batched": check_batched,
+                   "gemm": check_gemm, "cocycle": check_cocycle,
+                   "corpus": check_corpus}[args.engine]
+        extra   = {"memory_budget": args.memory_budget} if engine is check_triangles else {}
+        if engine is check_corpus:
+            extra = {"stat": args.corpus_stat, **({"memory_budget": args.memory_budget}
+                                                  if args.memory_budget else {})}
+        try:
+            results = engine(runtime, tol=tolerance,
+                             changed_files=args.changed, stats=stats, **extra)
+        except ValueError as e:          # corpus width ≠ edge input dim
+            if engine is not check_corpus:
+                raise
+            sys.exit(f"❌  {e}")
+        if engine is check_corpus:
+            counters.update(rows_streamed=stats["rows_streamed"],
+                            chunk_rows=stats["chunk_rows"])
+            info(f"ℹ  Streamed {stats['rows_streamed']:,} corpus rows "
+                 f"({len(runtime['corpora'])} corpora, chunks of ≤{stats['chunk_rows']:,})")
+
+    if args.check_inverses:
+        inv_stats = {}
+        inv_ok = check_inverses(runtime["mats"], tol=args.inverse_tol,
+                                pairs=True, stats=inv_stats)
+        results = results + [(e, "inverse") for e, ok in inv_ok.items() if not ok]
+        timing["inverse_checks"] = inv_stats["seconds"]
+        counters["inverse_pairs"] = inv_stats["edges"]
+        info(f"ℹ  Checked {inv_stats['edges']} inverse pairs "
+             f"({inv_stats['exact_fallbacks']} needed the exact product)")
+
+    timing["graph_build"] = stats.get("graph_build_s", 0.0)
+    timing["enumeration"] = stats.get("enumeration_s", stats.get("transport_s", 0.0))
+    timing.setdefault("numeric_checks", stats.get("check_s", 0.0))
+    if "cache_misses" in stats:          # out‑of‑core run
+        counters["bytes_read"] += stats["bytes_read"]
+        counters.update(edge_cache_hits=stats["cache_hits"],
+                        edge_cache_misses=stats["cache_misses"], blocks=stats["blocks"])
+        info(f"ℹ  Out‑of‑core: {stats['blocks']} blocks, {stats['bytes_read']:,} bytes "
+             f"read, edge cache hit rate {stats['hit_rate']:.1%}")
+    counters.setdefault("triangles_enumerated", stats.get("triangles_enumerated", 0))
+    counters.setdefault("triangles_checked",
+                        stats.get("triangles_checked", stats.get("edges_checked", 0)))
+    return results
+
+def _record_history(args, results, scope, tolerance, info, timing, counters, **meta):
+    run, timing["history"] = record_run(
+        args.history, "gerbe_validate", results, config=args.config, scope=scope,
+        meta={"mode": args.mode, "engine": args.engine, "tolerance": tolerance, **meta})
+    counters["history_run"] = run
+    info(f"ℹ  Recorded as run #{run} in {args.history}")
+
+def _run_differential(args, graph_cfg, tolerance, info, timing, counters):
+    runtime = _load_runtime(args, graph_cfg, info, timing, counters)
+    t = time.perf_counter()
+    diff_stats = {}
+    with prof.phase("differential"):
+        try:
+            diff = differential(graph_cfg, runtime, args.base, args.config, tolerance,
+                                stats=diff_stats)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            msg = e.stderr.decode().strip() if isinstance(e, subprocess.CalledProcessError) else e
+            sys.exit(f"❌  --base {args.base}: {msg}")
+    timing["numeric_checks"] = time.perf_counter() - t
+    counters.update(edges_changed=diff_stats["edges_changed"],
+                    triangles_checked=diff_stats["triangles_checked"],
+                    base_bytes_read=diff_stats["bytes_read"])
+    results = diff["new"]
+    info(f"ℹ  Against {args.base} ({diff_stats['rev'][:10]}): "
+         f"{diff_stats['edges_changed']} edges changed, "
+         f"{diff_stats['triangles_checked']} triangle checks across both revisions")
+    if args.history:
+        _record_history(args, diff["new"] + diff["preexisting"], "base", tolerance,
+                        info, timing, counters, base=diff_stats["rev"])
+
+    if args.format != "text":
+        report = {"tool": "gerbe", "config": args.config, "mode": args.mode,
+                  "engine": args.engine, "tolerance": tolerance, "ok": not results,
+                  "base": {"rev": diff_stats["rev"],
+                           "fixed": _issue_dicts(diff["fixed"]),
+                           "preexisting": _issue_dicts(diff["preexisting"])},
+                  "timing": {k: round(v, 6) for k, v in timing.items()},
+                  "counters": counters}
+        print(EMITTERS[args.format](results, report))
+    else:
+        for title, items in (("new", diff["new"]), ("fixed", diff["fixed"]),
+                             ("pre‑existing", diff["preexisting"])):
+            if items:
+                print(f"\n{'⚠ ' if title == 'new' else '  '} {len(items)} {title}:")
+                for tri, kind in items:
+                    print(f"   • {tri}   ({kind})")
+        if not results:
+            print("\n✅  Gerbe gate: no new inconsistencies")
+    if results and args.mode == "block":
+        sys.exit(1)
+    elif results and args.format == "text":
+        print("\n   (mode=warn – CI passes)")
+
 def main():
     ap = argparse.ArgumentParser(description="Gerbe consistency gate")
     ap.add_argument("--config", required=True,
@@ -78,17 +696,158 @@ def main():
                     help="Relative L2 tolerance for numeric checks")
     ap.add_argument("--changed", nargs="*",
                     help="Optional list of files changed (limits scope)")
+    ap.add_argument("--engine", choices=["triangle", "batched", "gemm", "cocycle", "corpus"],
+                    default="triangle",
+                    help="'triangle' checks every triangle; 'batched' does the same "
+                         "in per‑dimension batches (mixed‑dim graphs); 'gemm' applies "
+                         "each middle edge once to all its triangles (hub‑heavy "
+                         "graphs); 'cocycle' screens each edge once against a "
+                         "spanning‑tree transport (fast, but may miss obstructions "
+                         "the tree probe does not see); 'corpus' streams each node's "
+                         "`corpus:` embeddings (.npy) through its triangles")
+    ap.add_argument("--corpus-stat", choices=["mean", "p99", "max"], default="p99",
+                    help="With --engine corpus: relative‑error statistic held to "
+                         "the tolerance")
+    ap.add_argument("--blame", action="store_true",
+                    help="Print ranked suspect edges instead of every failing triangle")
+    ap.add_argument("--list-triangles", action="store_true",
+                    help="With --blame: also list the triangles behind each suspect")
+    ap.add_argument("--seeds", nargs="*",
+                    help="Only check near these contexts / edges ('A' or 'A->B')")
+    ap.add_argument("--radius", type=int, default=1,
+                    help="With --seeds: hop radius of the checked neighbourhood")
+    ap.add_argument("--sample-budget", type=int,
+                    help="Probabilistic mode: check at most N sampled triangles")
+    ap.add_argument("--sample-seconds", type=float,
+                    help="With --sample-budget: wall‑clock budget in seconds")
+    ap.add_argument("--sample-ci", type=float, default=0.01,
+                    help="With --sample-budget: stop once the 95%% CI half‑width ≤ this")
+    ap.add_argument("--sample-weighting", choices=["uniform", "degree"], default="uniform")
+    ap.add_argument("--format", choices=["text", "json", "sarif", "junit"], default="text",
+                    help="Output format; structured formats include per‑phase timing "
+                         "and counters (info lines then go to stderr)")
+    ap.add_argument("--check-inverses", action="store_true",
+                    help="Also check M_ba·M_ab ≈ I for every edge stored in both "
+                         "directions (batched probe test)")
+    ap.add_argument("--inverse-tol", type=float, default=1e-5,
+                    help="With --check-inverses: max |entry| of M_ba·M_ab − I")
+    ap.add_argument("--memory-budget", type=_size, metavar="BYTES",
+                    help="Out‑of‑core mode for the triangle engine and --seeds: memory‑map "
+                         "artefacts and keep at most this much edge data in RAM "
+                         "(e.g. 512M, 4G); with --engine corpus, sizes the "
+                         "streamed chunks (default 64M)")
+    ap.add_argument("--profile", nargs="?", const="", metavar="TRACE.json",
+                    help="Print a phase/counter profile to stderr; with a path, "
+                         "also write a Chrome trace (chrome://tracing, Perfetto)")
+    ap.add_argument("--base", metavar="REV",
+                    help="Differential gate: load config and artefacts of git "
+                         "revision REV, re‑check only triangles through changed "
+                         "edges and report new / fixed / pre‑existing obstructions "
+                         "('block' fails on new ones only)")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Always parse, load and check; skip the .gerbe_cache "
+                         "compiled config and result cache")
+    ap.add_argument("--paranoid", action="store_true",
+                    help="Re‑hash every artefact instead of trusting unchanged "
+                         "stat data (size, mtime, inode)")
+    ap.add_argument("--history", nargs="?", const=str(HISTORY_PATH), metavar="DB",
+                    help="Record this run in the SQLite run history (default "
+                         f"{HISTORY_PATH}); query it with gerbe_history.py")
     args = ap.parse_args()
+    if args.base and (args.sample_budget or args.seeds is not None or args.check_inverses
+                      or args.engine != "triangle"):
+        ap.error("--base does not combine with --sample-budget, --seeds, --check-inverses "
+                 "or a non-triangle --engine")
+    if args.memory_budget and (args.sample_budget or (
+            args.seeds is None and args.engine in ("batched", "gemm", "cocycle"))):
+        ap.error("--memory-budget only applies to the triangle and corpus engines "
+                 "and --seeds runs")
+    if args.profile is not None:
+        prof.enable(trace=bool(args.profile))
+        atexit.register(_dump_profile, args.profile)
+
+    # info lines must not corrupt a structured document on stdout
+    info = (lambda m: print(m, file=sys.stderr)) if args.format != "text" else print
+    timing, counters = {}, {}
 
-    graph_cfg = load_contexts(args.config)
-    # Use helper to convert config to runtime structure
-    runtime = config_to_runtime(graph_cfg)
+    t0 = time.perf_counter()
+    cfg_stats = {}
+    with prof.phase("yaml_load"):
+        graph_cfg = load_contexts(args.config, stats=cfg_stats,
+                                  cache_dir=None if args.no_cache else CONFIG_DIR)
+    t1 = time.perf_counter()
+    timing.update(yaml_load=t1 - t0, yaml_parse=cfg_stats["yaml_parse_s"])
+    counters["config_cache_hit"] = cfg_stats["config_cache_hit"]
 
     # Use config tolerance if CLI flag omitted
     tolerance = args.tolerance if args.tolerance is not None else graph_cfg.get('tolerance', 0.30)
 
-    results = check_triangles(runtime, tol=tolerance,
-                              changed_files=args.changed)
+    if args.base:
+        return _run_differential(args, graph_cfg, tolerance, info, timing, counters)
+
+    # Result cache: config bytes, artefact hashes (stat‑checked via the
+    # index), checker sources and every verdict‑relevant option.  Sampling
+    # is random, so it always runs.
+    index = key = cached = None
+    artifacts = artifact_paths(graph_cfg)
+    if not (args.no_cache or args.sample_budget):
+        with prof.phase("artifact_index"):
+            # a miss loads the edge artefacts next: keep what hashing reads
+            keep = () if args.memory_budget else [
+                p for p in artifact_paths({"edges": graph_cfg["edges"]}) if p.suffix == ".npy"]
+            index = ArtifactIndex(paranoid=args.paranoid, keep=keep)
+            # the verdict depends on this script and every engine module too
+            key = run_key(index, [args.config, __file__, gerbe_core.__file__,
+                                  gerbe_ops.__file__, gerbe_index.__file__, *artifacts],
+                          tolerance, args.engine, args.changed, args.seeds, args.radius,
+                          args.check_inverses, args.inverse_tol, args.corpus_stat)
+            index.save()
+            cached = load_result(key)
+        timing["artifact_index"] = time.perf_counter() - t1
+        counters.update(artifacts_hashed=index.hashed, artifact_stat_hits=index.stat_hits)
+
+    if cached is not None:
+        results = [(tuple(t), kind) for t, kind in cached["results"]]
+        runtime = {"mats": dict.fromkeys(map(tuple, cached["edges"]))}
+        index.blobs.clear()
+        # cache_hits is only ever set here: 1 = verdict reused from the result cache
+        counters = {**cached["counters"], **counters, "bytes_read": 0, "cache_hits": 1}
+        info(f"ℹ  Config and {len(artifacts)} artefacts unchanged – "
+             f"reusing cached verdict")
+    else:
+        runtime = _load_runtime(args, graph_cfg, info, timing, counters,
+                                blobs=index and index.blobs)
+        # --seeds runs take the index too: it counts what the ball skipped
+        if not (args.no_cache or args.sample_budget or args.changed
+                or (args.engine == "cocycle" and args.seeds is None)):
+            _attach_triangle_index(runtime, info, timing, counters)
+        results = run_checks(args, runtime, tolerance, info, timing, counters)
+        if key is not None:
+            store_result(key, {"results": results, "edges": list(runtime["mats"]),
+                               "counters": counters})
+
+    if args.history:
+        scope = ("sample" if args.sample_budget else "seeds" if args.seeds is not None
+                 else "changed" if args.changed else "full")
+        _record_history(args, results, scope, tolerance, info, timing, counters,
+                        cached=cached is not None)
+
+    # inverse failures are edges, not triangles – keep them out of blame
+    triangles = [r for r in results if r[1] != "inverse"]
+
+    if args.format != "text":
+        report = {"tool": "gerbe", "config": args.config, "mode": args.mode,
+                  "engine": args.engine, "tolerance": tolerance, "ok": not results,
+                  "timing": {k: round(v, 6) for k, v in timing.items()},
+                  "counters": counters}
+        if args.blame and args.format == "json":
+            with prof.phase("blame"):
+                report["suspects"] = blame_edges(triangles, runtime,
+                                                 keep_triangles=args.list_triangles)
+        print(EMITTERS[args.format](results, report))
+        if results and args.mode == "block":
+            sys.exit(1)
+        return
 
     if not results:          # everything glued
         print("✅  Gerbe gate: no inconsistencies")
@@ -96,8 +855,22 @@ def main():
 
     # pretty print issues
     print("\n⚠  Gerbe found inconsistencies:")
-    for tri, kind in results:
-        print(f"   • {tri}   ({kind})")
+    if args.blame:
+        with prof.phase("blame"):
+            suspects = blame_edges(triangles, runtime, keep_triangles=args.list_triangles)
+        print(f"   {len(triangles)} failing triangles → {len(suspects)} suspect edges")
+        for s in suspects:
+            x, y = s["edge"]
+            print(f"   • {x}–{y}   ({s['kind']})  explains {s['explains']}"
+                  f"/{s['failures']}  share {s['share']:.0%}")
+            for tri in s.get("triangles", []):
+                print(f"       ◦ {tri}")
+        for edge, kind in results:
+            if kind == "inverse":
+                print(f"   • {edge[0]}⇄{edge[1]}   (inverse)")
+    else:
+        for tri, kind in results:
+            print(f"   • {tri}   ({kind})")
 
     if args.mode == "block":
         sys.exit(1)          # fail CI
@@ -12,7 +12,7 @@ CLI flags
 A green exit (code 0) requires:  Precision ≥ 0.90, Recall ≥ 0.95, F1 ≥ 0.92
 """
 
-import argparse, pickle, sys
+import argparse, itertools, pickle, sys
 import numpy as np
 import networkx as nx
 
@@ -46,27 +46,34 @@ def build_graph(edge_keys):
 def triangles_iter(G):
     return (clq for clq in nx.enumerate_all_cliques(G) if len(clq) == 3)
 
-def embedding_obstructions(ctx, mats, vec, G): # Removed tol parameter
-    bad = []
-    for a, b, c in triangles_iter(G):
-        # Need to check both orientations since graph is undirected now in detection
-        # Check orientation a -> b -> c vs a -> c
-        if all(k in mats for k in [(a, b), (b, c), (a, c)]):
-            lhs = mats[(b, c)] @ (mats[(a, b)] @ vec)
-            rhs = mats[(a, c)] @ vec
-            if not deep_close(lhs, rhs): # Use default rel_tol
-                bad.append(tuple(sorted((a, b, c))))
-                continue # Found obstruction for this triangle, no need to check other orientations
+# The 6 directed edges of a triangle (t0, t1, t2); an orientation (i, j, k)
+# compares t_i→t_j→t_k with t_i→t_k.  Same bitmask scheme as gerbe_core,
+# copied so the harness stays self‑contained.
+_SLOTS = [(0, 1), (1, 0), (1, 2), (2, 1), (0, 2), (2, 0)]
+_PERMS = list(itertools.permutations(range(3)))
+_NEED  = [sum(1 << _SLOTS.index(p) for p in ((i, j), (j, k), (i, k)))
+          for i, j, k in _PERMS]
+_AVAIL = [[_PERMS[o] for o in range(6) if m & _NEED[o] == _NEED[o]]
+          for m in range(64)]
 
-        # Check orientation c -> b -> a vs c -> a (reverse)
-        # This is implicitly covered if the first check fails due to drift,
-        # as the comparison deep_close(lhs, rhs) captures the inconsistency.
-        # No need for a separate check if the underlying matrices are consistent
-        # or inconsistent regardless of traversal direction for composition check.
-        # Let's simplify and assume the first check covers the triangle inconsistency.
+def orientations(tri, mats):
+    m = sum(1 << bit for bit, (p, q) in enumerate(_SLOTS) if (tri[p], tri[q]) in mats)
+    return [(tri[i], tri[j], tri[k]) for i, j, k in _AVAIL[m]]
 
-    # Remove duplicates before returning
-    return list(set(bad))
+def embedding_obstructions(ctx, mats, vec, G): # Removed tol parameter
+    bad, hop = [], {}                 # hop: first‑hop vectors M_e·vec, shared
+    for tri in triangles_iter(G):
+        # Every stored orientation, one enumeration pass
+        for a, b, c in orientations(tri, mats):
+            for e in ((a, b), (a, c)):
+                if e not in hop:
+                    hop[e] = mats[e] @ vec
+            lhs = mats[(b, c)] @ hop[(a, b)]
+            if not deep_close(lhs, hop[(a, c)]): # Use default rel_tol
+                bad.append(tuple(sorted(tri)))
+                break # Found obstruction for this triangle, no need to check other orientations
+
+    return bad
 
 
 def policy_obstructions(patches, base, G):
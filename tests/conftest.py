@@ -0,0 +1,70 @@
+"""Shared fixtures: small random graphs with a few drifted edges."""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def canon(issues):
+    """Issues as a set, independent of which orientation was reported."""
+    return {(frozenset(t), kind) for t, kind in issues}
+
+
+def make_graph(n=12, edges=36, dim=6, drift=0.15, seed=0, mmap_dir=None):
+    """
+    `edges` consistent pairs M_ab = Q_b Q_aᵀ (+ inverse), a `drift` fraction
+    replaced by noise; with `mmap_dir` every payload is saved and memory‑mapped.
+    """
+    rng, rnd = np.random.default_rng(seed), random.Random(seed)
+    ctx = [f"C{i}" for i in range(n)]
+    Q = {c: np.linalg.qr(rng.standard_normal((dim, dim)))[0] for c in ctx}
+    mats = {}
+    while len(mats) < 2 * edges:
+        a, b = rnd.sample(ctx, 2)
+        if (a, b) in mats or (b, a) in mats:
+            continue
+        M = Q[b] @ Q[a].T
+        if rnd.random() < drift:
+            M = M + 0.8 * rng.standard_normal((dim, dim))
+        mats[(a, b)] = M
+        mats[(b, a)] = np.linalg.inv(M)
+    if mmap_dir is not None:
+        for i, (e, M) in enumerate(list(mats.items())):
+            path = os.path.join(mmap_dir, f"{i}.npy")
+            np.save(path, M)
+            mats[e] = np.load(path, mmap_mode="r")
+    return {"contexts": ctx, "mats": mats, "base_vec": np.eye(dim)[0]}
+
+
+def make_mixed_graph(n=12, edges=36, dims=(4, 6, 8), drift=0.15, seed=0, noise=0.8):
+    """
+    Like make_graph over contexts of mixed dimension: M_ab = P_b P_aᵀ with
+    P_c (d_c × min(dims)) orthonormal columns, reverse edges the pseudo‑inverse;
+    drifted edges get `noise`‑scaled Gaussian noise.
+    """
+    rng, rnd = np.random.default_rng(seed), random.Random(seed)
+    ctx = [f"C{i}" for i in range(n)]
+    dim = {c: int(rng.choice(dims)) for c in ctx}
+    P = {c: np.linalg.qr(rng.standard_normal((dim[c], min(dims))))[0] for c in ctx}
+    mats = {}
+    while len(mats) < 2 * edges:
+        a, b = rnd.sample(ctx, 2)
+        if (a, b) in mats or (b, a) in mats:
+            continue
+        M = P[b] @ P[a].T
+        if rnd.random() < drift:
+            M = M + noise * rng.standard_normal(M.shape)
+        mats[(a, b)] = M
+        mats[(b, a)] = np.linalg.pinv(M)
+    return {"contexts": ctx, "mats": mats, "dims": dim,
+            "base_vec": np.eye(max(dims))[0]}
+
+
+@pytest.fixture
+def graph():
+    return make_graph()
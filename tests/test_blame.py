@@ -0,0 +1,47 @@
+import networkx as nx
+
+from conftest import make_graph
+from gerbe_core import blame_edges, check_triangles
+
+
+def drift(g, *edges):
+    for a, b in edges:
+        g["mats"][(a, b)] = 2 * g["mats"][(a, b)]
+        g["mats"][(b, a)] = 0.5 * g["mats"][(b, a)]
+    return g
+
+
+def busiest_edges(g, k):
+    G = nx.Graph(list(g["mats"]))
+    share = {e: len(set(G[e[0]]) & set(G[e[1]])) for e in G.edges()}
+    return sorted(share, key=share.get, reverse=True)[:k]
+
+
+def test_single_drifted_edge_explains_everything():
+    g = make_graph(seed=4, drift=0.0)
+    e = busiest_edges(g, 1)[0]
+    issues = check_triangles(drift(g, e), tol=0.3)
+    assert issues
+    top, *rest = blame_edges(issues, graph=g, keep_triangles=True)
+    assert set(top["edge"]) == set(e)
+    assert top["explains"] == top["failures"] == len(issues)
+    assert top["share"] == 1.0 and len(top["triangles"]) == len(issues)
+    assert rest == []
+
+
+def test_greedy_cover_finds_both_edges():
+    g = make_graph(seed=4, drift=0.0)
+    e1 = busiest_edges(g, 1)[0]
+    e2 = next(e for e in busiest_edges(g, 20) if not set(e) & set(e1))
+    issues = check_triangles(drift(g, e1, e2), tol=0.3)
+    suspects = blame_edges(issues, graph=g)
+    assert {frozenset(s["edge"]) for s in suspects} == {frozenset(e1), frozenset(e2)}
+    assert sum(s["explains"] for s in suspects) == len(issues)
+    assert blame_edges(issues, graph=g, top=1) == suspects[:1]
+
+
+def test_blame_without_graph_defaults_share():
+    tri = [(("A", "B", "C"), "numeric")]
+    suspects = blame_edges(tri)
+    assert len(suspects) == 1 and suspects[0]["share"] == 1.0
+    assert blame_edges([]) == []
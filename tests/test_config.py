@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pytest
+import yaml
+
+from gerbe_validate import compile_config, decompile_config, load_contexts
+
+CFG = {
+    "dim": 8,
+    "tolerance": 0.25,
+    "nodes": ["A", {"id": "B", "dim": 4, "corpus": "emb/B.npy"}, "C", "Ünï"],
+    "edges": [
+        {"src": "A", "dst": "B", "matrix": "m/ab.npy", "inverse": "m/ba.npy"},
+        {"src": "B", "dst": "C", "matrix": "m/shared.npy", "patch": "p/bc.yaml"},
+        {"src": "C", "dst": "A", "matrix": "m/shared.npy", "owner": "team‑x"},
+        {"src": "A", "dst": "C", "matrix": None},
+        {"src": "C", "dst": "Ünï", "op": {"kind": "lowrank", "A": "a.npy", "B": "b.npy"}},
+    ],
+}
+
+
+def roundtrip(cfg):
+    buf = io.BytesIO()
+    np.savez(buf, **compile_config(cfg))
+    buf.seek(0)
+    with np.load(buf) as z:
+        return decompile_config(z)
+
+
+def test_compile_roundtrip():
+    assert roundtrip(CFG) == CFG
+
+
+def test_compiled_paths_are_interned():
+    arrays = compile_config(CFG)
+    assert arrays["edges"].dtype == np.int32 and arrays["edges"].shape == (5, 2)
+    # m/shared.npy appears twice but is stored once
+    assert arrays["paths"].tobytes().decode().split("\0").count("m/shared.npy") == 1
+
+
+@pytest.mark.parametrize("bad", [
+    {"nodes": [1, 2], "edges": []},
+    {"nodes": ["A"], "edges": [{"src": "A", "dst": "B", "matrix": 3}]},
+])
+def test_unrepresentable_ids_raise(bad):
+    with pytest.raises(TypeError):
+        compile_config(bad)
+
+
+def test_load_contexts_uses_the_compiled_form(tmp_path):
+    path = tmp_path / "contexts.yaml"
+    path.write_text(yaml.safe_dump(CFG, allow_unicode=True))
+    cache, first, again = tmp_path / "cache", {}, {}
+    assert load_contexts(path, cache_dir=cache, stats=first) == CFG
+    assert load_contexts(path, cache_dir=cache, stats=again) == CFG
+    assert (first["config_cache_hit"], again["config_cache_hit"]) == (0, 1)
+    assert len(list(cache.glob("*.npz"))) == 1
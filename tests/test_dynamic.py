@@ -0,0 +1,141 @@
+import random
+
+import numpy as np
+import pytest
+
+from conftest import canon, make_graph
+from gerbe_core import GerbeGraph, TransportTable, check_triangles
+
+
+def reference(gg):
+    return canon(check_triangles({**gg.graph, "mats": dict(gg.mats)}, tol=gg.tol))
+
+
+def test_initial_state_matches_full_check(graph):
+    gg = GerbeGraph(graph, tol=0.3)
+    assert canon(gg.obstructions()) == canon(check_triangles(graph, tol=0.3))
+    assert gg.mats is not graph["mats"]               # input dicts are copied
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_mutation_stream_tracks_check_triangles(seed):
+    rnd, rng = random.Random(seed), np.random.default_rng(seed)
+    clean = make_graph(seed=seed, drift=0.0)
+    gg = GerbeGraph(make_graph(seed=seed), tol=0.3)
+    events, live = [], canon(gg.obstructions())
+    gg.listeners.append(lambda *ev: events.append(ev))
+    ctx = gg.graph["contexts"]
+    for step in range(150):
+        r = rnd.random()
+        if r < 0.3:
+            a, b = rnd.sample(ctx, 2)
+            out = gg.add_edge(a, b, rng.standard_normal((6, 6)))
+        elif r < 0.7:
+            e = rnd.choice(sorted(gg.mats))
+            M = clean["mats"].get(e) if rnd.random() < 0.5 else None
+            out = gg.update_edge(*e, M if M is not None else 2 * gg.mats[e])
+        else:
+            e = rnd.choice(sorted(gg.mats))
+            out = gg.remove_edge(*e)
+        live = (live - canon(out["fixed"])) | canon(out["new"])
+        assert live == canon(gg.obstructions()) == reference(gg), step
+    assert len(events) == 150 and gg.stats()["updates"] == 150
+    assert {ev for ev, *_ in events} <= {"add", "update", "remove"}
+
+
+def test_remove_keeps_pair_while_reverse_exists():
+    I = np.eye(2)
+    gg = GerbeGraph({"mats": {("A", "B"): I, ("B", "A"): I, ("B", "C"): I,
+                              ("A", "C"): 3 * I}, "base_vec": I[0]}, tol=0.3)
+    assert len(gg.obstructions()) == 1
+    out = gg.remove_edge("A", "B")                    # B→A still joins A–B
+    assert gg.triangles() and out == {"new": [], "fixed": []}
+    out = gg.remove_edge("B", "A")
+    assert gg.triangles() == [] and len(out["fixed"]) == 1
+    with pytest.raises(KeyError):
+        gg.update_edge("A", "B", I)
+
+
+# -- TransportTable ---------------------------------------------------------------
+def held_out(seed, k=4):
+    """Clean GerbeGraph minus k edge pairs, plus those pairs' true payloads."""
+    g = make_graph(seed=seed, drift=0.0)
+    pairs = [e for e in g["mats"] if e < e[::-1]][:k]
+    out = {e: g["mats"].pop(e) for p in pairs for e in (p, p[::-1])}
+    return GerbeGraph(g, tol=0.3), out
+
+
+def frames_consistent(table):
+    gg = table.gg
+    for n, e in table.up.items():
+        if e is None:
+            assert table.root[n] == n
+            continue
+        x = e[0] if e[1] == n else e[1]
+        want = (gg.mats[e] @ table.t[x] if e[0] == x
+                else np.linalg.solve(gg.mats[e], table.t[x]))
+        assert np.allclose(table.t[n], want)
+    comps = {frozenset(m) for m in table.members.values()}
+    seen = set()
+    for n in gg.adj:                                  # members = components of adj
+        if n in seen:
+            continue
+        comp, stack = set(), [n]
+        while stack:
+            x = stack.pop()
+            if x not in comp:
+                comp.add(x); stack.extend(gg.adj[x])
+        seen |= comp
+        assert frozenset(comp) in comps
+
+
+@pytest.mark.parametrize("probes", [1, 3])
+def test_admit_accepts_consistent_and_rejects_drift(probes):
+    gg, truth = held_out(0)
+    table = TransportTable(gg, probes=probes)
+    for (a, b), M in truth.items():
+        good = table.admit(a, b, M)
+        assert good["ok"] and good["closing"] and good["error"] < 1e-8
+        assert not table.admit(a, b, 2 * M)["ok"]
+    st = table.stats()
+    assert st["admitted"] == st["rejected"] == len(truth) and st["components"] == 1
+    assert table.admit("C0", "nowhere", np.eye(6)) == {"ok": True, "error": 0.0,
+                                                       "closing": False}
+
+
+def test_table_follows_mutations():
+    rnd = random.Random(1)
+    gg, truth = held_out(1)
+    table, pool = TransportTable(gg), []
+    for step in range(200):
+        e = rnd.choice(sorted(gg.mats))
+        r = rnd.random()
+        if r < 0.4:
+            pool.append((e, gg.mats[e]))
+            gg.remove_edge(*e)
+        elif r < 0.8 and pool:
+            (a, b), M = pool.pop(rnd.randrange(len(pool)))
+            gg.add_edge(a, b, M)
+        else:
+            gg.update_edge(*e, gg.mats[e].copy())      # same content, new payload
+        if step % 20 == 0:
+            gg.add_edge(f"N{step}", e[0], np.eye(6))   # new node joins a component
+        frames_consistent(table)
+    assert table.stats()["reframed"] > 0
+    fresh = TransportTable(gg)
+    for (a, b), M in truth.items():
+        for cand in (M, 2 * M):
+            assert table.admit(a, b, cand)["ok"] == fresh.admit(a, b, cand)["ok"]
+
+
+def test_join_reframes_the_smaller_component():
+    I = np.eye(2)
+    mats = {("A", "B"): I, ("B", "C"): I, ("C", "D"): I, ("X", "Y"): I}
+    gg = GerbeGraph({"mats": mats, "base_vec": I[0]}, tol=0.3)
+    table = TransportTable(gg)
+    assert table.stats()["components"] == 2
+    gg.add_edge("D", "X", I)
+    st = table.stats()
+    assert st["components"] == 1 and st["reframed"] == 2
+    assert table.root["X"] == table.root["A"]
+    frames_consistent(table)
@@ -0,0 +1,51 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from conftest import canon, make_graph
+from gerbe_core import check_triangles
+
+
+@pytest.mark.parametrize("budget", [2_000, 10_000, 1 << 20])
+def test_out_of_core_matches_in_memory(tmp_path, budget):
+    ref = check_triangles(make_graph(seed=3), tol=0.3)
+    g = make_graph(seed=3, mmap_dir=str(tmp_path))
+    stats = {}
+    got = check_triangles(g, tol=0.3, memory_budget=budget, stats=stats)
+    assert ref and canon(got) == canon(ref)
+    assert stats["cache_misses"] > 0
+
+
+def test_shared_payload_hop_cache():
+    # many edges share one payload object; per‑edge results must not mix
+    g = make_graph(seed=5, drift=0.0)
+    I = np.eye(6)
+    for e in list(g["mats"])[:10]:
+        g["mats"][e] = I
+    ref = {k: np.array(v) for k, v in g["mats"].items()}
+    assert canon(check_triangles(g, tol=0.3)) == canon(check_triangles({**g, "mats": ref}, tol=0.3))
+
+
+def test_seeds_skip_count_is_opt_in(graph, monkeypatch):
+    seeds, full = list(graph["mats"])[:2], {}
+    check_triangles(graph, tol=0.3, stats=full)
+    calls = []
+    real = nx.triangles
+    monkeypatch.setattr(nx, "triangles", lambda G: calls.append(G) or real(G))
+    stats = {}
+    check_triangles(graph, tol=0.3, seeds=seeds, stats=stats)
+    assert "triangles_skipped" not in stats and not calls
+    check_triangles(graph, tol=0.3, seeds=seeds, stats=stats, count_skipped=True)
+    assert (stats["triangles_skipped"]
+            == full["triangles_enumerated"] - stats["triangles_enumerated"])
+
+
+def test_progress_total_is_the_checked_count(graph, monkeypatch):
+    monkeypatch.setattr(nx, "triangles", None)        # no second enumeration
+    edges = list(graph["mats"])[:3]
+    for kw in ({}, {"edges": edges}, {"memory_budget": 4096}):
+        calls, stats = [], {}
+        check_triangles(graph, tol=0.3, progress=lambda d, t: calls.append((d, t)),
+                        stats=stats, **kw)
+        assert calls[-1] == (stats["triangles_enumerated"],) * 2
+        assert all(t == calls[-1][1] for _, t in calls)
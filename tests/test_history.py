@@ -0,0 +1,61 @@
+import json
+import time
+
+from gerbe_history import RunHistory, main, record_run
+
+DAY = 86400
+NOW = time.time()
+
+
+def seeded(path):
+    h = RunHistory(path)
+    h.record("gerbe_validate", [(("A", "B", "C"), "numeric"), (("B", "C", "D"), "numeric")],
+             config="contexts.yaml", started=NOW - 10 * DAY, meta={"engine": "triangle"})
+    h.record("gerbe_validate", [(("C", "A", "B"), "numeric"), (("A", "B"), "inverse")],
+             started=NOW - 2 * DAY)
+    h.record("gerbe_full_demo", [(("B", "A", "C"), "policy")], scope="seeds",
+             started=NOW - 1 * DAY)
+    return h
+
+
+def test_runs_newest_first(tmp_path):
+    with seeded(tmp_path / "h.sqlite") as h:
+        runs = h.runs()
+        assert [r["run"] for r in runs] == [3, 2, 1]
+        assert [r["issues"] for r in runs] == [1, 2, 2]
+        assert runs[2]["meta"] == {"engine": "triangle"} and runs[2]["config"] == "contexts.yaml"
+        assert [r["run"] for r in h.runs(source="gerbe_full_demo")] == [3]
+        assert len(h.runs(limit=1)) == 1
+
+
+def test_triangle_first_and_last_failure(tmp_path):
+    with seeded(tmp_path / "h.sqlite") as h:
+        t = h.triangle(("C", "B", "A"))               # any node order
+        assert (t["first_run"], t["last_run"], t["failed_runs"]) == (1, 3, 3)
+        assert sorted(t["kinds"]) == ["numeric", "policy"]
+        assert t["runs_since_first"] == 3
+        assert h.triangle(("B", "C", "D"))["last_run"] == 1
+        assert h.triangle(("X", "Y", "Z")) is None
+
+
+def test_top_edges_and_triangles_since(tmp_path):
+    with seeded(tmp_path / "h.sqlite") as h:
+        edges = {tuple(r["edge"]): r["failures"] for r in h.top_edges()}
+        # A–B: three failing triangles plus the inverse failure on the edge
+        assert edges[("A", "B")] == 4 and edges[("B", "D")] == 1
+        assert [r["failures"] for r in h.top_edges(limit=2)] == [4, 4]     # A–B, B–C
+        recent = {tuple(r["edge"]): r["failures"] for r in h.top_edges(since="5d")}
+        assert recent[("A", "B")] == 3 and ("B", "D") not in recent
+        tris = h.top_triangles()
+        assert tris[0]["triangle"] == ["A", "B", "C"] and tris[0]["failed_runs"] == 3
+        assert [r["failed_runs"] for r in h.top_triangles(since="5d")] == [2]
+
+
+def test_record_run_and_cli(tmp_path, capsys):
+    db = tmp_path / "h.sqlite"
+    run, seconds = record_run(db, "gerbe_validate", [(("A", "B", "C"), "numeric")])
+    assert run == 1 and seconds >= 0
+    main(["--db", str(db), "--json", "triangle", "A", "B", "C"])
+    assert json.loads(capsys.readouterr().out)["failed_runs"] == 1
+    main(["--db", str(db), "runs"])
+    assert "gerbe_validate" in capsys.readouterr().out
@@ -0,0 +1,65 @@
+import networkx as nx
+import numpy as np
+
+from conftest import canon
+from gerbe_core import check_triangles, enumerate_triangles
+from gerbe_index import TriangleIndex, load_triangle_index
+
+
+def test_index_rejects_same_size_topology(graph):
+    G = nx.Graph(list(graph["mats"]))
+    idx = TriangleIndex.build(G)
+    assert idx.matches(G)
+    # swap one edge for a new one: same edge count, different topology
+    u, v = next(iter(G.edges()))
+    H = G.copy()
+    H.remove_edge(u, v)
+    H.add_edge(u, "fresh")
+    assert H.number_of_edges() == G.number_of_edges()
+    assert not idx.matches(H)
+
+    mats = {e: M for e, M in graph["mats"].items() if set(e) != {u, v}}
+    mats[(u, "fresh")] = np.eye(6)
+    g = {**graph, "mats": mats, "triangle_index": idx}
+    assert canon(check_triangles(g, tol=0.3)) == canon(
+        check_triangles({**graph, "mats": mats}, tol=0.3))
+
+
+def test_index_key_survives_save(graph, tmp_path):
+    G = nx.Graph(list(graph["mats"]))
+    load_triangle_index(G, root=tmp_path)
+    idx = TriangleIndex.load(next(d for d in tmp_path.iterdir() if d.is_dir()))
+    assert idx._key is not None and idx.matches(G)
+    assert sorted(map(sorted, idx.triangles())) == sorted(
+        map(sorted, enumerate_triangles(G)))
+
+
+def _tris(idx):
+    return sorted(sorted(t) for t in idx.triangles())
+
+
+def test_load_builds_hits_and_updates(graph, tmp_path):
+    G = nx.Graph(list(graph["mats"]))
+    stats = {}
+    built = load_triangle_index(G, root=tmp_path, stats=stats)
+    assert stats["triangle_index"] == "built"
+    assert _tris(built) == sorted(sorted(t) for t in enumerate_triangles(G))
+
+    hit = load_triangle_index(G, root=tmp_path, stats=stats)
+    assert stats["triangle_index"] == "hit" and _tris(hit) == _tris(built)
+
+    H = G.copy()
+    H.remove_edge(*next(iter(G.edges())))
+    H.add_edges_from([("C0", "C5"), ("C5", "new"), ("new", "C0")])
+    upd = load_triangle_index(H, root=tmp_path, stats=stats)
+    assert stats["triangle_index"] == "updated"
+    assert upd.matches(H)
+    assert _tris(upd) == sorted(sorted(t) for t in enumerate_triangles(H))
+
+
+def test_engines_read_the_index(graph):
+    idx = TriangleIndex.build(nx.Graph(list(graph["mats"])))
+    ref = canon(check_triangles(graph, tol=0.3))
+    stats = {}
+    got = check_triangles({**graph, "triangle_index": idx}, tol=0.3, stats=stats)
+    assert canon(got) == ref and stats["triangles_enumerated"] == len(idx)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from gerbe_core import check_inverses
+from gerbe_ops import IdentityOp, LowRankOp, PermutationOp
+
+
+def exact(L, R, tol):
+    E = L @ R - np.eye(len(L))
+    return float(np.abs(E).max()) <= tol
+
+
+def orthonormal(rng, d, eps):
+    Q = np.linalg.qr(rng.standard_normal((d, d)))[0]
+    return Q + eps * rng.standard_normal((d, d))
+
+
+# perturbations on both sides of tol=1e-3, and far from it
+EPS = [0.0, 1e-6, 2e-4, 5e-4, 1e-3, 3e-3, 1e-1]
+
+
+@pytest.mark.parametrize("pairs", [False, True])
+def test_estimate_agrees_with_exact_product(pairs):
+    rng, tol = np.random.default_rng(0), 1e-3
+    mats, want = {}, {}
+    for i, eps in enumerate(EPS * 4):
+        d = (8, 16)[i % 2]
+        M = orthonormal(rng, d, eps)
+        a, b = f"A{i}", f"B{i}"
+        mats[(a, b)] = M
+        if pairs:
+            back = orthonormal(rng, d, 0.0) if i % 3 == 0 else M.T
+            mats[(b, a)] = back
+            want[(a, b)] = exact(back, M, tol)
+        else:
+            want[(a, b)] = exact(M, M.T, tol)
+    stats = {}
+    got = check_inverses(mats, tol=tol, pairs=pairs, stats=stats)
+    assert got == want
+    assert 0 < stats["exact_fallbacks"] < len(want)
+    assert stats["edges"] == len(want)
+
+
+def test_clear_cases_skip_the_exact_product():
+    rng = np.random.default_rng(1)
+    mats = {("A", str(i)): orthonormal(rng, 32, 0.0) for i in range(6)}
+    mats.update({("B", str(i)): 3 * orthonormal(rng, 32, 0.0) for i in range(6)})
+    stats = {}
+    got = check_inverses(mats, tol=1e-6, stats=stats, chunk_bytes=3 * 32 * 32 * 8)
+    assert got == {e: e[0] == "A" for e in mats}
+    assert stats["exact_fallbacks"] == 0
+
+
+def test_operators_and_shape_mismatch():
+    rng = np.random.default_rng(2)
+    A, B = 0.2 * rng.standard_normal((6, 2)), 0.2 * rng.standard_normal((2, 6))
+    op = LowRankOp(A, B)
+    mats = {("I", "J"): IdentityOp(5), ("P", "Q"): PermutationOp(np.array([2, 0, 1])),
+            ("L", "M"): op, ("M", "L"): op.inverse(),
+            ("X", "Y"): rng.standard_normal((3, 4)), ("Y", "X"): rng.standard_normal((3, 4))}
+    single = check_inverses(mats, tol=1e-6)
+    assert single[("I", "J")] and single[("P", "Q")] and not single[("L", "M")]
+    paired = check_inverses(mats, tol=1e-6, pairs=True)
+    assert paired[("L", "M")] is True
+    assert paired[("X", "Y")] is False                 # (3×4)·(3×4) cannot compose
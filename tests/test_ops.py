@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from gerbe_ops import (BlockDiagOp, DenseOp, DiagonalOp, IdentityOp, Interner,
+                       LowRankOp, PermutationOp, from_spec, invert, solve, tag,
+                       to_dense)
+
+rng = np.random.default_rng(0)
+
+
+def test_from_spec_builds_each_kind():
+    arrays = {"M": rng.standard_normal((4, 4)), "d": np.arange(1.0, 5.0),
+              "p": np.array([2, 0, 3, 1]), "A": rng.standard_normal((4, 2)),
+              "B": rng.standard_normal((2, 4)), "b1": np.eye(2), "b2": 2 * np.eye(2)}
+    specs = {
+        "dense":       ({"kind": "dense", "matrix": "M"}, arrays["M"]),
+        "diagonal":    ({"kind": "diagonal", "diag": "d"}, np.diag(arrays["d"])),
+        "scale":       ({"kind": "diagonal", "dim": 4, "scale": 0.5}, 0.5 * np.eye(4)),
+        "permutation": ({"kind": "permutation", "perm": "p"}, np.eye(4)[arrays["p"]]),
+        "lowrank":     ({"kind": "lowrank", "A": "A", "B": "B"},
+                        np.eye(4) + arrays["A"] @ arrays["B"]),
+        "blockdiag":   ({"kind": "blockdiag", "blocks": ["b1", "b2"]},
+                        np.diag([1.0, 1.0, 2.0, 2.0])),
+        "identity":    ({"kind": "identity", "dim": 4}, np.eye(4)),
+    }
+    x = rng.standard_normal(4)
+    for name, (spec, dense) in specs.items():
+        op = from_spec(spec, load=arrays.__getitem__)
+        assert np.allclose(to_dense(op), dense), name
+        assert np.allclose(op.apply(x), dense @ x), name
+    with pytest.raises(ValueError, match="Unknown"):
+        from_spec({"kind": "sparse"})
+
+
+def test_lowrank_inverse_is_woodbury():
+    A, B = 0.3 * rng.standard_normal((8, 2)), 0.3 * rng.standard_normal((2, 8))
+    op = LowRankOp(A, B)
+    inv = op.inverse()
+    assert isinstance(inv, LowRankOp) and inv.A.shape == (8, 2)
+    assert np.allclose(to_dense(inv), np.linalg.inv(np.eye(8) + A @ B))
+    y = rng.standard_normal(8)
+    assert np.allclose(op.apply(solve(op, y)), y)
+    with pytest.raises(ValueError, match="line up"):
+        LowRankOp(A, B[:, :4])
+
+
+def test_invert_keeps_representation():
+    for op in (DiagonalOp(np.arange(1.0, 5.0)), PermutationOp(np.array([1, 2, 3, 0])),
+               BlockDiagOp([2 * np.eye(2), np.eye(2)]), IdentityOp(4)):
+        inv = invert(op)
+        assert type(inv) is type(op)
+        assert np.allclose(to_dense(inv) @ to_dense(op), np.eye(4))
+    P = rng.standard_normal((3, 5))                    # rectangular → pinv
+    assert np.allclose(invert(P), np.linalg.pinv(P))
+
+
+def test_tag_recognises_identity_and_permutation():
+    assert isinstance(tag(np.eye(5)), IdentityOp)
+    P = tag(np.eye(4)[[3, 1, 0, 2]])
+    assert isinstance(P, PermutationOp)
+    assert np.allclose(P.apply(np.arange(4.0)), [3, 1, 0, 2])
+    M = np.eye(4); M[0, 0] = 2
+    assert tag(M) is M
+
+
+def test_interner_dedups_by_content():
+    intern = Interner()
+    M = rng.standard_normal((3, 3))
+    a, b = intern(M), intern(M.copy())
+    assert a is b
+    assert intern(np.eye(3)) is intern(np.eye(3).copy()) is intern.identity(3)
+    assert intern(M.astype(np.float32)) is not a         # dtype is part of the key
+    op = DenseOp(M)
+    assert intern(op) is op
+    st = intern.stats()
+    assert st["edges"] == 7 and st["unique_payloads"] == 4
+    assert st["bytes_saved"] == M.nbytes + 3 * np.eye(3).nbytes
+    assert not isinstance(Interner(tag=False)(np.eye(3)), IdentityOp)
@@ -0,0 +1,33 @@
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from gerbe_core import check_triangles, sample_triangles
+
+
+def hub_graph(seed=0):
+    """Clustered power‑law graph whose drifted edges join two hubs, so
+    obstructions concentrate on hub triangles."""
+    rnd = random.Random(seed)
+    G = nx.powerlaw_cluster_graph(300, 4, 0.6, seed=seed)
+    deg = dict(G.degree())
+    I, D = np.eye(3), 2 * np.eye(3)
+    mats = {(f"n{u}", f"n{v}"): D if min(deg[u], deg[v]) >= 12 and rnd.random() < 0.7 else I
+            for u, v in G.edges()}
+    return {"mats": mats, "base_vec": np.eye(3)[0]}
+
+
+@pytest.mark.parametrize("weighting", ["uniform", "degree"])
+def test_sampled_rate_covers_exact_rate(weighting):
+    g = hub_graph()
+    stats = {}
+    true = len(check_triangles(g, tol=0.3, stats=stats)) / stats["triangles_enumerated"]
+    covered = 0
+    for seed in range(3):
+        est = sample_triangles(g, tol=0.3, budget=8_000, ci=0.0,
+                               weighting=weighting, seed=seed)
+        assert abs(est["rate"] - true) < 0.03
+        covered += est["ci_low"] <= true <= est["ci_high"]
+    assert covered >= 2
@@ -0,0 +1,221 @@
+"""gerbe_validate.py end to end, run as a subprocess in a scratch folder."""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import yaml
+
+import gerbe_validate
+from conftest import make_graph
+
+VALIDATE = os.path.join(os.path.dirname(__file__), "..", "gerbe_validate.py")
+
+
+def write_bundle(root, seed=1):
+    """contexts.yaml + one .npy per stored direction of make_graph()."""
+    g = make_graph(seed=seed)
+    (root / "models").mkdir(exist_ok=True)
+    edges, done = [], set()
+    for i, ((a, b), M) in enumerate(g["mats"].items()):
+        if (b, a) in done:
+            continue
+        done.add((a, b))
+        np.save(root / "models" / f"{a}_{b}.npy", M)
+        np.save(root / "models" / f"{b}_{a}.npy", g["mats"][(b, a)])
+        edges.append({"src": a, "dst": b, "matrix": f"models/{a}_{b}.npy",
+                      "inverse": f"models/{b}_{a}.npy"})
+    cfg = {"dim": 6, "nodes": g["contexts"], "edges": edges}
+    (root / "contexts.yaml").write_text(yaml.safe_dump(cfg))
+    return g
+
+
+def run(root, *args, script=VALIDATE):
+    p = subprocess.run([sys.executable, script, "--config", "contexts.yaml",
+                        "--format", "json", *args],
+                       cwd=root, capture_output=True, text=True)
+    assert p.returncode in (0, 1), p.stderr
+    return p.returncode, json.loads(p.stdout)
+
+
+def git(root, *args):
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    write_bundle(tmp_path)
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "add", ".")
+    git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "base")
+    return tmp_path
+
+
+def test_base_unchanged_reports_nothing(repo):
+    code, out = run(repo, "--base", "HEAD", "--mode", "block")
+    assert code == 0 and out["issues"] == []
+    assert out["counters"]["edges_changed"] == 0
+
+
+def test_base_reports_new_and_fixed(repo):
+    _, full = run(repo, "--no-cache")
+    bad = full["issues"][0]["triangle"]
+    clean = make_graph(seed=1, drift=0.0)["mats"]      # same edges, no drift
+    cfg = yaml.safe_load((repo / "contexts.yaml").read_text())
+    broken = None
+    for e in cfg["edges"]:
+        a, b = e["src"], e["dst"]
+        if a in bad and b in bad:                       # repair a failing triangle
+            np.save(repo / e["matrix"], clean[(a, b)])
+            np.save(repo / e["inverse"], clean[(b, a)])
+        elif broken is None and a not in bad and b not in bad:
+            broken = e                                  # drift an unrelated edge
+            np.save(repo / e["matrix"], 7 * np.eye(6))
+    code, out = run(repo, "--base", "HEAD", "--mode", "block")
+    _, head = run(repo, "--no-cache")
+    before = {frozenset(i["triangle"]) for i in full["issues"]}
+    after = {frozenset(i["triangle"]) for i in head["issues"]}
+    assert after - before and before - after
+    assert {frozenset(i["triangle"]) for i in out["issues"]} == after - before
+    assert {frozenset(i["triangle"]) for i in out["base"]["fixed"]} == before - after
+    assert code == 1
+    assert out["counters"]["edges_changed"] >= 2
+
+
+@pytest.mark.parametrize("source", ["gerbe_validate.py", "gerbe_core.py",
+                                    "gerbe_ops.py", "gerbe_index.py"])
+def test_result_cache_keys_on_sources(tmp_path, source):
+    root = os.path.dirname(VALIDATE)
+    code_dir = tmp_path / "src"
+    code_dir.mkdir()
+    for f in os.listdir(root):
+        if f.startswith("gerbe_") and f.endswith(".py"):
+            (code_dir / f).write_text(open(os.path.join(root, f)).read())
+    work = tmp_path / "work"
+    work.mkdir()
+    write_bundle(work)
+    script = str(code_dir / "gerbe_validate.py")
+    _, first = run(work, script=script)
+    _, again = run(work, script=script)
+    assert again["counters"].get("cache_hits") == 1
+    assert again["issues"] == first["issues"]
+    with open(code_dir / source, "a") as f:
+        f.write("\n# edited\n")
+    _, edited = run(work, script=script)
+    assert not edited["counters"].get("cache_hits")
+    assert edited["issues"] == first["issues"]
+
+
+def test_corpus_shape_error_exits_cleanly(tmp_path):
+    write_bundle(tmp_path)
+    cfg = yaml.safe_load((tmp_path / "contexts.yaml").read_text())
+    np.save(tmp_path / "wide.npy", np.ones((10, 7)))
+    cfg["nodes"] = [{"id": n, "corpus": "wide.npy"} for n in cfg["nodes"]]
+    (tmp_path / "contexts.yaml").write_text(yaml.safe_dump(cfg))
+    p = subprocess.run([sys.executable, VALIDATE, "--config", "contexts.yaml",
+                        "--engine", "corpus", "--no-cache"],
+                       cwd=tmp_path, capture_output=True, text=True)
+    assert p.returncode == 1 and "has shape (10, 7)" in p.stderr
+    assert "Traceback" not in p.stderr
+
+
+def test_other_engine_value_errors_propagate(monkeypatch):
+    def broken(*args, **kw):
+        raise ValueError("engine bug")
+    monkeypatch.setattr(gerbe_validate, "check_batched", broken)
+    args = argparse.Namespace(sample_budget=None, seeds=None, engine="batched",
+                              memory_budget=None, changed=None)
+    with pytest.raises(ValueError, match="engine bug"):
+        gerbe_validate.run_checks(args, {}, 0.3, print, {}, {})
+
+
+def test_result_cache_follows_artefacts(tmp_path):
+    g = write_bundle(tmp_path)
+    _, first = run(tmp_path)
+    assert "cache_hits" not in first["counters"]          # only a reused verdict sets it
+    _, again = run(tmp_path)
+    assert again["counters"]["cache_hits"] == 1 and again["issues"] == first["issues"]
+
+    # drift one clean edge: the stored verdict must not be reused
+    cfg = yaml.safe_load((tmp_path / "contexts.yaml").read_text())
+    bad = {frozenset(i["triangle"]) for i in first["issues"]}
+    edge = next(e for e in cfg["edges"]
+                if not any({e["src"], e["dst"]} <= t for t in bad))
+    np.save(tmp_path / edge["matrix"], 3 * g["mats"][(edge["src"], edge["dst"])])
+    _, changed = run(tmp_path)
+    assert not changed["counters"].get("cache_hits")
+    _, fresh = run(tmp_path, "--no-cache")
+    assert not fresh["counters"].get("cache_hits")
+    assert changed["issues"] == fresh["issues"] != first["issues"]
+
+
+def test_seeds_report_what_they_skipped(tmp_path):
+    write_bundle(tmp_path)
+    _, full = run(tmp_path, "--no-cache")
+    total = full["counters"]["triangles_checked"]
+    _, ball = run(tmp_path, "--seeds", "C1", "C2")
+    c = ball["counters"]
+    assert 0 < c["triangles_enumerated"] < total
+    assert c["triangles_skipped"] == total - c["triangles_enumerated"]
+    assert {frozenset(i["triangle"]) for i in ball["issues"]} <= {
+        frozenset(i["triangle"]) for i in full["issues"]}
+
+
+@pytest.mark.parametrize("extra", [["--engine", "batched"], ["--engine", "gemm"],
+                                   ["--engine", "cocycle"], ["--sample-budget", "100"]])
+def test_memory_budget_rejects_engines_that_ignore_it(tmp_path, extra):
+    write_bundle(tmp_path)
+    p = subprocess.run([sys.executable, VALIDATE, "--config", "contexts.yaml",
+                        "--memory-budget", "1M", *extra],
+                       cwd=tmp_path, capture_output=True, text=True)
+    assert p.returncode == 2 and "--memory-budget only applies" in p.stderr
+
+
+def test_memory_budget_matches_in_memory(tmp_path):
+    write_bundle(tmp_path)
+    def tris(out):
+        return {(frozenset(i["triangle"]), i["kind"]) for i in out["issues"]}
+    _, ref = run(tmp_path, "--no-cache")
+    _, ooc = run(tmp_path, "--no-cache", "--memory-budget", "4K")
+    assert tris(ooc) == tris(ref) and ooc["counters"]["blocks"] > 1
+    _, ball = run(tmp_path, "--no-cache", "--memory-budget", "4K", "--seeds", "C1", "C2")
+    assert tris(ball) <= tris(ref)
+
+
+def test_git_revision_reaps_cat_file(repo, monkeypatch):
+    monkeypatch.chdir(repo)
+    with gerbe_validate.GitRevision("HEAD") as rev:
+        assert rev.read("contexts.yaml") == (repo / "contexts.yaml").read_bytes()
+        assert rev.read("missing.npy") is None
+        proc = rev._cat
+    assert proc.returncode == 0 and rev._cat is None
+    rev.close()                                        # idempotent
+
+
+def test_base_rejects_other_engines(repo):
+    p = subprocess.run([sys.executable, VALIDATE, "--config", "contexts.yaml",
+                        "--base", "HEAD", "--engine", "gemm"],
+                       cwd=repo, capture_output=True, text=True)
+    assert p.returncode == 2 and "non-triangle --engine" in p.stderr
+
+
+def test_cold_run_loads_hashed_bytes(tmp_path, monkeypatch):
+    g = write_bundle(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    cfg = yaml.safe_load((tmp_path / "contexts.yaml").read_text())
+    paths = gerbe_validate.artifact_paths(cfg)
+    index = gerbe_validate.ArtifactIndex(tmp_path / "index.json", keep=paths)
+    for p in paths:
+        index.digest(p)
+    assert len(index.blobs) == len(paths) == index.hashed
+    for p in paths:                     # the loader must not go back to disk
+        np.save(p, np.zeros((6, 6)))
+    stats = {}
+    rt = gerbe_validate.config_to_runtime(cfg, stats=stats, blobs=index.blobs)
+    e = cfg["edges"][0]
+    assert np.array_equal(rt["mats"][(e["src"], e["dst"])], g["mats"][(e["src"], e["dst"])])
+    assert index.blobs == {} and stats["bytes_read"] == index.hashed_bytes